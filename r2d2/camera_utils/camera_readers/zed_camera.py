@@ -64,6 +64,7 @@ class ZedCamera:
         concatenate_images=False,
         resolution=(0, 0),
         resize_func=None,
+        zero_copy=False,
     ):
         # Non-Permenant Values #
         self.traj_image = image
@@ -74,6 +75,7 @@ class ZedCamera:
         self.depth = depth
         self.pointcloud = pointcloud
         self.resize_func = resize_func_map[resize_func]
+        self.zero_copy = zero_copy
 
     ### Camera Modes ###
     def set_calibration_mode(self):
@@ -164,13 +166,44 @@ class ZedCamera:
         self._cam.disable_recording()
 
     ### Basic Camera Utilities ###
-    def _process_frame(self, frame):
-        frame = deepcopy(frame.get_data())
+    def _get_output_shape(self, frame):
         if self.resizer_resolution == (0, 0):
-            return frame
-        return self.resize_func(frame, self.resizer_resolution)
+            return frame.shape
+        return (self.resizer_resolution[1], self.resizer_resolution[0], frame.shape[2])
+
+    def _process_frame_into(self, frame, out):
+        # Frame Data Belongs To The ZED SDK And Is Overwritten On The Next Grab #
+        if self.resizer_resolution == (0, 0):
+            out[...] = frame
+        else:
+            self.resize_func(frame, self.resizer_resolution, dst=out)
+
+    def _process_images(self, mat_dict, out_dict=None):
+        frames = {full_cam_id: mat.get_data() for full_cam_id, mat in mat_dict.items()}
+        frame_shapes = {full_cam_id: self._get_output_shape(frame) for full_cam_id, frame in frames.items()}
+        dtype = next(iter(frames.values())).dtype
+
+        # Write Into Caller Provided Arrays #
+        if out_dict is not None:
+            image_dict = {full_cam_id: out_dict[full_cam_id] for full_cam_id in frames}
+
+        # Write Into Views Of A Single Buffer #
+        elif self.zero_copy and len(set(frame_shapes.values())) == 1:
+            buffer = np.empty((len(frames), *frame_shapes[next(iter(frames))]), dtype=dtype)
+            image_dict = dict(zip(frames, buffer))
+
+        else:
+            image_dict = {full_cam_id: np.empty(shape, dtype=dtype) for full_cam_id, shape in frame_shapes.items()}
+
+        for full_cam_id, frame in frames.items():
+            self._process_frame_into(frame, image_dict[full_cam_id])
+        return image_dict
+
+    def read_camera(self, out_dict=None):
+        """Returned images are allocated per call and never written to again by the camera, so they can be
+        handed to other threads. With zero_copy, the left and right images are views of one buffer.
+        Arrays in out_dict (keyed like the returned images) are written in place, and stay owned by the caller."""
 
-    def read_camera(self):
         # Skip if Read Unnecesary #
         if self.skip_reading:
             return {}, {}
@@ -193,14 +226,15 @@ class ZedCamera:
         if self.image:
             if self.concatenate_images:
                 self._cam.retrieve_image(self._sbs_img, sl.VIEW.SIDE_BY_SIDE, resolution=self.zed_resolution)
-                data_dict["image"] = {self.serial_number: self._process_frame(self._sbs_img)}
+                mat_dict = {self.serial_number: self._sbs_img}
             else:
                 self._cam.retrieve_image(self._left_img, sl.VIEW.LEFT, resolution=self.zed_resolution)
                 self._cam.retrieve_image(self._right_img, sl.VIEW.RIGHT, resolution=self.zed_resolution)
-                data_dict["image"] = {
-                    self.serial_number + "_left": self._process_frame(self._left_img),
-                    self.serial_number + "_right": self._process_frame(self._right_img),
+                mat_dict = {
+                    self.serial_number + "_left": self._left_img,
+                    self.serial_number + "_right": self._right_img,
                 }
+            data_dict["image"] = self._process_images(mat_dict, out_dict=out_dict)
         # if self.depth:
         # 	self._cam.retrieve_measure(self._left_depth, sl.MEASURE.DEPTH, resolution=self.resolution)
         # 	self._cam.retrieve_measure(self._right_depth, sl.MEASURE.DEPTH_RIGHT, resolution=self.resolution)
@@ -1,10 +1,64 @@
 import json
 import os
-from copy import deepcopy
+import tempfile
+from bisect import bisect_right
 
 import cv2
+import numpy as np
 
 resize_func_map = {"cv2": cv2.resize, None: None}
+interpolation_map = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "cubic": cv2.INTER_CUBIC,
+    "area": cv2.INTER_AREA,
+}
+
+# OpenCV seeks to the keyframe preceding (index - 16) and decodes forward from there #
+OPENCV_SEEK_MARGIN = 16
+
+
+def load_keyframe_index(filepath):
+    """Returns the packet indices of keyframes, or None if OpenCV cannot read packets without decoding. Both results
+    are cached next to the recording, and rebuilt when the recording's mtime or size changes."""
+
+    # Load Cached Index #
+    keyframe_filepath = filepath[:-4] + "_keyframes.json"
+    file_stats = os.stat(filepath)
+    file_info = {"mtime_ns": file_stats.st_mtime_ns, "size": file_stats.st_size}
+
+    if os.path.isfile(keyframe_filepath):
+        try:
+            with open(keyframe_filepath, "r") as jsonFile:
+                cached_index = json.load(jsonFile)
+            if cached_index["file_info"] == file_info:
+                return cached_index["keyframes"]
+        except (ValueError, KeyError, TypeError):
+            pass
+
+    # Scan Packets Without Decoding #
+    keyframes = None
+    packet_reader = cv2.VideoCapture(filepath, cv2.CAP_FFMPEG)
+    if packet_reader.set(cv2.CAP_PROP_FORMAT, -1):
+        keyframes, num_packets = [], 0
+        while packet_reader.grab():
+            if packet_reader.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                keyframes.append(num_packets)
+            num_packets += 1
+    packet_reader.release()
+
+    # Cache Index Next To Recording, Writing Then Renaming So Readers Never See A Partial File #
+    temp_filepath = None
+    try:
+        temp_fd, temp_filepath = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(filepath)))
+        with os.fdopen(temp_fd, "w") as jsonFile:
+            json.dump({"file_info": file_info, "keyframes": keyframes}, jsonFile)
+        os.replace(temp_filepath, keyframe_filepath)
+    except OSError:
+        if (temp_filepath is not None) and os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
+
+    return keyframes
 
 
 class MP4Reader:
@@ -26,19 +80,35 @@ class MP4Reader:
         with open(timestamp_filepath, "r") as jsonFile:
             self._recording_timestamps = json.load(jsonFile)
 
+        # Load Keyframe Index #
+        self._keyframes = load_keyframe_index(filepath)
+        self._buffers = {}
+
     def set_reading_parameters(
         self,
         image=True,
         concatenate_images=False,
         resolution=(0, 0),
         resize_func=None,
+        interpolation="linear",
+        bgr_to_rgb=False,
+        dtype="uint8",
+        channels_first=False,
+        zero_copy=False,
     ):
         # Save Parameters #
         self.image = image
         self.concatenate_images = concatenate_images
-        self.resolution = resolution
-        self.resize_func = resize_func_map[resize_func]
+        self.resolution = tuple(resolution)
+        self.resize_func = resize_func_map[resize_func] or cv2.resize
         self.skip_reading = not image
+
+        # Save Output Spec (Float Images Are Scaled To [0, 1]) #
+        self.interpolation = interpolation_map[interpolation]
+        self.bgr_to_rgb = bgr_to_rgb
+        self.dtype = np.dtype(dtype)
+        self.channels_first = channels_first
+        self.zero_copy = zero_copy
         if self.skip_reading:
             return
 
@@ -53,31 +123,185 @@ class MP4Reader:
         frame_count = int(self._mp4_reader.get(cv2.cv.CV_CAP_PROP_FRAME_COUNT))
         return frame_count
 
+    def _get_preceding_keyframe(self, index):
+        keyframe_ind = bisect_right(self._keyframes, index) - 1
+        if keyframe_ind < 0:
+            return 0
+        return self._keyframes[keyframe_ind]
+
     def set_frame_index(self, index):
         if self.skip_reading:
             return
 
+        # Seek Only If Decoding From The Keyframe Is Cheaper Than Decoding Forward #
         if index < self._index:
-            self._mp4_reader.set(cv2.CAP_PROP_POS_FRAMES, index - 1)
+            seek = True
+        elif self._keyframes:
+            seek = self._get_preceding_keyframe(index - OPENCV_SEEK_MARGIN) > self._index
+        else:
+            seek = False
+
+        if seek:
+            self._mp4_reader.set(cv2.CAP_PROP_POS_FRAMES, index)
             self._index = index
 
+        # Decode Forward Without Retrieving Frames #
         while self._index < index:
-            self.read_camera(ignore_data=True)
+            self._mp4_reader.grab()
+            self._index += 1
+
+    def _get_output_shape(self, frame):
+        height, width, channels = frame.shape
+        if self.resolution != (0, 0):
+            width, height = self.resolution
+        if self.channels_first:
+            return (channels, height, width)
+        return (height, width, channels)
+
+    def _get_buffer(self, name, shape):
+        if (name, shape) not in self._buffers:
+            self._buffers[(name, shape)] = np.empty(shape, dtype=np.uint8)
+        return self._buffers[(name, shape)]
+
+    def _read_into_buffer(self):
+        # Decoded Frames Are Always Copied Out, So The Decode Buffer Is Reused #
+        success, frame = self._mp4_reader.read(self._buffers.get("decode"))
+        if success:
+            self._buffers["decode"] = frame
+        return success, frame
+
+    def _is_passthrough(self):
+        return (self.resolution == (0, 0)) and not (self.bgr_to_rgb or self.channels_first or self.dtype != np.uint8)
 
     def _process_frame(self, frame):
-        frame = deepcopy(frame)
-        if self.resolution == (0, 0):
-            return frame
-        return self.resize_func(frame, self.resolution)
-        # return cv2.resize(frame, self.resolution)#, interpolation=cv2.INTER_AREA)
+        out = np.empty(self._get_output_shape(frame), dtype=self.dtype)
+        self._process_frame_into(frame, out)
+        return out
+
+    def _split_frame(self, frame):
+        if self.concatenate_images:
+            return {self.serial_number: frame}
+        single_width = frame.shape[1] // 2
+        return {
+            self.serial_number + "_left": frame[:, :single_width, :],
+            self.serial_number + "_right": frame[:, single_width:, :],
+        }
+
+    def _process_frame_into(self, frame, out):
+        # Uint8 HWC Outputs Are Written By The Last OpenCV Call #
+        direct_output = (self.dtype == np.uint8) and not self.channels_first
+
+        written_to_out = False
+
+        # Resize #
+        if self.resolution != (0, 0):
+            resized_shape = (self.resolution[1], self.resolution[0], frame.shape[2])
+            resize_out = out if (direct_output and not self.bgr_to_rgb) else self._get_buffer("resize", resized_shape)
+            frame = self.resize_func(frame, self.resolution, dst=resize_out, interpolation=self.interpolation)
+            written_to_out = resize_out is out
+
+        # Convert Channel Order #
+        if self.bgr_to_rgb:
+            color_out = out if direct_output else self._get_buffer("color", frame.shape)
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=color_out)
+            written_to_out = color_out is out
+
+        # Convert Layout And Type #
+        if written_to_out:
+            return
+        if self.channels_first:
+            frame = frame.transpose(2, 0, 1)
+        if self.dtype == np.uint8:
+            out[...] = frame
+        else:
+            np.divide(frame, 255, out=out, dtype=self.dtype)
+
+    def _process_frames(self, split_frames, out_dict=None):
+        # Write Into Caller Provided Arrays #
+        if out_dict is not None:
+            image_dict = {full_cam_id: out_dict[full_cam_id] for full_cam_id in split_frames}
+            for full_cam_id, data in split_frames.items():
+                self._process_frame_into(data, image_dict[full_cam_id])
+            return image_dict
+
+        # Write Into Views Of A Single Buffer #
+        frame_shapes = {full_cam_id: self._get_output_shape(data) for full_cam_id, data in split_frames.items()}
+        if self.zero_copy and len(set(frame_shapes.values())) == 1:
+            buffer = np.empty((len(split_frames), *frame_shapes[next(iter(split_frames))]), dtype=self.dtype)
+            image_dict = dict(zip(split_frames, buffer))
+            for full_cam_id, data in split_frames.items():
+                self._process_frame_into(data, image_dict[full_cam_id])
+            return image_dict
+
+        return {full_cam_id: self._process_frame(data) for full_cam_id, data in split_frames.items()}
+
+    def _count_matching_timestamps(self, indices, correct_timestamps):
+        recorded_timestamps = np.asarray(self._recording_timestamps)
+        has_timestamp = indices < len(recorded_timestamps)
+        if not has_timestamp.any():
+            return len(indices)
+
+        received_timestamps = recorded_timestamps[np.where(has_timestamp, indices, 0)]
+        mismatch = has_timestamp & (received_timestamps != np.asarray(correct_timestamps))
+        if not mismatch.any():
+            return len(indices)
+
+        print("Timestamps did not match...")
+        return int(np.argmax(mismatch))
+
+    def read_frames(self, indices, correct_timestamps=None):
+        # Skip if Read Unnecesary #
+        if self.skip_reading:
+            return {}
+
+        indices = np.asarray(indices, dtype=np.int64)
+        assert np.all(np.diff(indices) >= 0)
+
+        # Check Image Timestamps #
+        num_frames = len(indices)
+        if correct_timestamps is not None:
+            num_frames = self._count_matching_timestamps(indices, correct_timestamps)
+
+        # Decode Frames In A Single Pass #
+        image_dict = None
+        for i in range(num_frames):
+            self.set_frame_index(indices[i])
+            success, frame = self._read_into_buffer()
+            self._index += 1
+            if not success:
+                num_frames = i
+                break
+
+            split_frames = self._split_frame(frame)
+            if image_dict is None:
+                image_dict = {}
+                for full_cam_id, data in split_frames.items():
+                    frame_shape = self._get_output_shape(data)
+                    image_dict[full_cam_id] = np.empty((len(indices), *frame_shape), dtype=self.dtype)
+
+            for full_cam_id, data in split_frames.items():
+                self._process_frame_into(data, image_dict[full_cam_id][i])
+
+        # Return Frames Read Before Any Failure #
+        if (image_dict is None) or (num_frames == 0):
+            return None
+        return {"image": {full_cam_id: data[:num_frames] for full_cam_id, data in image_dict.items()}}
+
+    def read_camera(self, ignore_data=False, correct_timestamp=None, return_timestamp=False, out_dict=None):
+        """Returned images are allocated per call and never written to again by the reader, so they can be
+        handed to other threads. With zero_copy, the left and right images are views of one buffer.
+        Arrays in out_dict (keyed like the returned images) are written in place, and stay owned by the caller."""
 
-    def read_camera(self, ignore_data=False, correct_timestamp=None, return_timestamp=False):
         # Skip if Read Unnecesary #
         if self.skip_reading:
             return {}
 
-        # Read Camera #
-        success, frame = self._mp4_reader.read()
+        # Decode Into A Fresh Frame When Its Halves Can Be Returned As Is #
+        decode_fresh = self.zero_copy and (out_dict is None) and self._is_passthrough() and not ignore_data
+        if decode_fresh:
+            success, frame = self._mp4_reader.read()
+        else:
+            success, frame = self._read_into_buffer()
         try:
             received_time = self._recording_timestamps[self._index]
         except IndexError:
@@ -97,15 +321,11 @@ class MP4Reader:
 
         # Return Data #
         data_dict = {}
-
-        if self.concatenate_images:
-            data_dict["image"] = {self.serial_number: self._process_frame(frame)}
+        split_frames = self._split_frame(frame)
+        if decode_fresh:
+            data_dict["image"] = split_frames
         else:
-            single_width = frame.shape[1] // 2
-            data_dict["image"] = {
-                self.serial_number + "_left": self._process_frame(frame[:, :single_width, :]),
-                self.serial_number + "_right": self._process_frame(frame[:, single_width:, :]),
-            }
+            data_dict["image"] = self._process_frames(split_frames, out_dict=out_dict)
 
         if return_timestamp:
             return data_dict, received_time
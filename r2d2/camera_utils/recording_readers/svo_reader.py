@@ -1,6 +1,5 @@
-from copy import deepcopy
-
 import cv2
+import numpy as np
 
 try:
     import pyzed.sl as sl
@@ -44,6 +43,7 @@ class SVOReader:
         concatenate_images=False,
         resolution=(0, 0),
         resize_func=None,
+        zero_copy=False,
     ):
         # Save Parameters #
         self.image = image
@@ -51,6 +51,7 @@ class SVOReader:
         self.pointcloud = pointcloud
         self.concatenate_images = concatenate_images
         self.resize_func = resize_func_map[resize_func]
+        self.zero_copy = zero_copy
 
         if self.resize_func is None:
             self.zed_resolution = sl.Resolution(*resolution)
@@ -85,13 +86,94 @@ class SVOReader:
         while self._index < index:
             self.read_camera(ignore_data=True)
 
-    def _process_frame(self, frame):
-        frame = deepcopy(frame.get_data())
+    def _get_output_shape(self, frame):
+        if self.resizer_resolution == (0, 0):
+            return frame.shape
+        return (self.resizer_resolution[1], self.resizer_resolution[0], frame.shape[2])
+
+    def _process_frame_into(self, frame, out):
+        frame = frame.get_data()
         if self.resizer_resolution == (0, 0):
-            return frame
-        return self.resize_func(frame, self.resizer_resolution)
+            out[...] = frame
+        else:
+            self.resize_func(frame, self.resizer_resolution, dst=out)
+
+    def _process_images(self, mat_dict, out_dict=None):
+        frame_shapes = {full_cam_id: self._get_output_shape(mat.get_data()) for full_cam_id, mat in mat_dict.items()}
+
+        # Write Into Caller Provided Arrays #
+        if out_dict is not None:
+            image_dict = {full_cam_id: out_dict[full_cam_id] for full_cam_id in mat_dict}
+
+        # Write Into Views Of A Single Buffer #
+        elif self.zero_copy and len(set(frame_shapes.values())) == 1:
+            buffer = np.empty((len(mat_dict), *frame_shapes[next(iter(mat_dict))]), dtype=np.uint8)
+            image_dict = dict(zip(mat_dict, buffer))
+
+        else:
+            image_dict = {full_cam_id: np.empty(shape, dtype=np.uint8) for full_cam_id, shape in frame_shapes.items()}
+
+        for full_cam_id, mat in mat_dict.items():
+            self._process_frame_into(mat, image_dict[full_cam_id])
+        return image_dict
+
+    def _retrieve_images(self):
+        if self.concatenate_images:
+            self._cam.retrieve_image(self._sbs_img, sl.VIEW.SIDE_BY_SIDE, resolution=self.zed_resolution)
+            return {self.serial_number: self._sbs_img}
+
+        self._cam.retrieve_image(self._left_img, sl.VIEW.LEFT, resolution=self.zed_resolution)
+        self._cam.retrieve_image(self._right_img, sl.VIEW.RIGHT, resolution=self.zed_resolution)
+        return {self.serial_number + "_left": self._left_img, self.serial_number + "_right": self._right_img}
+
+    def read_frames(self, indices, correct_timestamps=None):
+        # Skip if Read Unnecesary #
+        if self.skip_reading:
+            return {}
+
+        indices = np.asarray(indices, dtype=np.int64)
+        assert np.all(np.diff(indices) >= 0)
+
+        # Decode Frames In A Single Pass #
+        num_frames = len(indices)
+        received_timestamps = np.zeros(num_frames, dtype=np.int64)
+        image_dict = None
+
+        for i in range(num_frames):
+            self.set_frame_index(indices[i])
+            self._index += 1
+            if self._cam.grab() != sl.ERROR_CODE.SUCCESS:
+                num_frames = i
+                break
+            received_timestamps[i] = self._cam.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_milliseconds()
+            if not self.image:
+                continue
+
+            frames = self._retrieve_images()
+            if image_dict is None:
+                image_dict = {}
+                for full_cam_id, frame in frames.items():
+                    frame_shape = self._get_output_shape(frame.get_data())
+                    image_dict[full_cam_id] = np.empty((len(indices), *frame_shape), dtype=np.uint8)
+
+            for full_cam_id, frame in frames.items():
+                self._process_frame_into(frame, image_dict[full_cam_id][i])
+
+        # Check Image Timestamps #
+        if correct_timestamps is not None:
+            mismatch = received_timestamps[:num_frames] != np.asarray(correct_timestamps)[:num_frames]
+            if mismatch.any():
+                print("Timestamps did not match...")
+                num_frames = int(np.argmax(mismatch))
+
+        # Return Frames Read Before Any Failure #
+        if num_frames == 0:
+            return None
+        if image_dict is None:
+            return {}
+        return {"image": {full_cam_id: data[:num_frames] for full_cam_id, data in image_dict.items()}}
 
-    def read_camera(self, ignore_data=False, correct_timestamp=None, return_timestamp=False):
+    def read_camera(self, ignore_data=False, correct_timestamp=None, return_timestamp=False, out_dict=None):
         # Skip if Read Unnecesary #
         if self.skip_reading:
             return {}
@@ -116,16 +198,8 @@ class SVOReader:
         data_dict = {}
 
         if self.image:
-            if self.concatenate_images:
-                self._cam.retrieve_image(self._sbs_img, sl.VIEW.SIDE_BY_SIDE, resolution=self.zed_resolution)
-                data_dict["image"] = {self.serial_number: self._process_frame(self._sbs_img)}
-            else:
-                self._cam.retrieve_image(self._left_img, sl.VIEW.LEFT, resolution=self.zed_resolution)
-                self._cam.retrieve_image(self._right_img, sl.VIEW.RIGHT, resolution=self.zed_resolution)
-                data_dict["image"] = {
-                    self.serial_number + "_left": self._process_frame(self._left_img),
-                    self.serial_number + "_right": self._process_frame(self._right_img),
-                }
+            frames = self._retrieve_images()
+            data_dict["image"] = self._process_images(frames, out_dict=out_dict)
         # if self.depth:
         # 	self._cam.retrieve_measure(self._left_depth, sl.MEASURE.DEPTH, resolution=self.resolution)
         # 	self._cam.retrieve_measure(self._right_depth, sl.MEASURE.DEPTH_RIGHT, resolution=self.resolution)
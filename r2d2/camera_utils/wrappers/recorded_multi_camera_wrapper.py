@@ -1,16 +1,21 @@
 import glob
 import random
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from queue import Full, Queue
 
 from r2d2.camera_utils.info import get_camera_type
 from r2d2.camera_utils.recording_readers.mp4_reader import MP4Reader
 from r2d2.camera_utils.recording_readers.svo_reader import SVOReader
+from r2d2.misc.subprocess_utils import run_threaded_command
 
 
 class RecordedMultiCameraWrapper:
-    def __init__(self, recording_folderpath, camera_kwargs={}):
+    def __init__(self, recording_folderpath, camera_kwargs={}, parallel=False, read_ahead=8):
         # Save Camera Info #
         self.camera_kwargs = camera_kwargs
+        self.read_ahead = read_ahead
 
         # Open Camera Readers #
         svo_filepaths = glob.glob(recording_folderpath + "/*.svo")
@@ -32,32 +37,121 @@ class RecordedMultiCameraWrapper:
 
             self.camera_dict[serial_number] = Reader(f, serial_number)
 
-    def read_cameras(self, index=None, camera_type_dict={}, timestamp_dict={}):
-        full_obs_dict = defaultdict(dict)
+        # Give Each Camera Its Own Decoding Thread #
+        self._executor = None
+        if parallel and len(self.camera_dict):
+            self._executor = ThreadPoolExecutor(max_workers=len(self.camera_dict))
+
+    def _read_camera(self, cam_id, index=None, camera_type_dict={}, timestamp_dict={}):
+        cam_type = camera_type_dict[cam_id]
+        curr_cam_kwargs = self.camera_kwargs.get(cam_type, {})
+        self.camera_dict[cam_id].set_reading_parameters(**curr_cam_kwargs)
+
+        timestamp = timestamp_dict.get(cam_id + "_frame_received", None)
+        if index is not None:
+            self.camera_dict[cam_id].set_frame_index(index)
+
+        return self.camera_dict[cam_id].read_camera(correct_timestamp=timestamp)
+
+    def _read_camera_frames(self, cam_id, indices, camera_type_dict={}, timestamp_dict={}):
+        cam_type = camera_type_dict[cam_id]
+        curr_cam_kwargs = self.camera_kwargs.get(cam_type, {})
+        self.camera_dict[cam_id].set_reading_parameters(**curr_cam_kwargs)
+
+        timestamps = timestamp_dict.get(cam_id + "_frame_received", None)
+        return self.camera_dict[cam_id].read_frames(indices, correct_timestamps=timestamps)
+
+    def _map_cameras(self, read_func, *args):
+        # Read Cameras In Parallel #
+        if self._executor is not None:
+            futures = {cam_id: self._executor.submit(read_func, cam_id, *args) for cam_id in self.camera_dict}
+            return {cam_id: future.result() for cam_id, future in futures.items()}
 
         # Read Cameras In Randomized Order #
         all_cam_ids = list(self.camera_dict.keys())
         random.shuffle(all_cam_ids)
+        return {cam_id: read_func(cam_id, *args) for cam_id in all_cam_ids}
 
-        for cam_id in all_cam_ids:
-            cam_type = camera_type_dict[cam_id]
-            curr_cam_kwargs = self.camera_kwargs.get(cam_type, {})
-            self.camera_dict[cam_id].set_reading_parameters(**curr_cam_kwargs)
+    def read_cameras(self, index=None, camera_type_dict={}, timestamp_dict={}):
+        full_obs_dict = defaultdict(dict)
+        camera_data = self._map_cameras(self._read_camera, index, camera_type_dict, timestamp_dict)
 
-            timestamp = timestamp_dict.get(cam_id + "_frame_received", None)
-            if index is not None:
-                self.camera_dict[cam_id].set_frame_index(index)
+        for data_dict in camera_data.values():
+            # Process Returned Data #
+            if data_dict is None:
+                return None
+            for key in data_dict:
+                full_obs_dict[key].update(data_dict[key])
+
+        return full_obs_dict
 
-            data_dict = self.camera_dict[cam_id].read_camera(correct_timestamp=timestamp)
+    def read_frames(self, indices, camera_type_dict={}, timestamp_dict={}):
+        full_obs_dict = defaultdict(dict)
+        camera_data = self._map_cameras(self._read_camera_frames, indices, camera_type_dict, timestamp_dict)
 
+        for data_dict in camera_data.values():
             # Process Returned Data #
             if data_dict is None:
                 return None
             for key in data_dict:
                 full_obs_dict[key].update(data_dict[key])
 
+        # Only Keep Frames Every Camera Read Successfully #
+        num_frames = min([len(data) for obs in full_obs_dict.values() for data in obs.values()], default=len(indices))
+        for obs in full_obs_dict.values():
+            for full_cam_id in obs:
+                obs[full_cam_id] = obs[full_cam_id][:num_frames]
+
         return full_obs_dict
 
+    def iterate_cameras(self, indices, camera_type_dict={}, timestamp_dict={}):
+        """Yields one observation per index, with every camera decoding up to read_ahead frames in its own thread.
+        Stops at the first failed read. timestamp_dict values should be aligned with indices."""
+
+        stop_event = threading.Event()
+        queue_dict = {cam_id: Queue(maxsize=self.read_ahead) for cam_id in self.camera_dict}
+
+        def camera_worker(cam_id):
+            for i, index in enumerate(indices):
+                curr_timestamp_dict = {k: v[i] for k, v in timestamp_dict.items() if k.startswith(cam_id)}
+                try:
+                    data_dict = self._read_camera(cam_id, index, camera_type_dict, curr_timestamp_dict)
+                except Exception as error:
+                    data_dict = error
+
+                # Wait For Room In Queue #
+                while not stop_event.is_set():
+                    try:
+                        queue_dict[cam_id].put(data_dict, timeout=0.1)
+                        break
+                    except Full:
+                        continue
+
+                if stop_event.is_set() or (data_dict is None) or isinstance(data_dict, Exception):
+                    return
+
+        worker_threads = [run_threaded_command(camera_worker, args=(cam_id,)) for cam_id in self.camera_dict]
+
+        try:
+            for _ in range(len(indices)):
+                full_obs_dict = defaultdict(dict)
+                camera_data = [queue.get() for queue in queue_dict.values()]
+                for data_dict in camera_data:
+                    if isinstance(data_dict, Exception):
+                        raise data_dict
+                if any(data_dict is None for data_dict in camera_data):
+                    return
+
+                for data_dict in camera_data:
+                    for key in data_dict:
+                        full_obs_dict[key].update(data_dict[key])
+                yield full_obs_dict
+        finally:
+            stop_event.set()
+            [thread.join() for thread in worker_threads]
+
     def disable_cameras(self):
+        if self._executor is not None:
+            self._executor.shutdown()
         for camera in self.camera_dict.values():
             camera.disable_camera()
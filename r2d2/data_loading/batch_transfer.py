@@ -0,0 +1,97 @@
+import queue
+import threading
+
+import numpy as np
+import torch
+
+
+def to_device(batch, device, non_blocking=True):
+    """Recursively moves every tensor (or numpy array) in a nested batch to device. For CUDA devices, tensors are
+    copied from pinned memory, so the copy is asynchronous when non_blocking is set."""
+
+    if isinstance(batch, dict):
+        return {key: to_device(value, device, non_blocking=non_blocking) for key, value in batch.items()}
+    if isinstance(batch, (list, tuple)):
+        return type(batch)([to_device(value, device, non_blocking=non_blocking) for value in batch])
+    if isinstance(batch, np.ndarray):
+        batch = torch.from_numpy(batch)
+    if not torch.is_tensor(batch):
+        return batch
+
+    if non_blocking and (device.type == "cuda") and (batch.device.type == "cpu") and (not batch.is_pinned()):
+        batch = batch.pin_memory()
+    return batch.to(device, non_blocking=non_blocking)
+
+
+def to_channels_last(batch):
+    # Only Image Batches Are Four Dimensional #
+    if isinstance(batch, dict):
+        return {key: to_channels_last(value) for key, value in batch.items()}
+    if isinstance(batch, (list, tuple)):
+        return type(batch)([to_channels_last(value) for value in batch])
+    if torch.is_tensor(batch) and (batch.ndim == 4):
+        return batch.contiguous(memory_format=torch.channels_last)
+    return batch
+
+
+def record_stream(batch, stream):
+    # Tensors Copied On A Side Stream Must Not Be Freed While The Compute Stream Uses Them #
+    if isinstance(batch, dict):
+        [record_stream(value, stream) for value in batch.values()]
+    elif isinstance(batch, (list, tuple)):
+        [record_stream(value, stream) for value in batch]
+    elif torch.is_tensor(batch) and (batch.device.type == "cuda"):
+        batch.record_stream(stream)
+
+
+class DevicePrefetcher:
+    """Iterator that fetches and transfers up to num_prefetch batches ahead on a background thread, so loading and
+    host to device copies overlap with compute on the current batch. On CUDA, copies run on a side stream."""
+
+    def __init__(self, iterator, device, num_prefetch=2, transfer_func=to_device):
+        self.iterator = iterator
+        self.device = torch.device(device)
+        self.transfer_func = transfer_func
+        self._queue = queue.Queue(maxsize=num_prefetch)
+
+        self._stream = None
+        if self.device.type == "cuda":
+            self._stream = torch.cuda.Stream(device=self.device)
+
+        self._thread = threading.Thread(target=self._prefetch, daemon=True)
+        self._thread.start()
+
+    def _prefetch(self):
+        while True:
+            try:
+                batch = next(self.iterator)
+                if self._stream is None:
+                    self._queue.put((self.transfer_func(batch, self.device), None))
+                    continue
+
+                with torch.cuda.stream(self._stream):
+                    batch = self.transfer_func(batch, self.device)
+                    ready_event = torch.cuda.Event()
+                    ready_event.record(self._stream)
+                self._queue.put((batch, ready_event))
+
+            except Exception as error:
+                self._queue.put((error, None))
+                return
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        batch, ready_event = self._queue.get()
+        if isinstance(batch, Exception):
+            self._queue.put((batch, None))
+            raise batch
+
+        # Wait For The Copy Before Computing On The Batch #
+        if ready_event is not None:
+            current_stream = torch.cuda.current_stream(self.device)
+            current_stream.wait_event(ready_event)
+            record_stream(batch, current_stream)
+
+        return batch
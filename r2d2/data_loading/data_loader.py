@@ -1,7 +1,8 @@
 from torch.utils.data import DataLoader
 from torch.utils.data.datapipes.iter import Shuffler
 
-from r2d2.data_loading.dataset import TrajectoryDataset
+from r2d2.data_loading.dataset import TimestepDataset, TimestepSampler, TrajectoryDataset
+from r2d2.data_loading.packed_dataset import PackedDataset
 from r2d2.data_loading.trajectory_sampler import *
 
 
@@ -16,19 +17,57 @@ def create_dataloader(
     timestep_filtering_kwargs={},
     camera_kwargs={},
     image_transform_kwargs={},
+    cache_kwargs=None,
+    packed_dataset_path=None,
+    map_style=False,
+    sampler_kwargs={},
+    pin_memory=False,
+    index_dir=None,
 ):
-    traj_sampler = TrajectorySampler(
-        data_folderpaths,
-        recording_prefix=recording_prefix,
-        traj_loading_kwargs=traj_loading_kwargs,
-        timestep_filtering_kwargs=timestep_filtering_kwargs,
-        image_transform_kwargs=image_transform_kwargs,
-        camera_kwargs=camera_kwargs,
-    )
+    # Read Preprocessed Samples Directly From Packed Shards #
+    if packed_dataset_path is not None:
+        dataset = PackedDataset(
+            packed_dataset_path, folderpaths=data_folderpaths, image_transform_kwargs=image_transform_kwargs
+        )
+        map_style = True
+
+    else:
+        traj_sampler = TrajectorySampler(
+            data_folderpaths,
+            recording_prefix=recording_prefix,
+            traj_loading_kwargs=traj_loading_kwargs,
+            timestep_filtering_kwargs=timestep_filtering_kwargs,
+            image_transform_kwargs=image_transform_kwargs,
+            camera_kwargs=camera_kwargs,
+            cache_kwargs=None if map_style else cache_kwargs,
+            index_dir=index_dir,
+        )
+
+    # Sample Individual Timesteps Across All Trajectories #
+    if map_style:
+        if packed_dataset_path is None:
+            dataset = TimestepDataset(traj_sampler)
+        sampler = TimestepSampler(dataset, **sampler_kwargs)
+        return DataLoader(
+            dataset,
+            batch_size=batch_size,
+            sampler=sampler,
+            num_workers=num_workers,
+            prefetch_factor=prefetch_factor,
+            pin_memory=pin_memory,
+        )
+
+    # Compute Shard Costs Once, Before Workers Are Forked #
+    traj_sampler.get_trajectory_costs()
+
     dataset = TrajectoryDataset(traj_sampler)
     shuffled_dataset = Shuffler(dataset, buffer_size=buffer_size)
     dataloader = DataLoader(
-        shuffled_dataset, batch_size=batch_size, num_workers=num_workers, prefetch_factor=prefetch_factor
+        shuffled_dataset,
+        batch_size=batch_size,
+        num_workers=num_workers,
+        prefetch_factor=prefetch_factor,
+        pin_memory=pin_memory,
     )
 
     return dataloader
@@ -39,6 +78,13 @@ def create_train_test_data_loader(data_loader_kwargs={}, data_processing_kwargs=
     data_filtering_kwargs = data_loader_kwargs.pop("data_filtering_kwargs", {})
     train_folderpaths, test_folderpaths = generate_train_test_split(**data_filtering_kwargs)
 
+    # Reuse The Metadata Index The Split Was Built From #
+    if data_filtering_kwargs.get("use_index", True):
+        data_loader_kwargs = {
+            "index_dir": get_data_dir(remove_failures=data_filtering_kwargs.get("remove_failures", True)),
+            **data_loader_kwargs,
+        }
+
     # Create Train / Test Dataloaders #
     train_dataloader = create_dataloader(
         train_folderpaths, **data_loader_kwargs, **data_processing_kwargs, camera_kwargs=camera_kwargs
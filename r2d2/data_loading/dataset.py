@@ -1,5 +1,12 @@
+from collections import OrderedDict
+
+import numpy as np
 import torch
-from torch.utils.data import IterableDataset
+from torch.utils.data import Dataset, IterableDataset, Sampler
+
+from r2d2.camera_utils.info import camera_type_to_string_dict
+from r2d2.camera_utils.wrappers.recorded_multi_camera_wrapper import RecordedMultiCameraWrapper
+from r2d2.trajectory_utils.trajectory_reader import TrajectoryReader
 
 
 class TrajectoryDataset(IterableDataset):
@@ -12,9 +19,180 @@ class TrajectoryDataset(IterableDataset):
         self._sample_generator = iter(new_samples)
 
     def __iter__(self):
+        # Workers Without Trajectories Yield Nothing #
+        worker_info = torch.utils.data.get_worker_info()
+        if not len(self._trajectory_sampler.get_shard(worker_info=worker_info)):
+            return
+
         self._refresh_generator()
         while True:
             try:
                 yield next(self._sample_generator)
             except StopIteration:
                 self._refresh_generator()
+
+
+class TimestepDataset(Dataset):
+    """Map-style dataset over every (trajectory, timestep) pair of a TrajectorySampler's folders.
+
+    Indices are laid out trajectory by trajectory, as described by traj_lengths and traj_folderpaths, which is
+    the order TimestepSampler relies on for its trajectory and weighted modes. Draw indices through TimestepSampler
+    (create_dataloader does this); a plain shuffled DataLoader only gives uniform sampling over timesteps.
+
+    Each worker keeps up to max_open_trajectories readers open, and decodes only the frames it is asked for.
+    Samples whose frames fail to read are replaced by a random sample, up to max_retries times in a row.
+    """
+
+    def __init__(self, trajectory_sampler, max_open_trajectories=8, max_retries=10):
+        self._trajectory_sampler = trajectory_sampler
+        self.max_open_trajectories = max_open_trajectories
+        self.max_retries = max_retries
+        self._open_trajectories = OrderedDict()
+
+        traj_loading_kwargs = trajectory_sampler.traj_loading_kwargs
+        self.read_cameras = traj_loading_kwargs.get("read_cameras", True)
+        self.cache_index = traj_loading_kwargs.get("cache_index", False)
+        remove_skipped_steps = traj_loading_kwargs.get("remove_skipped_steps", False)
+
+        # Build Global Timestep Index From HDF5 Lengths #
+        self.traj_folderpaths, self._traj_timesteps = [], []
+        for folderpath in trajectory_sampler._all_folderpaths:
+            filepath, _ = trajectory_sampler.get_trajectory_paths(folderpath)
+            traj_reader = TrajectoryReader(filepath, read_images=False, cache_index=self.cache_index)
+            timesteps = np.arange(traj_reader.length())
+
+            if remove_skipped_steps and len(timesteps):
+                columns = traj_reader.read_all(keys=[], optional_keys=["observation/controller_info"]).columns
+                controller_info = columns.get("observation", {}).get("controller_info", {})
+                movement_enabled = controller_info.get("movement_enabled")
+                if movement_enabled is not None:
+                    timesteps = timesteps[movement_enabled.astype(bool)]
+            traj_reader.close()
+
+            if len(timesteps):
+                self.traj_folderpaths.append(folderpath)
+                self._traj_timesteps.append(timesteps)
+
+        self.traj_lengths = [len(timesteps) for timesteps in self._traj_timesteps]
+        self._traj_inds = np.repeat(np.arange(len(self.traj_lengths)), self.traj_lengths)
+        self._traj_offsets = np.cumsum([0, *self.traj_lengths])
+
+    def __len__(self):
+        return len(self._traj_inds)
+
+    def _open_trajectory(self, traj_ind):
+        # Reuse Open Readers, Closing The Least Recently Used #
+        if traj_ind in self._open_trajectories:
+            self._open_trajectories.move_to_end(traj_ind)
+            return self._open_trajectories[traj_ind]
+
+        if len(self._open_trajectories) >= self.max_open_trajectories:
+            _, (traj_reader, traj_columns, camera_reader) = self._open_trajectories.popitem(last=False)
+            traj_reader.close()
+            if camera_reader is not None:
+                camera_reader.disable_cameras()
+
+        traj_sampler = self._trajectory_sampler
+        filepath, recording_folderpath = traj_sampler.get_trajectory_paths(self.traj_folderpaths[traj_ind])
+        read_recordings = self.read_cameras and (recording_folderpath is not None)
+
+        keys = traj_sampler.required_keys
+        if read_recordings:
+            keys = [*keys, "observation/camera_type", "observation/timestamp/cameras"]
+
+        traj_reader = TrajectoryReader(filepath, read_images=False, cache_index=self.cache_index)
+        traj_columns = traj_reader.read_all(keys=keys)
+        camera_reader = None
+        if read_recordings:
+            camera_reader = RecordedMultiCameraWrapper(recording_folderpath, traj_sampler.camera_kwargs)
+
+        self._open_trajectories[traj_ind] = (traj_reader, traj_columns, camera_reader)
+        return self._open_trajectories[traj_ind]
+
+    def __getitem__(self, index):
+        for _ in range(self.max_retries + 1):
+            timestep = self._read_timestep(index)
+            if timestep is not None:
+                return self._trajectory_sampler.timestep_processer.forward(timestep)
+
+            # Replace Unreadable Samples With A Random One #
+            failed_folderpath = self.traj_folderpaths[self._traj_inds[index]]
+            index = np.random.randint(len(self))
+
+        raise RuntimeError(
+            "Could not read camera frames for {0} samples in a row, last from {1}".format(
+                self.max_retries + 1, failed_folderpath
+            )
+        )
+
+    def _read_timestep(self, index):
+        traj_ind = self._traj_inds[index]
+        timestep_ind = self._traj_timesteps[traj_ind][index - self._traj_offsets[traj_ind]]
+        traj_reader, traj_columns, camera_reader = self._open_trajectory(traj_ind)
+        timestep = traj_columns[timestep_ind]
+
+        # Decode This Timestep's Frames #
+        if camera_reader is not None:
+            obs_columns = traj_columns.columns["observation"]
+            timestamp_dict = {k: v[timestep_ind] for k, v in obs_columns["timestamp"]["cameras"].items()}
+            camera_type_dict = {k: camera_type_to_string_dict[v[0]] for k, v in obs_columns["camera_type"].items()}
+            camera_obs = camera_reader.read_cameras(
+                index=timestep_ind, camera_type_dict=camera_type_dict, timestamp_dict=timestamp_dict
+            )
+            if camera_obs is None:
+                return None
+            timestep["observation"].update(camera_obs)
+
+        return timestep
+
+    def __getstate__(self):
+        # Readers Are Reopened In Each Worker Instead Of Being Pickled #
+        state = self.__dict__.copy()
+        state["_open_trajectories"] = OrderedDict()
+        return state
+
+
+class TimestepSampler(Sampler):
+    """Draws sample indices for a dataset with traj_lengths and traj_folderpaths attributes, whose samples are
+    ordered trajectory by trajectory.
+
+    - timestep: every timestep once per epoch, in random order
+    - trajectory: trajectories uniformly, then a uniform timestep within it
+    - weighted: trajectories in proportion to weight_func(folderpath), then a uniform timestep within it
+    """
+
+    def __init__(self, dataset, mode="timestep", weight_func=None, num_samples=None):
+        assert mode in ["timestep", "trajectory", "weighted"]
+        assert (mode == "weighted") == (weight_func is not None)
+
+        self.mode = mode
+        self.dataset_length = len(dataset)
+        self.num_samples = len(dataset) if num_samples is None else num_samples
+        traj_lengths = np.array(dataset.traj_lengths)
+
+        if mode == "trajectory":
+            traj_weights = np.ones(len(traj_lengths))
+        elif mode == "weighted":
+            traj_weights = np.array([weight_func(folderpath) for folderpath in dataset.traj_folderpaths], dtype=float)
+
+        # Spread Each Trajectory's Weight Over Its Timesteps #
+        self.sample_p = None
+        if mode != "timestep":
+            sample_p = np.repeat(traj_weights / np.maximum(traj_lengths, 1), traj_lengths)
+            self.sample_p = sample_p / sample_p.sum()
+
+    def __len__(self):
+        return self.num_samples
+
+    def __iter__(self):
+        if self.dataset_length == 0:
+            return iter([])
+
+        # Cycle Through Random Permutations #
+        if self.sample_p is None:
+            num_epochs = int(np.ceil(self.num_samples / self.dataset_length))
+            indices = np.concatenate([np.random.permutation(self.dataset_length) for _ in range(num_epochs)])
+            return iter(indices[: self.num_samples].tolist())
+
+        indices = np.random.choice(self.dataset_length, size=self.num_samples, p=self.sample_p)
+        return iter(indices.tolist())
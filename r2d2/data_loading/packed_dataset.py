@@ -0,0 +1,165 @@
+import json
+import os
+
+import numpy as np
+from torch.utils.data import Dataset
+from tqdm import tqdm
+
+from r2d2.data_loading.trajectory_cache import fill_structure, get_leaf, get_structure
+from r2d2.data_loading.trajectory_sampler import TrajectorySampler
+from r2d2.data_processing.data_transforms import ImageTransformer, split_image_transform_kwargs
+
+
+def write_packed_dataset(
+    folderpaths,
+    output_path,
+    shard_size=10000,
+    recording_prefix="MP4",
+    traj_loading_kwargs={},
+    timestep_filtering_kwargs={},
+    image_transform_kwargs={},
+    camera_kwargs={},
+):
+    """Processes every trajectory once and stores each leaf of the processed timesteps as a raw array per shard.
+    Shards hold whole trajectories and are closed once they reach shard_size timesteps. Random image transforms
+    (augment, to_tensor) are skipped here and applied by PackedDataset instead."""
+
+    cached_transform_kwargs, _ = split_image_transform_kwargs(image_transform_kwargs)
+    traj_sampler = TrajectorySampler(
+        folderpaths,
+        recording_prefix=recording_prefix,
+        traj_loading_kwargs={**traj_loading_kwargs, "num_samples_per_traj": None},
+        timestep_filtering_kwargs=timestep_filtering_kwargs,
+        image_transform_kwargs=cached_transform_kwargs,
+        camera_kwargs=camera_kwargs,
+    )
+    os.makedirs(output_path, exist_ok=True)
+
+    structure, leaf_paths, leaf_info = None, [], []
+    shard_lengths, trajectories, shard_files = [], [], None
+
+    for folderpath in tqdm(folderpaths):
+        processed_traj = traj_sampler.process_trajectory(folderpath)
+        if not len(processed_traj):
+            continue
+
+        # Every Trajectory Must Share One Layout #
+        traj_leaf_paths = []
+        traj_structure = get_structure(processed_traj[0], traj_leaf_paths)
+        traj_leaves = [np.stack([get_leaf(t, path) for t in processed_traj]) for path in traj_leaf_paths]
+        traj_leaf_info = [{"dtype": leaf.dtype.str, "shape": list(leaf.shape[1:])} for leaf in traj_leaves]
+
+        if structure is None:
+            structure, leaf_paths, leaf_info = traj_structure, traj_leaf_paths, traj_leaf_info
+        elif (traj_structure != structure) or (traj_leaf_info != leaf_info):
+            print("Skipping {0}, which does not match the dataset layout".format(folderpath))
+            continue
+
+        # Open New Shard #
+        if shard_files is None:
+            shard_dir = os.path.join(output_path, str(len(shard_lengths)))
+            os.makedirs(shard_dir, exist_ok=True)
+            shard_files = [open(os.path.join(shard_dir, "{0}.bin".format(i)), "wb") for i in range(len(leaf_paths))]
+            shard_lengths.append(0)
+
+        # Append Trajectory #
+        for leaf, leaf_file in zip(traj_leaves, shard_files):
+            np.ascontiguousarray(leaf).tofile(leaf_file)
+
+        traj_info = {"folderpath": folderpath, "shard": len(shard_lengths) - 1, "start": shard_lengths[-1]}
+        traj_info["length"] = len(processed_traj)
+        trajectories.append(traj_info)
+        shard_lengths[-1] += len(processed_traj)
+
+        # Close Full Shard #
+        if shard_lengths[-1] >= shard_size:
+            [leaf_file.close() for leaf_file in shard_files]
+            shard_files = None
+
+    if shard_files is not None:
+        [leaf_file.close() for leaf_file in shard_files]
+
+    # Save Index #
+    dataset_index = {
+        "structure": structure,
+        "leaves": leaf_info,
+        "shard_lengths": shard_lengths,
+        "trajectories": trajectories,
+        "config": {
+            "recording_prefix": recording_prefix,
+            "traj_loading_kwargs": traj_loading_kwargs,
+            "timestep_filtering_kwargs": timestep_filtering_kwargs,
+            "image_transform_kwargs": cached_transform_kwargs,
+            "camera_kwargs": camera_kwargs,
+        },
+    }
+    with open(os.path.join(output_path, "index.json"), "w") as jsonFile:
+        json.dump(dataset_index, jsonFile, default=str)
+
+    return dataset_index
+
+
+def load_packed_dataset_index(dataset_path):
+    with open(os.path.join(dataset_path, "index.json"), "r") as jsonFile:
+        return json.load(jsonFile)
+
+
+class PackedDataset(Dataset):
+    """Random access over timesteps written by write_packed_dataset. Shards are memory mapped on first use in each
+    worker, so samples are read straight from the page cache. If folderpaths is given, only timesteps from those
+    trajectories are included."""
+
+    def __init__(self, dataset_path, folderpaths=None, image_transform_kwargs={}):
+        self.dataset_path = dataset_path
+        dataset_index = load_packed_dataset_index(dataset_path)
+        self._structure = dataset_index["structure"]
+        self._leaf_info = dataset_index["leaves"]
+        self._shard_lengths = dataset_index["shard_lengths"]
+        self._shards = {}
+
+        # Select Trajectories #
+        trajectories = dataset_index["trajectories"]
+        if folderpaths is not None:
+            keep_folderpaths = set([os.path.realpath(f) for f in folderpaths])
+            trajectories = [t for t in trajectories if os.path.realpath(t["folderpath"]) in keep_folderpaths]
+        self.trajectories = trajectories
+        self.traj_folderpaths = [t["folderpath"] for t in trajectories]
+        self.traj_lengths = [t["length"] for t in trajectories]
+
+        # Map Each Sample To A Shard Row #
+        self._shard_ids = np.repeat([t["shard"] for t in trajectories], self.traj_lengths).astype(np.int64)
+        self._offsets = np.concatenate([t["start"] + np.arange(t["length"]) for t in trajectories] + [[]])
+        self._offsets = self._offsets.astype(np.int64)
+
+        # Deterministic Image Transforms Were Applied During Conversion #
+        _, sampled_transform_kwargs = split_image_transform_kwargs(image_transform_kwargs)
+        self.image_transformer = ImageTransformer(**sampled_transform_kwargs)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def _get_shard(self, shard_id):
+        if shard_id not in self._shards:
+            shard_dir = os.path.join(self.dataset_path, str(shard_id))
+            self._shards[shard_id] = [
+                np.memmap(
+                    os.path.join(shard_dir, "{0}.bin".format(i)),
+                    dtype=np.dtype(info["dtype"]),
+                    mode="r",
+                    shape=(self._shard_lengths[shard_id], *info["shape"]),
+                )
+                for i, info in enumerate(self._leaf_info)
+            ]
+        return self._shards[shard_id]
+
+    def __getitem__(self, index):
+        shard = self._get_shard(int(self._shard_ids[index]))
+        timestep = fill_structure(self._structure, shard, self._offsets[index])
+        self.image_transformer.forward(timestep)
+        return timestep
+
+    def __getstate__(self):
+        # Memory Maps Are Reopened In Each Worker Instead Of Being Pickled #
+        state = self.__dict__.copy()
+        state["_shards"] = {}
+        return state
@@ -1,14 +1,16 @@
+import json
 from functools import partial
-from typing import Dict
+from typing import Callable, Dict, Optional, Tuple
 
 import tensorflow as tf
 
 
-def get_type_spec(path: str) -> Dict[str, tf.TensorSpec]:
+def get_type_spec(path: str, variable_length: bool = True) -> Dict[str, tf.TensorSpec]:
     """Get a type spec from a tfrecord file.
 
     Args:
         path (str): Path to a single tfrecord file.
+        variable_length (bool): Whether the first dimension varies between examples (true for whole trajectories).
 
     Returns:
         dict: A dictionary mapping feature names to tf.TensorSpecs.
@@ -24,42 +26,168 @@ def get_type_spec(path: str) -> Dict[str, tf.TensorSpec]:
         tensor_proto.ParseFromString(data)
         dtype = tf.dtypes.as_dtype(tensor_proto.dtype)
         shape = [d.size for d in tensor_proto.tensor_shape.dim]
-        shape[0] = None  # first dimension is trajectory length, which is variable
+        if variable_length:
+            shape[0] = None  # first dimension is trajectory length, which is variable
         out[key] = tf.TensorSpec(shape=shape, dtype=dtype)
 
     return out
 
 
+def load_manifest(path: str) -> Optional[dict]:
+    """Load the manifest written next to the tfrecord files by the converter, if there is one."""
+    manifest_path = tf.io.gfile.join(path, "manifest.json")
+    if not tf.io.gfile.exists(manifest_path):
+        return None
+    with tf.io.gfile.GFile(manifest_path, "r") as jsonFile:
+        return json.load(jsonFile)
+
+
+def _get_leading_shape(manifest: dict) -> list:
+    # whole trajectories have a variable length, windows a fixed one, and single transitions none
+    if manifest["layout"] == "trajectory":
+        return [None]
+    if manifest.get("window_size", 1) > 1:
+        return [manifest["window_size"]]
+    return []
+
+
+def get_manifest_type_spec(manifest: dict) -> Dict[str, tf.TensorSpec]:
+    """Get the type spec of serialized tensor features from a manifest, without reading any records.
+
+    Args:
+        manifest (dict): A manifest loaded with load_manifest.
+
+    Returns:
+        dict: A dictionary mapping feature names to tf.TensorSpecs.
+    """
+    leading_shape = _get_leading_shape(manifest)
+    out = {}
+    for key, feature in manifest["features"].items():
+        if feature["encoding"] == "jpeg":
+            out[key] = tf.TensorSpec(shape=leading_shape, dtype=tf.string)
+        else:
+            out[key] = tf.TensorSpec(shape=leading_shape + feature["shape"], dtype=tf.dtypes.as_dtype(feature["dtype"]))
+    return out
+
+
+def get_native_features(manifest: dict) -> Dict[str, tf.io.FixedLenFeature]:
+    """Get the parsing spec of native float/int64/JPEG bytes features from a manifest.
+
+    Args:
+        manifest (dict): A manifest loaded with load_manifest.
+
+    Returns:
+        dict: A dictionary mapping feature names to tf.io.FixedLenFeatures (or FixedLenSequenceFeatures for whole
+            trajectories).
+    """
+    parse_dtypes = {"jpeg": tf.string, "float": tf.float32, "int64": tf.int64}
+    leading_shape = _get_leading_shape(manifest)
+    out = {}
+    for key, feature in manifest["features"].items():
+        shape = [] if feature["encoding"] == "jpeg" else feature["shape"]
+        dtype = parse_dtypes[feature["encoding"]]
+        if leading_shape == [None]:
+            out[key] = tf.io.FixedLenSequenceFeature(shape, dtype, allow_missing=True)
+        else:
+            out[key] = tf.io.FixedLenFeature(leading_shape + shape, dtype)
+    return out
+
+
 def get_tf_dataloader(
     path: str,
     *,
     batch_size: int,
-    shuffle_buffer_size: int = 25000,
+    shuffle_buffer_size: Optional[int] = None,
     cache: bool = False,
+    layout: Optional[str] = None,
+    decoded_cache_path: Optional[str] = None,
+    image_size: Optional[Tuple[int, int]] = None,
+    normalize_images: bool = True,
 ) -> tf.data.Dataset:
-    # get the tfrecord files
-    paths = tf.io.gfile.glob(tf.io.gfile.join(path, "*.tfrecord"))
+    """Build a dataset of batched transitions from a folder of tfrecords.
 
-    # extract the type spec
-    type_spec = get_type_spec(paths[0])
+    Images are decoded after batching, unless decoded_cache_path is given, in which case each transition is decoded
+    once and the uint8 images are read back from the cache on later epochs.
 
-    # read the tfrecords (yields raw serialized examples)
-    dataset = tf.data.TFRecordDataset(paths, num_parallel_reads=tf.data.AUTOTUNE)
+    Args:
+        path (str): Folder containing the tfrecord files.
+        batch_size (int): Number of transitions (or windows) per batch.
+        shuffle_buffer_size (int): Defaults to 25000 for the "trajectory" layout, and 1000 for the "transition"
+            layout, whose shards are already shuffled at write time.
+        cache (bool): Cache the still encoded examples in memory.
+        layout (str): "trajectory" for one example per trajectory, or "transition" for the per-transition (or
+            per-window) examples written by write_interleaved_tfrecords. Read from the manifest when there is one,
+            and defaults to "trajectory" otherwise.
+        decoded_cache_path (str): File to cache decoded uint8 transitions in. Filled during the first epoch, and
+            must be deleted whenever the data or image_size change.
+        image_size (tuple): (height, width) to resize images to while decoding, to shrink the decoded cache.
+        normalize_images (bool): Convert images to float32 in [-1, 1]. Otherwise images stay uint8, which is 4x
+            smaller, and the model is expected to normalize them (see normalize_image).
+    """
+    manifest = load_manifest(path)
+    if layout is None:
+        layout = manifest["layout"] if manifest else "trajectory"
+    assert layout in ["trajectory", "transition"]
+    if shuffle_buffer_size is None:
+        shuffle_buffer_size = 25000 if layout == "trajectory" else 1000
+    native = bool(manifest) and (manifest["feature_encoding"] == "native")
 
-    # decode the examples (yields trajectories)
-    dataset = dataset.map(partial(_decode_example, type_spec=type_spec), num_parallel_calls=tf.data.AUTOTUNE)
+    # get the tfrecord files
+    if manifest:
+        paths = [tf.io.gfile.join(path, name) for name, count in sorted(manifest["shards"].items()) if count]
+    else:
+        paths = tf.io.gfile.glob(tf.io.gfile.join(path, "*.tfrecord"))
 
-    # cache all the dataloading (uses a lot of memory)
+    # read the tfrecords (yields raw serialized examples)
+    if layout == "trajectory":
+        dataset = tf.data.TFRecordDataset(paths, num_parallel_reads=tf.data.AUTOTUNE)
+    else:
+        # read shards in a random order each epoch, interleaving examples from several at once
+        dataset = tf.data.Dataset.from_tensor_slices(paths).shuffle(len(paths))
+        dataset = dataset.interleave(
+            tf.data.TFRecordDataset,
+            cycle_length=min(len(paths), 16),
+            num_parallel_calls=tf.data.AUTOTUNE,
+            deterministic=False,
+        )
+
+    # decode the examples (yields trajectories or transitions, with images still encoded)
+    if native:
+        features = get_native_features(manifest)
+        if layout == "trajectory":
+            parse_func = partial(tf.io.parse_single_example, features=features)
+            parse_trajectory = partial(_parse_native, parse_func=parse_func, manifest=manifest)
+            dataset = dataset.map(parse_trajectory, num_parallel_calls=tf.data.AUTOTUNE)
+    else:
+        type_spec = get_manifest_type_spec(manifest) if manifest else None
+        type_spec = type_spec or get_type_spec(paths[0], variable_length=layout == "trajectory")
+        dataset = dataset.map(partial(_decode_example, type_spec=type_spec), num_parallel_calls=tf.data.AUTOTUNE)
+
+    # cache the encoded examples (uses a lot of memory)
     if cache:
         dataset = dataset.cache()
 
     # do any trajectory-level transforms here (e.g. filtering, goal relabeling)
 
     # unbatch to get individual transitions
-    dataset = dataset.unbatch()
-
-    # process each transition
-    dataset = dataset.map(_process_transition, num_parallel_calls=tf.data.AUTOTUNE)
+    if layout == "trajectory":
+        dataset = dataset.unbatch()
+
+    # native transitions are parsed a batch at a time, with one op
+    parse_example = None
+    if native and (layout == "transition"):
+        parse_func = partial(tf.io.parse_example, features=features)
+        parse_example = partial(_parse_native, parse_func=parse_func, manifest=manifest)
+    decode_images = partial(_decode_images, image_size=image_size)
+
+    # decode once, and read the decoded transitions back from disk on later epochs
+    if decoded_cache_path is not None:
+        if parse_example is not None:
+            dataset = dataset.batch(batch_size).map(parse_example, num_parallel_calls=tf.data.AUTOTUNE).unbatch()
+            parse_example = None
+        dataset = dataset.map(decode_images, num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.cache(decoded_cache_path)
+        decode_images = None
 
     # do any transition-level transformations here (e.g. augmentations)
 
@@ -71,12 +199,26 @@ def get_tf_dataloader(
     # batch the dataset
     dataset = dataset.batch(batch_size, num_parallel_calls=tf.data.AUTOTUNE)
 
+    # parse and decode every image in the batch in parallel, if not already cached
+    if parse_example is not None:
+        dataset = dataset.map(parse_example, num_parallel_calls=tf.data.AUTOTUNE)
+    if decode_images is not None:
+        dataset = dataset.map(decode_images, num_parallel_calls=tf.data.AUTOTUNE)
+
+    if normalize_images:
+        dataset = dataset.map(_normalize_images, num_parallel_calls=tf.data.AUTOTUNE)
+
     # always prefetch last
     dataset = dataset.prefetch(tf.data.AUTOTUNE)
 
     return dataset
 
 
+def normalize_image(image: tf.Tensor) -> tf.Tensor:
+    """Convert uint8 images to float32 in [-1, 1]."""
+    return tf.cast(image, tf.float32) / 127.5 - 1.0
+
+
 def _decode_example(example_proto: tf.Tensor, type_spec: Dict[str, tf.TensorSpec]) -> Dict[str, tf.Tensor]:
     features = {key: tf.io.FixedLenFeature([], tf.string) for key in type_spec.keys()}
     parsed_features = tf.io.parse_single_example(example_proto, features)
@@ -88,14 +230,37 @@ def _decode_example(example_proto: tf.Tensor, type_spec: Dict[str, tf.TensorSpec
     return parsed_tensors
 
 
-def _process_transition(transition: Dict[str, tf.Tensor]) -> Dict[str, tf.Tensor]:
-    for key in transition:
-        if "image" in key:
-            transition[key] = tf.io.decode_jpeg(transition[key])
+def _parse_native(serialized: tf.Tensor, parse_func: Callable, manifest: dict) -> Dict[str, tf.Tensor]:
+    # features are stored as float32 or int64 lists, so restore their original dtypes
+    parsed = parse_func(serialized)
+    for key, feature in manifest["features"].items():
+        if feature["encoding"] != "jpeg":
+            parsed[key] = tf.cast(parsed[key], tf.dtypes.as_dtype(feature["dtype"]))
+    return parsed
+
+
+def _decode_images(example: Dict[str, tf.Tensor], image_size: Optional[Tuple[int, int]]) -> Dict[str, tf.Tensor]:
+    # works on single transitions, windows and batches alike
+    for key in example:
+        if "image" not in key:
+            continue
+
+        def decode_jpeg(encoded):
+            image = tf.io.decode_jpeg(encoded)
+            if image_size is not None:
+                image = tf.image.resize(image, image_size, method="area")
+                image = tf.cast(tf.round(image), tf.uint8)
+            return image
+
+        # decode the flattened jpegs in parallel, then restore the leading dimensions
+        encoded = example[key]
+        images = tf.map_fn(decode_jpeg, tf.reshape(encoded, [-1]), fn_output_signature=tf.uint8, parallel_iterations=32)
+        example[key] = tf.reshape(images, tf.concat([tf.shape(encoded), tf.shape(images)[1:]], axis=0))
+    return example
+
 
-            # convert to float and normalize to [-1, 1]
-            transition[key] = tf.cast(transition[key], tf.float32) / 127.5 - 1.0
-    return transition
+def _normalize_images(batch: Dict[str, tf.Tensor]) -> Dict[str, tf.Tensor]:
+    return {key: normalize_image(value) if "image" in key else value for key, value in batch.items()}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,311 @@
+import itertools
+import json
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+from r2d2.camera_utils.info import camera_type_to_string_dict
+from r2d2.trajectory_utils.misc import iterate_trajectory
+
+FEATURE_ENCODINGS = ["tensor", "native"]
+
+
+def flatten(x: dict) -> dict:
+    d = {}
+    for k, v in x.items():
+        if isinstance(v, dict):
+            for k2, v2 in flatten(v).items():
+                d[k + "/" + k2] = v2
+        else:
+            d[k] = v
+    return d
+
+
+def tensor_feature(value) -> tf.train.Feature:
+    return tf.train.Feature(bytes_list=tf.train.BytesList(value=[tf.io.serialize_tensor(value).numpy()]))
+
+
+def native_feature(values: list, encoding: str) -> tf.train.Feature:
+    """Store a list of per-transition values as a flat float, int64 or bytes (JPEG) list."""
+    if encoding == "jpeg":
+        return tf.train.Feature(bytes_list=tf.train.BytesList(value=[tf.convert_to_tensor(v).numpy() for v in values]))
+
+    flat_values = np.concatenate([np.ravel(v) for v in values])
+    if encoding == "float":
+        return tf.train.Feature(float_list=tf.train.FloatList(value=flat_values))
+    return tf.train.Feature(int64_list=tf.train.Int64List(value=flat_values.astype(np.int64)))
+
+
+def get_camera_kwargs(image_size: Tuple[int, int]) -> Dict[str, dict]:
+    """Camera reader settings that resize frames to image_size (height, width) as they are decoded."""
+    height, width = image_size
+    camera_kwargs = dict(image=True, concatenate_images=False, resolution=(width, height), interpolation="cubic")
+    return {cam_type: dict(camera_kwargs) for cam_type in camera_type_to_string_dict.values()}
+
+
+def get_feature_schema(encoded: dict) -> Dict[str, dict]:
+    """Describe each feature of an encoded timestep by its dtype, per-transition shape and storage encoding."""
+    schema = {}
+    for key, value in encoded.items():
+        if "image" in key:
+            shape = tf.io.extract_jpeg_shape(value).numpy().tolist()
+            schema[key] = {"dtype": "uint8", "shape": shape, "encoding": "jpeg"}
+        else:
+            value = np.asarray(value)
+            encoding = "float" if np.issubdtype(value.dtype, np.floating) else "int64"
+            schema[key] = {"dtype": value.dtype.name, "shape": list(value.shape), "encoding": encoding}
+    return schema
+
+
+def _encode_timestep(timestep: dict, keep_keys: Sequence[str]) -> dict:
+    # JPEG encode images and drop unwanted keys
+    timestep_flat = flatten(timestep)
+    out = {}
+    for key in keep_keys:
+        if key not in timestep_flat:
+            continue
+        if "image" in key:
+            out[key] = tf.io.encode_jpeg(np.ascontiguousarray(timestep_flat[key]))
+        else:
+            out[key] = timestep_flat[key]
+    return out
+
+
+def iterate_encoded_timesteps(
+    h5_filepath: str,
+    recording_folderpath: str,
+    *,
+    keep_keys: Sequence[str],
+    image_size: Tuple[int, int],
+    frameskip: int = 1,
+    read_ahead: int = 8,
+) -> Iterator[dict]:
+    """Stream a trajectory as flat dicts of kept keys, with images resized and JPEG encoded.
+
+    Frames are decoded and resized by background camera threads while the caller JPEG encodes them, so only the
+    encoded images and up to read_ahead decoded frames per camera are held in memory at once.
+
+    Args:
+        h5_filepath (str): Path to the trajectory.h5 file.
+        recording_folderpath (str): Path to the folder of MP4 recordings.
+        keep_keys (list): Flattened keys to keep (e.g. "action/cartesian_velocity", "observation/image/<id>_left").
+        image_size (tuple): Output image (height, width).
+        frameskip (int): Keep every frameskip-th timestep.
+        read_ahead (int): Number of frames each camera may decode ahead of the encoder.
+    """
+    # Kept Keys Missing From A Trajectory Are Skipped #
+    hdf5_keys = [key for key in keep_keys if "image" not in key]
+    timesteps = iterate_trajectory(
+        h5_filepath,
+        recording_folderpath=recording_folderpath,
+        camera_kwargs=get_camera_kwargs(image_size),
+        keys=[],
+        optional_keys=hdf5_keys,
+        frameskip=frameskip,
+        read_ahead=read_ahead,
+    )
+
+    present_keys = None
+    for timestep in timesteps:
+        encoded = _encode_timestep(timestep, keep_keys)
+
+        # make sure every timestep has the same keys
+        if present_keys is None:
+            present_keys = encoded.keys()
+        assert encoded.keys() == present_keys
+
+        yield encoded
+
+
+def _make_example(window: List[dict], schema: Optional[Dict[str, dict]], stack: bool) -> tf.train.Example:
+    if schema is not None:
+        features = {k: native_feature([t[k] for t in window], schema[k]["encoding"]) for k in window[0]}
+    elif stack:
+        features = {k: tensor_feature([t[k] for t in window]) for k in window[0]}
+    else:
+        features = {k: tensor_feature(v) for k, v in window[0].items()}
+    return tf.train.Example(features=tf.train.Features(feature=features))
+
+
+def trajectory_example(
+    encoded_timesteps: Iterable[dict], schema: Optional[Dict[str, dict]] = None
+) -> Optional[tf.train.Example]:
+    """Pack encoded timesteps into a single tf.train.Example, or None if there are none.
+
+    Features are serialized tensors, unless a schema is given, in which case they are stored as native lists.
+    """
+    encoded_timesteps = list(encoded_timesteps)
+    if not encoded_timesteps:
+        return None
+    return _make_example(encoded_timesteps, schema, stack=True)
+
+
+def transition_examples(
+    encoded_timesteps: Iterable[dict], window_size: int = 1, schema: Optional[Dict[str, dict]] = None
+) -> Iterator[tf.train.Example]:
+    """Yield one tf.train.Example per transition.
+
+    With window_size > 1, each example instead holds window_size consecutive (non-overlapping) transitions stacked
+    along a leading axis, and a trailing partial window is dropped. See trajectory_example for the schema.
+    """
+    window = []
+    for encoded in encoded_timesteps:
+        window.append(encoded)
+        if len(window) < window_size:
+            continue
+
+        yield _make_example(window, schema, stack=window_size > 1)
+        window = []
+
+
+def encode_trajectory(h5_filepath: str, recording_folderpath: str, **kwargs) -> Optional[tf.train.Example]:
+    """Stream a trajectory into a single tf.train.Example. See iterate_encoded_timesteps for the arguments."""
+    return trajectory_example(iterate_encoded_timesteps(h5_filepath, recording_folderpath, **kwargs))
+
+
+def encode_transitions(
+    h5_filepath: str, recording_folderpath: str, *, window_size: int = 1, **kwargs
+) -> Iterator[tf.train.Example]:
+    """Stream a trajectory as one tf.train.Example per transition (or window of transitions)."""
+    yield from transition_examples(
+        iterate_encoded_timesteps(h5_filepath, recording_folderpath, **kwargs), window_size=window_size
+    )
+
+
+def _iterate_trajectories(paths: List[str], encoding_kwargs: dict, progress_callback: Optional[Callable[[], None]]):
+    # yields the schema and encoded timesteps of every readable trajectory
+    for path in paths:
+        encoded_timesteps = iterate_encoded_timesteps(
+            path + "/trajectory.h5", path + "/recordings/MP4", **encoding_kwargs
+        )
+        first_timestep = next(encoded_timesteps, None)
+        if first_timestep is not None:
+            yield get_feature_schema(first_timestep), itertools.chain([first_timestep], encoded_timesteps)
+
+        if progress_callback is not None:
+            progress_callback()
+
+
+def write_trajectory_tfrecord(
+    paths: List[str],
+    output_path: str,
+    *,
+    keep_keys: Sequence[str],
+    image_size: Tuple[int, int],
+    frameskip: int = 1,
+    read_ahead: int = 8,
+    feature_encoding: str = "tensor",
+    progress_callback: Optional[Callable[[], None]] = None,
+) -> dict:
+    """Write one example per trajectory to a tfrecord file, as each trajectory finishes encoding.
+
+    Args:
+        paths (list): Trajectory folders, each containing trajectory.h5 and recordings/MP4.
+        output_path (str): Path to the output tfrecord file.
+        feature_encoding (str): "tensor" for serialized tensors, or "native" for float/int64/JPEG bytes lists.
+        progress_callback (callable): Called once per trajectory.
+        See iterate_encoded_timesteps for the remaining arguments.
+
+    Returns:
+        dict: The feature schema and number of examples written, to be combined with merge_manifests.
+    """
+    assert feature_encoding in FEATURE_ENCODINGS
+    encoding_kwargs = dict(keep_keys=keep_keys, image_size=image_size, frameskip=frameskip, read_ahead=read_ahead)
+    schema, num_written = None, 0
+
+    with tf.io.TFRecordWriter(output_path) as writer:
+        for traj_schema, encoded_timesteps in _iterate_trajectories(paths, encoding_kwargs, progress_callback):
+            schema = schema or traj_schema
+            assert traj_schema == schema
+            example = trajectory_example(encoded_timesteps, schema=schema if feature_encoding == "native" else None)
+            writer.write(example.SerializeToString())
+            num_written += 1
+
+    return {"features": schema, "shards": {os.path.basename(output_path): num_written}}
+
+
+def write_interleaved_tfrecords(
+    paths: List[str],
+    output_paths: List[str],
+    *,
+    keep_keys: Sequence[str],
+    image_size: Tuple[int, int],
+    frameskip: int = 1,
+    window_size: int = 1,
+    shuffle_buffer_size: int = 1000,
+    seed: int = 0,
+    read_ahead: int = 8,
+    feature_encoding: str = "tensor",
+    progress_callback: Optional[Callable[[], None]] = None,
+) -> dict:
+    """Write per-transition examples, spreading every trajectory across all of the output tfrecord files.
+
+    Serialized examples pass through a bounded shuffle buffer and are then written to a random shard, so each shard
+    mixes transitions from many trajectories and readers can get away with small shuffle buffers.
+
+    Args:
+        paths (list): Trajectory folders, each containing trajectory.h5 and recordings/MP4.
+        output_paths (list): Paths to the output tfrecord files.
+        window_size (int): Number of consecutive transitions per example.
+        shuffle_buffer_size (int): Number of serialized examples held back for shuffling before writing.
+        seed (int): Seed for the shuffle and shard assignment.
+        See write_trajectory_tfrecord for the remaining arguments.
+
+    Returns:
+        dict: The feature schema and number of examples written to each output path.
+    """
+    assert feature_encoding in FEATURE_ENCODINGS
+    encoding_kwargs = dict(keep_keys=keep_keys, image_size=image_size, frameskip=frameskip, read_ahead=read_ahead)
+    rng = np.random.default_rng(seed)
+    writers = [tf.io.TFRecordWriter(path) for path in output_paths]
+    shard_lengths = [0] * len(writers)
+    schema, buffer = None, []
+
+    def write_random_example():
+        index = rng.integers(len(buffer))
+        buffer[index], buffer[-1] = buffer[-1], buffer[index]
+        shard = rng.integers(len(writers))
+        writers[shard].write(buffer.pop())
+        shard_lengths[shard] += 1
+
+    try:
+        for traj_schema, encoded_timesteps in _iterate_trajectories(paths, encoding_kwargs, progress_callback):
+            schema = schema or traj_schema
+            assert traj_schema == schema
+            native_schema = schema if feature_encoding == "native" else None
+
+            for example in transition_examples(encoded_timesteps, window_size=window_size, schema=native_schema):
+                buffer.append(example.SerializeToString())
+                if len(buffer) > shuffle_buffer_size:
+                    write_random_example()
+
+        while buffer:
+            write_random_example()
+
+    finally:
+        for writer in writers:
+            writer.close()
+
+    shards = {os.path.basename(path): length for path, length in zip(output_paths, shard_lengths)}
+    return {"features": schema, "shards": shards}
+
+
+def merge_manifests(fragments: List[dict], **info) -> dict:
+    """Combine the outputs of several writer calls into one manifest, along with the settings in info
+    (layout, window_size, feature_encoding, ...)."""
+    features = None
+    shards = {}
+    for fragment in fragments:
+        if fragment["features"] is not None:
+            features = features or fragment["features"]
+            assert fragment["features"] == features
+        shards.update(fragment["shards"])
+
+    return {**info, "features": features, "shards": shards, "num_examples": sum(shards.values())}
+
+
+def write_manifest(path: str, manifest: dict):
+    with tf.io.gfile.GFile(os.path.join(path, "manifest.json"), "w") as jsonFile:
+        json.dump(manifest, jsonFile, indent=2)
@@ -0,0 +1,139 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+
+def get_file_signature(filepath):
+    file_stats = os.stat(filepath)
+    return [os.path.basename(filepath), file_stats.st_mtime_ns, file_stats.st_size]
+
+
+def get_structure(data, leaf_paths, path=()):
+    if isinstance(data, dict):
+        return {"dict": {key: get_structure(value, leaf_paths, (*path, key)) for key, value in data.items()}}
+    if isinstance(data, (list, tuple)):
+        return {"list": [get_structure(value, leaf_paths, (*path, i)) for i, value in enumerate(data)]}
+    leaf_paths.append(path)
+    return {"array": len(leaf_paths) - 1}
+
+
+def get_leaf(data, path):
+    for key in path:
+        data = data[key]
+    return data
+
+
+def fill_structure(structure, arrays, index):
+    if "dict" in structure:
+        return {key: fill_structure(value, arrays, index) for key, value in structure["dict"].items()}
+    if "list" in structure:
+        return [fill_structure(value, arrays, index) for value in structure["list"]]
+    return np.array(arrays[structure["array"]][index])
+
+
+class CachedTrajectory:
+    """Processed timesteps backed by one memory mapped array per leaf. Indexing copies a single timestep out."""
+
+    def __init__(self, structure, arrays, length):
+        self._structure = structure
+        self._arrays = arrays
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._length
+        if not (0 <= index < self._length):
+            raise IndexError
+        return fill_structure(self._structure, self._arrays, index)
+
+
+class TrajectoryCache:
+    def __init__(self, cache_dir, max_size_gb=50):
+        self.cache_dir = cache_dir
+        self.max_size = int(max_size_gb * 2**30)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get_key(self, filepath, recording_folderpath=None, config=[]):
+        # Any Change To The Source Files Invalidates The Entry #
+        file_signatures = [get_file_signature(filepath)]
+        if recording_folderpath is not None:
+            recording_filepaths = sorted(glob.glob(os.path.join(recording_folderpath, "*")))
+            file_signatures.extend([get_file_signature(f) for f in recording_filepaths if os.path.isfile(f)])
+
+        key_str = json.dumps([os.path.realpath(filepath), file_signatures, config], sort_keys=True, default=str)
+        return hashlib.sha1(key_str.encode()).hexdigest()
+
+    def load(self, key):
+        entry_dir = os.path.join(self.cache_dir, key)
+        try:
+            with open(os.path.join(entry_dir, "structure.json"), "r") as jsonFile:
+                entry_info = json.load(jsonFile)
+            arrays = [
+                np.load(os.path.join(entry_dir, "{0}.npy".format(i)), mmap_mode="r")
+                for i in range(entry_info["num_arrays"])
+            ]
+            os.utime(entry_dir)
+        except (OSError, ValueError):
+            return None
+
+        return CachedTrajectory(entry_info["structure"], arrays, entry_info["length"])
+
+    def save(self, key, timesteps):
+        # Stack Every Leaf Along Time #
+        leaf_paths = []
+        structure = get_structure(timesteps[0], leaf_paths) if len(timesteps) else None
+        arrays = [np.stack([get_leaf(t, path) for t in timesteps]) for path in leaf_paths]
+        entry_size = sum([array.nbytes for array in arrays])
+        if entry_size > self.max_size:
+            return None
+
+        # Write To A Temporary Folder, Then Move Into Place #
+        tmp_dir = os.path.join(self.cache_dir, ".tmp_" + uuid.uuid4().hex)
+        os.makedirs(tmp_dir)
+        for i, array in enumerate(arrays):
+            np.save(os.path.join(tmp_dir, "{0}.npy".format(i)), array)
+
+        entry_info = {"structure": structure, "num_arrays": len(arrays), "length": len(timesteps), "size": entry_size}
+        with open(os.path.join(tmp_dir, "structure.json"), "w") as jsonFile:
+            json.dump(entry_info, jsonFile)
+
+        try:
+            os.rename(tmp_dir, os.path.join(self.cache_dir, key))
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self.evict()
+        return self.load(key)
+
+    def evict(self):
+        # Collect Entries By Last Access #
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            try:
+                with open(os.path.join(entry.path, "structure.json"), "r") as jsonFile:
+                    entry_size = json.load(jsonFile)["size"]
+                entries.append((entry.stat().st_mtime, entry_size, entry.path))
+            except (OSError, ValueError, KeyError):
+                continue
+
+        # Remove Least Recently Used Entries Until Within Budget #
+        total_size = sum([entry_size for _, entry_size, _ in entries])
+        for _, entry_size, entry_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total_size -= entry_size
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
@@ -0,0 +1,202 @@
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import h5py
+import numpy as np
+
+from r2d2.trajectory_utils.trajectory_reader import get_hdf5_length
+
+
+def get_default_index_filepath(data_dir):
+    data_dir_hash = hashlib.sha1(os.path.realpath(data_dir).encode()).hexdigest()
+    return os.path.join(os.path.expanduser("~"), ".cache", "r2d2", "trajectory_index_{0}.db".format(data_dir_hash))
+
+
+def _to_json_value(value):
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def get_json_attrs(hdf5_file):
+    return {key: _to_json_value(value) for key, value in hdf5_file.attrs.items()}
+
+
+def load_metadata_json(folderpath):
+    # Postprocessed Trajectories Carry Their Metadata Record #
+    metadata_filepaths = sorted(glob.glob(os.path.join(folderpath, "metadata_*.json")))
+    if not len(metadata_filepaths):
+        return None
+    with open(metadata_filepaths[0], "r") as jsonFile:
+        return json.load(jsonFile)
+
+
+def read_trajectory_metadata(filepath):
+    with h5py.File(filepath, "r") as hdf5_file:
+        attrs = get_json_attrs(hdf5_file)
+        length = get_hdf5_length(hdf5_file, keys_to_ignore=["videos"])
+    return attrs, length
+
+
+class TrajectoryIndex:
+    """SQLite index of every trajectory folder under data_dir, with its HDF5 attrs, length and postprocessing
+    metadata JSON (if any).
+
+    refresh() only lists directories whose mtime changed, and only rereads trajectories whose folder mtime, or
+    trajectory file mtime or size, changed since the last refresh. Folderpaths are returned joined onto data_dir,
+    like crawler.
+    """
+
+    def __init__(self, data_dir, index_filepath=None, num_workers=16):
+        self.data_dir = data_dir
+        self.index_filepath = index_filepath or get_default_index_filepath(data_dir)
+        self.num_workers = num_workers
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_filepath)), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS directories "
+                "(dirpath TEXT PRIMARY KEY, mtime_ns INTEGER, subdirs TEXT, has_trajectory INTEGER)"
+            )
+            # Indexes Built Before Metadata Was Stored Are Rebuilt #
+            traj_columns = [row[1] for row in connection.execute("PRAGMA table_info(trajectories)")]
+            if len(traj_columns) and ("metadata" not in traj_columns):
+                connection.execute("DROP TABLE trajectories")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS trajectories (folderpath TEXT PRIMARY KEY, folder_mtime_ns INTEGER, "
+                "mtime_ns INTEGER, size INTEGER, length INTEGER, attrs TEXT, metadata TEXT)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.index_filepath)
+
+    def _scan_directory(self, dirpath, cached_dirs):
+        try:
+            mtime_ns = os.stat(os.path.join(self.data_dir, dirpath)).st_mtime_ns
+        except OSError:
+            return None
+
+        # Reuse Listing Of Unchanged Directories #
+        cached_dir = cached_dirs.get(dirpath)
+        if (cached_dir is not None) and (cached_dir[0] == mtime_ns):
+            return dirpath, mtime_ns, cached_dir[1], cached_dir[2]
+
+        subdirs, has_trajectory = [], False
+        try:
+            for entry in os.scandir(os.path.join(self.data_dir, dirpath)):
+                if entry.is_dir():
+                    subdirs.append(entry.name)
+                elif entry.name == "trajectory.h5":
+                    has_trajectory = True
+        except OSError:
+            return None
+
+        return dirpath, mtime_ns, subdirs, has_trajectory
+
+    def _scan_trajectory(self, folderpath, folder_mtime_ns, cached_trajectories):
+        filepath = os.path.join(self.data_dir, folderpath, "trajectory.h5")
+        try:
+            file_stats = os.stat(filepath)
+        except OSError:
+            return None
+
+        # Reuse Metadata Of Unchanged Files, Where Adding A Metadata JSON Changes The Folder mtime #
+        cached_traj = cached_trajectories.get(folderpath)
+        file_signature = (folder_mtime_ns, file_stats.st_mtime_ns, file_stats.st_size)
+        if (cached_traj is not None) and (tuple(cached_traj) == file_signature):
+            return None
+
+        try:
+            attrs, length = read_trajectory_metadata(filepath)
+            metadata = load_metadata_json(os.path.join(self.data_dir, folderpath))
+        except (OSError, AssertionError, ValueError):
+            print("Could not read {0}".format(filepath))
+            return None
+
+        return folderpath, *file_signature, length, json.dumps(attrs), json.dumps(metadata)
+
+    def refresh(self):
+        with self._connect() as connection:
+            cached_dirs = {
+                row[0]: (row[1], json.loads(row[2]), bool(row[3]))
+                for row in connection.execute("SELECT dirpath, mtime_ns, subdirs, has_trajectory FROM directories")
+            }
+            cached_trajectories = {
+                row[0]: row[1:]
+                for row in connection.execute("SELECT folderpath, folder_mtime_ns, mtime_ns, size FROM trajectories")
+            }
+
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            # Crawl One Directory Level At A Time, Without Descending Into Trajectory Folders #
+            scanned_dirs, traj_folderpaths, pending_dirs = [], [], [""]
+            while len(pending_dirs):
+                results = executor.map(lambda dirpath: self._scan_directory(dirpath, cached_dirs), pending_dirs)
+                pending_dirs = []
+
+                for result in results:
+                    if result is None:
+                        continue
+                    scanned_dirs.append(result)
+                    dirpath, mtime_ns, subdirs, has_trajectory = result
+                    if has_trajectory:
+                        traj_folderpaths.append((dirpath, mtime_ns))
+                    else:
+                        pending_dirs.extend([os.path.join(dirpath, subdir) for subdir in subdirs])
+
+            # Read Metadata Of New Or Modified Trajectories #
+            updated_trajectories = executor.map(
+                lambda traj_folder: self._scan_trajectory(*traj_folder, cached_trajectories), traj_folderpaths
+            )
+            updated_trajectories = [row for row in updated_trajectories if row is not None]
+
+        # Save Index #
+        with self._connect() as connection:
+            connection.execute("DELETE FROM directories")
+            connection.executemany(
+                "INSERT INTO directories VALUES (?, ?, ?, ?)",
+                [
+                    (dirpath, mtime_ns, json.dumps(subdirs), has_traj)
+                    for dirpath, mtime_ns, subdirs, has_traj in scanned_dirs
+                ],
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO trajectories VALUES (?, ?, ?, ?, ?, ?, ?)", updated_trajectories
+            )
+
+            removed_folderpaths = set(cached_trajectories) - set([folderpath for folderpath, _ in traj_folderpaths])
+            connection.executemany("DELETE FROM trajectories WHERE folderpath = ?", [(f,) for f in removed_folderpaths])
+
+        return len(updated_trajectories)
+
+    def get_records(self, filter_func=None):
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT folderpath, length, attrs, metadata FROM trajectories ORDER BY folderpath"
+            ).fetchall()
+
+        records = []
+        for folderpath, length, attrs, metadata in rows:
+            attrs = json.loads(attrs)
+            if (filter_func is not None) and (not filter_func(attrs)):
+                continue
+            records.append(
+                {
+                    "folderpath": os.path.join(self.data_dir, folderpath),
+                    "length": length,
+                    "attrs": attrs,
+                    "metadata": json.loads(metadata),
+                }
+            )
+
+        return records
+
+    def query(self, filter_func=None):
+        return [record["folderpath"] for record in self.get_records(filter_func=filter_func)]
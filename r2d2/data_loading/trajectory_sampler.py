@@ -1,13 +1,32 @@
+import glob
+import hashlib
+import heapq
+import json
 import os
+from collections import defaultdict
 
 import h5py
 import numpy as np
+import torch
 
-from r2d2.data_processing.timestep_processing import TimestepProcesser
+from r2d2.data_loading.trajectory_cache import TrajectoryCache
+from r2d2.data_loading.trajectory_index import TrajectoryIndex, get_json_attrs, load_metadata_json
+from r2d2.data_processing.data_transforms import ImageTransformer, split_image_transform_kwargs
+from r2d2.data_processing.timestep_processing import TimestepProcesser, split_batch
 from r2d2.trajectory_utils.misc import load_trajectory
+from r2d2.trajectory_utils.trajectory_reader import TrajectoryReader
 
 
-def crawler(dirname, filter_func=None):
+def crawler(dirname, filter_func=None, use_index=False):
+    """Returns every trajectory folder under dirname. filter_func receives the HDF5 attrs as a dict of plain
+    Python values (see get_json_attrs), both when walking the tree and when querying the index."""
+
+    # Query The Metadata Index Instead Of Walking The Tree #
+    if use_index:
+        traj_index = TrajectoryIndex(dirname)
+        traj_index.refresh()
+        return traj_index.query(filter_func=filter_func)
+
     subfolders = [f.path for f in os.scandir(dirname) if f.is_dir()]
     traj_files = [f.path for f in os.scandir(dirname) if (f.is_file() and "trajectory.h5" in f.path)]
 
@@ -16,9 +35,8 @@ def crawler(dirname, filter_func=None):
         if filter_func is None:
             use_data = True
         else:
-            hdf5_file = h5py.File(traj_files[0], "r")
-            use_data = filter_func(hdf5_file.attrs)
-            hdf5_file.close()
+            with h5py.File(traj_files[0], "r") as hdf5_file:
+                use_data = filter_func(get_json_attrs(hdf5_file))
 
         if use_data:
             return [dirname]
@@ -31,40 +49,168 @@ def crawler(dirname, filter_func=None):
     return all_folderpaths
 
 
-def generate_train_test_split(filter_func=None, remove_failures=True, train_p=0.9):
-    # Collect And Split #
-    all_folderpaths = collect_data_folderpaths(filter_func=filter_func, remove_failures=remove_failures)
+def get_data_dir(remove_failures=True):
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    data_dir = os.path.join(dir_path, "../../data")
+    if remove_failures:
+        data_dir = os.path.join(data_dir, "success")
+    return data_dir
+
+
+def load_split_metadata(folderpath, record=None):
+    """Returns the uuid and stratification fields of a trajectory from its TrajectoryIndex record, or otherwise from
+    the metadata JSON written by postprocessing. Trajectory files are never opened."""
+
+    # Postprocessed Trajectories Carry Their Metadata Record #
+    metadata = load_metadata_json(folderpath) if record is None else record["metadata"]
+    if metadata is not None:
+        return metadata
+    if record is None:
+        raise ValueError("{0} has no metadata JSON, so split it with use_index=True".format(folderpath))
+
+    # Otherwise Follow The Postprocessing Schema Where Possible #
+    attrs = record["attrs"]
+    traj_name = attrs.get("time", os.path.basename(os.path.normpath(folderpath)))
+    return {
+        "uuid": "{0}+{1}".format(attrs.get("user", "unknown"), traj_name),
+        "lab": attrs.get("lab", "unknown"),
+        "scene_id": int(attrs.get("scene_id", -1)),
+        "current_task": attrs.get("current_task", ""),
+        "success": bool(attrs["success"]) if "success" in attrs else None,
+    }
+
+
+SPLIT_HASH_BUCKETS = 10000
+
+
+def get_split_hash(uuid, seed=0):
+    uuid_hash = hashlib.sha1("{0}+{1}".format(seed, uuid).encode()).hexdigest()
+    return int(uuid_hash[:16], 16)
+
+
+def split_trajectories(folderpaths, metadata, train_p=0.9, stratify_keys=[], seed=0):
+    """Assigns each trajectory on its own by the hash of its uuid, so the split does not depend on crawl order or
+    machine. A stratum (unique values of stratify_keys) large enough to expect a test trajectory, but whose
+    trajectories all hash into train, holds out its lowest-hash trajectory for testing instead.
+
+    Assignment is stable as data is added, except for these forced holdouts: a new lower-hash trajectory takes over
+    the holdout, and the stratum's first hashed test trajectory returns the holdout to train."""
+
+    strata = defaultdict(list)
+    for folderpath, traj_metadata in zip(folderpaths, metadata):
+        stratum = tuple([str(traj_metadata.get(key)) for key in stratify_keys])
+        strata[stratum].append((get_split_hash(traj_metadata["uuid"], seed=seed), folderpath))
 
-    # Split Into Train / Test #
-    num_train_traj = int(train_p * len(all_folderpaths))
-    all_ind = np.random.permutation(len(all_folderpaths))
-    training_ind, test_ind = all_ind[:num_train_traj], all_ind[num_train_traj:]
     train_folderpaths, test_folderpaths = [], []
+    for stratum_trajectories in strata.values():
+        stratum_trajectories.sort()
+        stratum_train = [f for h, f in stratum_trajectories if h % SPLIT_HASH_BUCKETS < train_p * SPLIT_HASH_BUCKETS]
+        stratum_test = [f for h, f in stratum_trajectories if h % SPLIT_HASH_BUCKETS >= train_p * SPLIT_HASH_BUCKETS]
+
+        # Strata Expecting A Test Trajectory Contribute One, Without Skewing The Fraction Of Small Strata #
+        expects_test = round(len(stratum_trajectories) * (1 - train_p), 6) >= 1
+        if expects_test and not len(stratum_test):
+            stratum_test.append(stratum_train.pop(0))
+
+        train_folderpaths.extend(stratum_train)
+        test_folderpaths.extend(stratum_test)
+
+    return sorted(train_folderpaths), sorted(test_folderpaths)
+
+
+def save_split_manifest(manifest_filepath, train_folderpaths, test_folderpaths, split_config={}):
+    manifest = {"train": train_folderpaths, "test": test_folderpaths, "config": split_config}
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_filepath))
+    os.makedirs(manifest_dir, exist_ok=True)
+    with open(manifest_filepath, "w") as jsonFile:
+        json.dump(manifest, jsonFile, indent=2)
+
+
+def load_split_manifest(manifest_filepath):
+    with open(manifest_filepath, "r") as jsonFile:
+        manifest = json.load(jsonFile)
+    return manifest["train"], manifest["test"]
+
 
-    for i in range(len(all_folderpaths)):
-        folderpath = all_folderpaths[i]
-        if i in training_ind:
-            train_folderpaths.append(folderpath)
-        if i in test_ind:
-            test_folderpaths.append(folderpath)
+def generate_train_test_split(
+    filter_func=None,
+    remove_failures=True,
+    train_p=0.9,
+    use_index=True,
+    stratify_keys=[],
+    seed=0,
+    manifest_filepath=None,
+):
+    # Reuse Saved Split #
+    if (manifest_filepath is not None) and os.path.isfile(manifest_filepath):
+        return load_split_manifest(manifest_filepath)
+
+    # Collect Trajectories And Metadata #
+    all_folderpaths = collect_data_folderpaths(
+        filter_func=filter_func, remove_failures=remove_failures, use_index=use_index
+    )
+    records = {}
+    if use_index:
+        traj_index = TrajectoryIndex(get_data_dir(remove_failures=remove_failures))
+        records = {record["folderpath"]: record for record in traj_index.get_records()}
+    metadata = [load_split_metadata(f, record=records.get(f)) for f in all_folderpaths]
+
+    # Split Into Train / Test #
+    train_folderpaths, test_folderpaths = split_trajectories(
+        all_folderpaths, metadata, train_p=train_p, stratify_keys=stratify_keys, seed=seed
+    )
+
+    if manifest_filepath is not None:
+        split_config = {"train_p": train_p, "stratify_keys": stratify_keys, "seed": seed}
+        save_split_manifest(manifest_filepath, train_folderpaths, test_folderpaths, split_config=split_config)
 
     return train_folderpaths, test_folderpaths
 
 
-def collect_data_folderpaths(filter_func=None, remove_failures=True):
+def collect_data_folderpaths(filter_func=None, remove_failures=True, use_index=False):
     # Prepare Data Folder #
-    dir_path = os.path.dirname(os.path.realpath(__file__))
-    data_dir = os.path.join(dir_path, "../../data")
-    if remove_failures:
-        data_dir = os.path.join(data_dir, "success")
+    data_dir = get_data_dir(remove_failures=remove_failures)
 
     # Collect #
-    all_folderpaths = crawler(data_dir, filter_func=filter_func)
+    all_folderpaths = crawler(data_dir, filter_func=filter_func, use_index=use_index)
 
     # Return Paths #
     return all_folderpaths
 
 
+def get_trajectory_cost(filepath, recording_folderpath=None, cache_index=False, horizon=None):
+    if horizon is None:
+        traj_reader = TrajectoryReader(filepath, read_images=False, cache_index=cache_index)
+        horizon = traj_reader.length()
+        traj_reader.close()
+
+    num_cameras = 0
+    if recording_folderpath is not None:
+        num_cameras = len(glob.glob(recording_folderpath + "/*.mp4") + glob.glob(recording_folderpath + "/*.svo"))
+
+    return horizon * max(num_cameras, 1)
+
+
+def partition_trajectories(traj_costs, num_shards, seed=0):
+    """Assigns trajectories, most expensive first, to the shard with the lowest total cost. Costs are jittered
+    using the seed, so the assignment changes between epochs while staying balanced."""
+
+    rng = np.random.RandomState(seed)
+    jittered_costs = np.asarray(traj_costs, dtype=float) * rng.uniform(0.75, 1.25, size=len(traj_costs))
+
+    shards = [[] for _ in range(num_shards)]
+    # Ties In Cost (Such As Empty Trajectories) Go To The Shard With Fewer Trajectories #
+    shard_heap = [(0.0, 0, tie_breaker, i) for i, tie_breaker in enumerate(rng.permutation(num_shards))]
+    heapq.heapify(shard_heap)
+
+    for traj_ind in np.argsort(-jittered_costs, kind="stable"):
+        shard_cost, num_traj, tie_breaker, shard_ind = heapq.heappop(shard_heap)
+        shards[shard_ind].append(int(traj_ind))
+        heapq.heappush(shard_heap, (shard_cost + jittered_costs[traj_ind], num_traj + 1, tie_breaker, shard_ind))
+
+    return shards
+
+
 class TrajectorySampler:
     def __init__(
         self,
@@ -74,38 +220,157 @@ class TrajectorySampler:
         timestep_filtering_kwargs={},
         image_transform_kwargs={},
         camera_kwargs={},
+        required_keys=None,
+        cache_kwargs=None,
+        rank=0,
+        world_size=None,
+        shard_seed=0,
+        index_dir=None,
     ):
         self._all_folderpaths = all_folderpaths
         self.recording_prefix = recording_prefix
         self.traj_loading_kwargs = traj_loading_kwargs
+        self.camera_kwargs = camera_kwargs
+
+        # Cache Processed Trajectories Before Random Image Transforms #
+        self.trajectory_cache = None
+        if cache_kwargs is not None:
+            self.trajectory_cache = TrajectoryCache(**cache_kwargs)
+            cached_transform_kwargs, sampled_transform_kwargs = split_image_transform_kwargs(image_transform_kwargs)
+            self.image_transformer = ImageTransformer(**sampled_transform_kwargs)
+            image_transform_kwargs = cached_transform_kwargs
+
+            loading_keys = ["read_cameras", "remove_skipped_steps", "frameskip"]
+            self.cache_config = [
+                recording_prefix,
+                camera_kwargs,
+                timestep_filtering_kwargs,
+                cached_transform_kwargs,
+                {k: v for k, v in traj_loading_kwargs.items() if k in loading_keys},
+            ]
+
         self.timestep_processer = TimestepProcesser(
             **timestep_filtering_kwargs, image_transform_kwargs=image_transform_kwargs
         )
-        self.camera_kwargs = camera_kwargs
+
+        # Only Read HDF5 Keys The Processer Uses #
+        if required_keys is None:
+            required_keys = self.timestep_processer.get_required_keys()
+        self.required_keys = required_keys
+
+        # Split Trajectories Across Distributed Ranks #
+        if world_size is None:
+            distributed = torch.distributed.is_available() and torch.distributed.is_initialized()
+            world_size = torch.distributed.get_world_size() if distributed else 1
+            rank = torch.distributed.get_rank() if distributed else 0
+        self.rank = rank
+        self.world_size = world_size
+        self.shard_seed = shard_seed
+        self.index_dir = index_dir
+        self.epoch = 0
+        self._traj_costs = None
+        self._traj_queue = []
+
+    def get_trajectory_costs(self):
+        # Estimated Decode Cost Is Trajectory Length Times Number Of Cameras #
+        if self._traj_costs is None:
+            cache_index = self.traj_loading_kwargs.get("cache_index", False)
+
+            # Read Lengths From The Metadata Index Instead Of Opening Every File #
+            traj_lengths = {}
+            if self.index_dir is not None:
+                traj_index = TrajectoryIndex(self.index_dir)
+                traj_lengths = {record["folderpath"]: record["length"] for record in traj_index.get_records()}
+
+            self._traj_costs = [
+                get_trajectory_cost(
+                    *self.get_trajectory_paths(folderpath),
+                    cache_index=cache_index,
+                    horizon=traj_lengths.get(folderpath),
+                )
+                for folderpath in self._all_folderpaths
+            ]
+        return self._traj_costs
+
+    def get_shard(self, worker_info=None, epoch=0):
+        num_workers = 1 if worker_info is None else worker_info.num_workers
+        worker_id = 0 if worker_info is None else worker_info.id
+
+        # Every Rank And Worker Computes The Same Partition For A Given Epoch #
+        num_shards = self.world_size * num_workers
+        shard_id = self.rank * num_workers + worker_id
+        traj_costs = self.get_trajectory_costs()
+
+        # With More Shards Than Trajectories, Keep One Partition So Empty Shards Stay Empty #
+        if num_shards >= len(traj_costs):
+            epoch = 0
+
+        shards = partition_trajectories(traj_costs, num_shards, seed=self.shard_seed + epoch)
+        return shards[shard_id]
 
     def fetch_samples(self, worker_info=None):
-        if worker_info is None:
-            range_low, range_high = 0, len(self._all_folderpaths)
-        else:
-            slice_size = len(self._all_folderpaths) // worker_info.num_workers
-            range_low = slice_size * worker_info.id
-            range_high = slice_size * (worker_info.id + 1)
+        # Each Pass Over A Shard Is An Epoch, And Every Worker Repartitions At The Same Pass Count #
+        if not len(self._traj_queue):
+            self._traj_queue = list(np.random.permutation(self.get_shard(worker_info=worker_info, epoch=self.epoch)))
+            self.epoch += 1
+
+        # Shards Can Be Empty With More Workers Than Trajectories #
+        if not len(self._traj_queue):
+            return []
+        folderpath = self._all_folderpaths[self._traj_queue.pop()]
 
-        traj_ind = np.random.randint(low=range_low, high=range_high)
-        folderpath = self._all_folderpaths[traj_ind]
+        if self.trajectory_cache is not None:
+            return self._fetch_cached_samples(folderpath)
 
+        return self.process_trajectory(folderpath)
+
+    def get_trajectory_paths(self, folderpath):
         filepath = os.path.join(folderpath, "trajectory.h5")
         recording_folderpath = os.path.join(folderpath, "recordings", self.recording_prefix)
         if not os.path.exists(recording_folderpath):
             recording_folderpath = None
+        return filepath, recording_folderpath
+
+    def process_trajectory(self, folderpath, **kwargs):
+        filepath, recording_folderpath = self.get_trajectory_paths(folderpath)
+        traj_loading_kwargs = {**self.traj_loading_kwargs, **kwargs}
 
         traj_samples = load_trajectory(
             filepath,
             recording_folderpath=recording_folderpath,
             camera_kwargs=self.camera_kwargs,
-            **self.traj_loading_kwargs,
+            keys=self.required_keys,
+            **traj_loading_kwargs,
         )
 
-        processed_traj_samples = [self.timestep_processer.forward(t) for t in traj_samples]
+        # Process The Whole Trajectory At Once #
+        if not len(traj_samples):
+            return []
+        processed_batch = self.timestep_processer.forward_batch(traj_samples)
+        processed_traj_samples = split_batch(processed_batch, len(traj_samples))
+
+        return processed_traj_samples
+
+    def _fetch_cached_samples(self, folderpath):
+        filepath, recording_folderpath = self.get_trajectory_paths(folderpath)
+        cache_key = self.trajectory_cache.get_key(filepath, recording_folderpath, config=self.cache_config)
+        processed_traj = self.trajectory_cache.load(cache_key)
+
+        # Process And Cache Every Timestep, So Later Epochs Can Subsample Freely #
+        if processed_traj is None:
+            processed_traj = self.process_trajectory(folderpath, num_samples_per_traj=None)
+            cached_traj = self.trajectory_cache.save(cache_key, processed_traj)
+            if cached_traj is not None:
+                processed_traj = cached_traj
+
+        # Subsample Timesteps #
+        num_samples = self.traj_loading_kwargs.get("num_samples_per_traj", None)
+        indices_to_keep = np.arange(len(processed_traj))
+        if (num_samples is not None) and (len(processed_traj) > num_samples):
+            indices_to_keep = np.random.choice(len(processed_traj), size=num_samples, replace=False)
+
+        processed_traj_samples = [processed_traj[i] for i in indices_to_keep]
+        for timestep in processed_traj_samples:
+            self.image_transformer.forward(timestep)
 
         return processed_traj_samples
@@ -1,13 +1,72 @@
 import cv2
+import numpy as np
+import torch
 from torchvision import transforms as T
 
+# Transforms With The Same Output Every Time, Which Can Be Applied Once Before Storing Data #
+DETERMINISTIC_TRANSFORMS = ["remove_alpha", "bgr_to_rgb"]
+
+
+def split_image_transform_kwargs(image_transform_kwargs):
+    deterministic_kwargs, sampled_kwargs = {}, {}
+    for key, value in image_transform_kwargs.items():
+        if key in DETERMINISTIC_TRANSFORMS:
+            deterministic_kwargs[key] = value
+        elif key == "image_path":
+            deterministic_kwargs[key] = sampled_kwargs[key] = value
+        else:
+            sampled_kwargs[key] = value
+    return deterministic_kwargs, sampled_kwargs
+
+
+def to_uint8_tensor(data):
+    # Same Layout As T.ToTensor, Without Rescaling #
+    tensor = torch.from_numpy(np.ascontiguousarray(data))
+    tensor = tensor.unsqueeze(-1) if tensor.ndim == 2 else tensor
+    return tensor.permute(2, 0, 1).contiguous()
+
+
+def channels_first_to_tensor(data):
+    # Images Are Already Channels First, So Only Rescale uint8 Data Like T.ToTensor #
+    tensor = torch.from_numpy(np.ascontiguousarray(data))
+    if tensor.dtype == torch.uint8:
+        tensor = tensor.to(dtype=torch.get_default_dtype()).div_(255)
+    return tensor
+
+
+def create_batch_augmenter(image_transform_kwargs):
+    if image_transform_kwargs.get("augment", False) != "batch":
+        return None
+    image_path = image_transform_kwargs.get("image_path", "observation/camera/image")
+    return BatchImageAugmenter(**image_transform_kwargs.get("batch_augment_kwargs", {}), image_path=image_path)
+
 
 class ImageTransformer:
     def __init__(
-        self, remove_alpha=False, bgr_to_rgb=False, augment=False, to_tensor=False, image_path="observation/camera/image"
+        self,
+        remove_alpha=False,
+        bgr_to_rgb=False,
+        augment=False,
+        to_tensor=False,
+        channels_first=False,
+        image_path="observation/camera/image",
+        batch_augment_kwargs={},
     ):
+        # Channels First Images Were Already Converted By The Camera Reader #
+        assert not (channels_first and any([remove_alpha, bgr_to_rgb, augment]))
+
+        # Batched Augmentation Runs After Collation, On uint8 Tensors #
+        assert augment in [True, False, "batch"]
+        assert (augment != "batch") or to_tensor
+        self.batch_augment = augment == "batch"
+
         self.image_path = image_path.split("/")
         self.apply_transforms = any([remove_alpha, bgr_to_rgb, augment, to_tensor])
+        self.remove_alpha = remove_alpha
+        self.bgr_to_rgb = bgr_to_rgb
+        self.augment = augment
+        self.to_tensor = to_tensor
+        self.channels_first = channels_first
 
         # Build Composed Transform #
         transforms = []
@@ -26,11 +85,15 @@ class ImageTransformer:
             new_transform = T.Lambda(lambda data: helper(data))
             transforms.append(new_transform)
 
-        if augment:
+        if augment and not self.batch_augment:
             transforms.append(T.ToPILImage())
             transforms.append(T.AugMix())
 
-        if to_tensor:
+        if to_tensor and channels_first:
+            transforms.append(T.Lambda(lambda data: channels_first_to_tensor(data)))
+        elif to_tensor and self.batch_augment:
+            transforms.append(T.Lambda(lambda data: to_uint8_tensor(data)))
+        elif to_tensor:
             transforms.append(T.ToTensor())
 
         self.composed_transforms = T.Compose(transforms)
@@ -50,3 +113,121 @@ class ImageTransformer:
             for i in range(len(obs[cam_type])):
                 data = self.composed_transforms(obs[cam_type][i])
                 obs[cam_type][i] = data
+
+    def _transform_stacked(self, data):
+        # Random Transforms Are Sampled Per Image #
+        if self.augment and not self.batch_augment:
+            images = [self.composed_transforms(image) for image in data]
+            if self.to_tensor:
+                return torch.stack(images)
+            return np.stack([np.asarray(image) for image in images])
+
+        # Channel Selection And Reordering Apply To The Whole Stack At Once #
+        channels = list(range(data.shape[-1])) if data.ndim == 4 else [None]
+        if self.remove_alpha:
+            channels = channels[:3]
+        if self.bgr_to_rgb:
+            channels = [2, 1, 0, 3][: len(channels)]
+
+        if self.to_tensor and self.channels_first:
+            return channels_first_to_tensor(data)
+
+        # Matches T.ToTensor For Each Image, Copying One Channel At A Time Into Channels First Order #
+        if self.to_tensor:
+            src = torch.from_numpy(np.ascontiguousarray(data))
+            src = src.unsqueeze(-1) if data.ndim == 3 else src
+            rescale = (src.dtype == torch.uint8) and (not self.batch_augment)
+            dtype = torch.get_default_dtype() if rescale else src.dtype
+            tensor = torch.empty((src.shape[0], len(channels), *src.shape[1:3]), dtype=dtype)
+            for i, channel in enumerate(channels):
+                tensor[:, i].copy_(src[..., 0 if channel is None else channel])
+            if rescale:
+                tensor.div_(255)
+            return tensor
+
+        if channels != list(range(data.shape[-1])):
+            data = data[..., channels]
+        return data
+
+    def forward_batch(self, batch):
+        """Same as forward, but every camera entry is a stack of images along the first dimension."""
+
+        # Skip If Unnecesary #
+        if not self.apply_transforms:
+            return batch
+
+        # Isolate Image Data #
+        obs = batch
+        for key in self.image_path:
+            obs = obs.get(key, {})
+
+        # Apply Transforms #
+        for cam_type in obs:
+            for i in range(len(obs[cam_type])):
+                obs[cam_type][i] = self._transform_stacked(obs[cam_type][i])
+
+        return batch
+
+
+class BatchImageAugmenter:
+    """Augments collated uint8 image batches of shape (B, C, H, W) on whatever device they are on, sampling an
+    independent shift and color jitter for every image. Used when image_transform_kwargs has augment="batch"."""
+
+    def __init__(
+        self, random_shift=4, brightness=0.2, contrast=0.2, saturation=0.2, image_path="observation/camera/image"
+    ):
+        self.random_shift = random_shift
+        self.brightness = brightness
+        self.contrast = contrast
+        self.saturation = saturation
+        self.image_path = image_path.split("/")
+
+    def _sample_factors(self, images, strength):
+        shape = (images.shape[0], 1, 1, 1)
+        return torch.empty(shape, device=images.device).uniform_(1 - strength, 1 + strength)
+
+    def _shift(self, images):
+        # Pad By Replication, Then Crop A Random Window From Each Image #
+        batch_size, num_channels, height, width = images.shape
+        padded = torch.nn.functional.pad(images, [self.random_shift] * 4, mode="replicate")
+        offsets = torch.randint(0, 2 * self.random_shift + 1, (2, batch_size, 1), device=images.device)
+        rows = offsets[0] + torch.arange(height, device=images.device)
+        cols = offsets[1] + torch.arange(width, device=images.device)
+
+        rows = rows.view(batch_size, 1, height, 1).expand(-1, num_channels, -1, padded.shape[3])
+        cols = cols.view(batch_size, 1, 1, width).expand(-1, num_channels, height, -1)
+        return padded.gather(2, rows).gather(3, cols)
+
+    def _augment(self, images):
+        if self.random_shift:
+            images = self._shift(images)
+
+        if self.brightness:
+            images = images * self._sample_factors(images, self.brightness)
+
+        if self.contrast:
+            mean = images.mean(dim=(1, 2, 3), keepdim=True)
+            images = (images - mean) * self._sample_factors(images, self.contrast) + mean
+
+        if self.saturation and (images.shape[1] == 3):
+            weights = torch.tensor([0.299, 0.587, 0.114], device=images.device).view(1, 3, 1, 1)
+            grayscale = (images * weights).sum(dim=1, keepdim=True)
+            images = (images - grayscale) * self._sample_factors(images, self.saturation) + grayscale
+
+        return images.clamp(0, 1)
+
+    def forward(self, batch, augment=True):
+        # Isolate Image Data #
+        obs = batch
+        for key in self.image_path:
+            obs = obs.get(key, {})
+
+        # Rescale To [0, 1] Like T.ToTensor, Then Augment #
+        for cam_type in obs:
+            for i in range(len(obs[cam_type])):
+                images = obs[cam_type][i]
+                if images.dtype == torch.uint8:
+                    images = images.to(dtype=torch.get_default_dtype()).div(255)
+                obs[cam_type][i] = self._augment(images) if augment else images
+
+        return batch
@@ -32,6 +32,99 @@ class TimestepProcesser:
         self.action_dtype = action_dtype
 
         self.image_transformer = ImageTransformer(**image_transform_kwargs)
+        self._schemas = {}
+
+    def get_required_keys(self):
+        required_keys = ["observation/camera_type"]
+        required_keys.extend(["observation/robot_state/" + key for key in self.robot_state_keys])
+        if len(self.camera_extrinsics):
+            required_keys.append("observation/camera_extrinsics")
+        if not self.ignore_action:
+            required_keys.extend(["action/" + self.action_space, "action/" + self.gripper_key])
+        return required_keys
+
+    def get_schema(self, timestep):
+        # Key Order And Camera Slots Only Depend On Which Cameras And Keys Are Present #
+        obs = timestep["observation"]
+        schema_key = (
+            tuple(sorted(obs["camera_type"].items())),
+            tuple(sorted(obs.get("camera_extrinsics", {}).keys())),
+            tuple([tuple(sorted(obs.get(obs_type, {}).keys())) for obs_type in ["image", "depth", "pointcloud"]]),
+        )
+        if schema_key in self._schemas:
+            return schema_key, self._schemas[schema_key]
+
+        camera_type_dict = {k: camera_type_to_string_dict[v] for k, v in obs["camera_type"].items()}
+        sorted_camera_ids = sorted(camera_type_dict.keys())
+
+        # Extrinsics Are Ordered By Camera Type, Then Serial Number #
+        extrinsics_dict = defaultdict(list)
+        for serial_number in sorted_camera_ids:
+            cam_type = camera_type_dict[serial_number]
+            if cam_type not in self.camera_extrinsics:
+                continue
+            for full_cam_id in schema_key[1]:
+                if serial_number in full_cam_id:
+                    extrinsics_dict[cam_type].append(full_cam_id)
+        extrinsics_ids = list(chain(*[extrinsics_dict[cam_type] for cam_type in sorted(extrinsics_dict.keys())]))
+
+        # Map Each Camera Type To Its Observation Keys #
+        high_dim_ids = defaultdict(lambda: defaultdict(list))
+        for obs_type, sorted_obs_ids in zip(["image", "depth", "pointcloud"], schema_key[2]):
+            for serial_number in sorted_camera_ids:
+                cam_type = camera_type_dict[serial_number]
+                for full_obs_id in sorted_obs_ids:
+                    if serial_number in full_obs_id:
+                        high_dim_ids[obs_type][cam_type].append(full_obs_id)
+
+        schema = {
+            "state_keys": sorted(self.robot_state_keys),
+            "extrinsics_ids": extrinsics_ids,
+            "high_dim_ids": {k: dict(v) for k, v in high_dim_ids.items()},
+        }
+        self._schemas[schema_key] = schema
+        return schema_key, schema
+
+    def forward_batch(self, timesteps):
+        """Processes timesteps that share one schema (e.g. a whole trajectory) into a single batch. State, action
+        and every camera's observations are stacked along the first dimension, matching forward for each timestep.
+        The input timesteps are not modified."""
+
+        schema_key, schema = self.get_schema(timesteps[0])
+        for timestep in timesteps[1:]:
+            assert self.get_schema(timestep)[0] == schema_key, "Timesteps must share one schema"
+
+        observations = [timestep["observation"] for timestep in timesteps]
+        num_timesteps = len(observations)
+
+        def stack_column(column):
+            return np.stack([np.asarray(value) for value in column]).reshape(num_timesteps, -1)
+
+        ### Get Low Dimensional State ###
+        state_columns = [stack_column([obs["robot_state"][key] for obs in observations]) for key in schema["state_keys"]]
+        for full_cam_id in schema["extrinsics_ids"]:
+            state_columns.append(stack_column([obs["camera_extrinsics"][full_cam_id] for obs in observations]))
+        state_columns.append(np.zeros((num_timesteps, 0)))
+        low_level_state = np.concatenate(state_columns, axis=1, dtype=self.state_dtype)
+
+        ### Get High Dimensional State Info ###
+        high_dim_state_dict = {}
+        for obs_type, obs_type_ids in schema["high_dim_ids"].items():
+            high_dim_state_dict[obs_type] = {
+                cam_type: [np.stack([obs[obs_type][full_obs_id] for obs in observations]) for full_obs_id in obs_ids]
+                for cam_type, obs_ids in obs_type_ids.items()
+            }
+
+        processed_batch = {"observation": {"state": low_level_state, "camera": high_dim_state_dict}}
+        self.image_transformer.forward_batch(processed_batch)
+
+        ### Add Proper Action ###
+        if not self.ignore_action:
+            arm_action = stack_column([timestep["action"][self.action_space] for timestep in timesteps])
+            gripper_action = stack_column([timestep["action"][self.gripper_key] for timestep in timesteps])
+            processed_batch["action"] = np.concatenate([arm_action, gripper_action], axis=1, dtype=self.action_dtype)
+
+        return processed_batch
 
     def forward(self, timestep):
         # Make Deep Copy #
@@ -49,7 +142,7 @@ class TimestepProcesser:
             robot_state = np.concatenate(robot_state)
 
         ### Get Extrinsics ###
-        calibration_dict = timestep["observation"]["camera_extrinsics"]
+        calibration_dict = timestep["observation"].get("camera_extrinsics", {})
         sorted_calibrated_ids = sorted(calibration_dict.keys())
         extrinsics_dict = defaultdict(list)
 
@@ -88,6 +181,9 @@ class TimestepProcesser:
         processed_timestep = {"observation": {"state": low_level_state, "camera": high_dim_state_dict}}
         self.image_transformer.forward(processed_timestep)
 
+        # Plain Dicts Can Be Pickled By Dataloader Workers #
+        processed_timestep["observation"]["camera"] = {k: dict(v) for k, v in high_dim_state_dict.items()}
+
         ### Add Proper Action ###
         if not self.ignore_action:
             arm_action = timestep["action"][self.action_space]
@@ -96,3 +192,16 @@ class TimestepProcesser:
             processed_timestep["action"] = action
 
         return processed_timestep
+
+
+def split_batch(batch, batch_size):
+    """Splits a batch from forward_batch into per timestep dicts. Arrays are views into the batch."""
+
+    def index_batch(data, index):
+        if isinstance(data, dict):
+            return {key: index_batch(value, index) for key, value in data.items()}
+        if isinstance(data, list):
+            return [value[index] for value in data]
+        return data[index]
+
+    return [index_batch(batch, i) for i in range(batch_size)]
@@ -7,6 +7,7 @@ import torch
 from r2d2.controllers.oculus_controller import VRPolicy
 from r2d2.evaluation.policy_wrapper import PolicyWrapper
 from r2d2.robot_env import RobotEnv
+from r2d2.training.checkpointing import load_policy
 from r2d2.user_interface.data_collector import DataCollecter
 from r2d2.user_interface.gui import RobotGUI
 
@@ -30,7 +31,7 @@ def eval_launcher(variant, run_id, exp_id):
     # Load Model + Variant #
     policy_logdir = os.path.join(dir_path, "../../training_logs", variant["policy_logdir"])
     policy_filepath = os.path.join(policy_logdir, "models", "{0}.pt".format(variant["model_id"]))
-    policy = torch.load(policy_filepath)
+    policy = load_policy(policy_filepath)
 
     variant_filepath = os.path.join(policy_logdir, "variant.json")
     with open(variant_filepath, "r") as jsonFile:
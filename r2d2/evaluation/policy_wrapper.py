@@ -1,6 +1,7 @@
 import numpy as np
 import torch
 
+from r2d2.data_processing.data_transforms import create_batch_augmenter
 from r2d2.data_processing.timestep_processing import TimestepProcesser
 
 
@@ -46,11 +47,14 @@ class PolicyWrapper:
         self.timestep_processor = TimestepProcesser(
             ignore_action=True, **timestep_filtering_kwargs, image_transform_kwargs=image_transform_kwargs
         )
+        self.batch_augmenter = create_batch_augmenter(image_transform_kwargs)
 
     def forward(self, observation):
         timestep = {"observation": observation}
         processed_timestep = self.timestep_processor.forward(timestep)
         torch_timestep = np_dict_to_torch_dict(processed_timestep)
+        if self.batch_augmenter is not None:
+            torch_timestep = self.batch_augmenter.forward(torch_timestep, augment=False)
         action = self.policy(torch_timestep)[0]
         np_action = action.detach().numpy()
 
@@ -7,6 +7,7 @@ import numpy as np
 from dateutil.relativedelta import relativedelta
 from scipy import stats
 
+from r2d2.data_loading.trajectory_index import TrajectoryIndex
 from r2d2.plotting.misc import *
 from r2d2.plotting.text import *
 
@@ -14,8 +15,25 @@ from r2d2.plotting.text import *
 num_demos = 0
 
 
-def data_crawler(dirname, func_list=None, ignore_failure=True):
+def data_crawler(dirname, func_list=None, ignore_failure=True, use_index=False):
     global num_demos
+
+    # Query The Metadata Index Instead Of Walking The Tree #
+    if use_index:
+        traj_index = TrajectoryIndex(dirname)
+        traj_index.refresh()
+        for folderpath in traj_index.query():
+            if ignore_failure and "failure" in folderpath:
+                continue
+            num_demos += 1
+            print("Num Demos:", num_demos)
+
+            traj_filepath = os.path.join(folderpath, "trajectory.h5")
+            for func in func_list:
+                with h5py.File(traj_filepath, "r") as hdf5_file:
+                    func(traj_filepath, hdf5_file=hdf5_file)
+        return
+
     subfolders = [f.path for f in os.scandir(dirname) if f.is_dir()]
     traj_files = [f.path for f in os.scandir(dirname) if (f.is_file() and "trajectory.h5" in f.path)]
     h5_file_exists = len(traj_files) == 1
@@ -30,8 +48,8 @@ def data_crawler(dirname, func_list=None, ignore_failure=True):
         print("Num Demos:", num_demos)
 
         for func in func_list:
-            hdf5_file = h5py.File(traj_files[0], "r")
-            func(traj_files[0], hdf5_file=hdf5_file)
+            with h5py.File(traj_files[0], "r") as hdf5_file:
+                func(traj_files[0], hdf5_file=hdf5_file)
 
     for child_dirname in subfolders:
         data_crawler(child_dirname, func_list=func_list, ignore_failure=ignore_failure)
@@ -0,0 +1,102 @@
+import glob
+import os
+import pickle
+
+import torch
+from torch import nn
+
+from r2d2.misc.subprocess_utils import run_threaded_command
+from r2d2.training.models.policy_network import ImagePolicy
+
+
+def snapshot_to_cpu(data):
+    # Copy Every Tensor, So Training Can Keep Updating The Originals #
+    if isinstance(data, dict):
+        return {key: snapshot_to_cpu(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return type(data)([snapshot_to_cpu(value) for value in data])
+    if torch.is_tensor(data):
+        return data.detach().to("cpu", copy=True)
+    return data
+
+
+def get_checkpoint_filepaths(checkpoint_dir):
+    # Checkpoints Are Named By Epoch, Oldest First #
+    filepaths = glob.glob(os.path.join(checkpoint_dir, "*.pt"))
+    filepaths = [f for f in filepaths if os.path.basename(f)[:-3].isdigit()]
+    return sorted(filepaths, key=lambda f: int(os.path.basename(f)[:-3]))
+
+
+def get_latest_checkpoint(checkpoint_dir):
+    filepaths = get_checkpoint_filepaths(checkpoint_dir)
+    if not len(filepaths):
+        return None
+    return filepaths[-1]
+
+
+def load_checkpoint(filepath, map_location="cpu"):
+    try:
+        return torch.load(filepath, map_location=map_location, weights_only=True)
+    except pickle.UnpicklingError:
+        # Checkpoints Saved Before State Dicts Pickle The Whole Module #
+        return torch.load(filepath, map_location=map_location, weights_only=False)
+
+
+def load_policy(filepath, map_location="cpu"):
+    """Loads a policy from a state dict checkpoint, or from an older checkpoint of the pickled module."""
+    checkpoint = load_checkpoint(filepath, map_location=map_location)
+    if isinstance(checkpoint, nn.Module):
+        return checkpoint
+
+    policy = ImagePolicy(**checkpoint["model_kwargs"])
+    policy.initialize_from_shapes(checkpoint["input_shapes"], device=map_location)
+    policy.load_state_dict(checkpoint["model_state_dict"])
+    return policy
+
+
+class AsyncCheckpointer:
+    """Writes checkpoints on a background thread, from a CPU snapshot taken when save is called.
+    Only one write is in flight at a time, and only the newest keep_last checkpoints are kept (all if None)."""
+
+    def __init__(self, checkpoint_dir, keep_last=None):
+        assert (keep_last is None) or (keep_last > 0)
+        self.checkpoint_dir = checkpoint_dir
+        self.keep_last = keep_last
+        self._thread = None
+        self._error = None
+
+    def save(self, epoch, checkpoint):
+        # At Most One Snapshot Is Held In Memory #
+        self.wait()
+        snapshot = snapshot_to_cpu(checkpoint)
+
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        filepath = os.path.join(self.checkpoint_dir, str(epoch) + ".pt")
+        self._thread = run_threaded_command(self._write, args=(filepath, snapshot), daemon=False)
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        # Surface Errors From The Background Thread #
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _write(self, filepath, snapshot):
+        try:
+            # Write Then Rename, So A Crash Never Leaves A Partial Checkpoint #
+            temp_filepath = filepath + ".tmp"
+            torch.save(snapshot, temp_filepath)
+            os.replace(temp_filepath, filepath)
+            self._remove_old_checkpoints()
+        except Exception as error:
+            self._error = error
+
+    def _remove_old_checkpoints(self):
+        if self.keep_last is None:
+            return
+        filepaths = get_checkpoint_filepaths(self.checkpoint_dir)
+        for filepath in filepaths[: -self.keep_last]:
+            os.remove(filepath)
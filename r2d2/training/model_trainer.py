@@ -11,7 +11,10 @@ import torch
 import torch.optim as optim
 from tqdm import trange
 
+from r2d2.data_loading.batch_transfer import DevicePrefetcher, to_channels_last
 from r2d2.data_loading.data_loader import create_train_test_data_loader
+from r2d2.data_processing.data_transforms import create_batch_augmenter
+from r2d2.training.checkpointing import AsyncCheckpointer, get_latest_checkpoint, load_checkpoint
 from r2d2.training.models.policy_network import ImagePolicy
 
 
@@ -24,20 +27,26 @@ def exp_launcher(variant, run_id, exp_id):
 
     # Set Compute Mode #
     use_gpu = variant.get("use_gpu", False)
-    torch.device("cuda:0" if use_gpu else "cpu")
+    device = torch.device("cuda:0" if use_gpu else "cpu")
 
     # Prepare Dataset Generators #
     data_loader_kwargs = variant.get("data_loader_kwargs", {})
+    data_loader_kwargs.setdefault("pin_memory", use_gpu)
     data_processing_kwargs = variant.get("data_processing_kwargs", {})
     camera_kwargs = variant.get("camera_kwargs", {})
     train_dataloader, test_dataloader = create_train_test_data_loader(
-        data_loader_kwargs=data_loader_kwargs, data_processing_kwargs=data_processing_kwargs, camera_kwargs=camera_kwargs
+        data_loader_kwargs=data_loader_kwargs,
+        data_processing_kwargs=data_processing_kwargs,
+        camera_kwargs=camera_kwargs,
     )
 
+    # Augment Whole Batches After Collation, If Requested #
+    image_transform_kwargs = data_processing_kwargs.get("image_transform_kwargs", {})
+    batch_augmenter = create_batch_augmenter(image_transform_kwargs)
+
     # Create Model #
     model = ImagePolicy(**variant.get("model_kwargs", {}))
-    if use_gpu:
-        model.cuda()
+    model.to(device)
 
     # Create Trainer #
     trainer = ModelTrainer(
@@ -46,6 +55,8 @@ def exp_launcher(variant, run_id, exp_id):
         test_dataloader=test_dataloader,
         exp_name=variant["exp_name"],
         variant=variant,
+        batch_augmenter=batch_augmenter,
+        device=device,
         **variant.get("training_kwargs", {}),
     )
 
@@ -65,46 +76,130 @@ class ModelTrainer:
         weight_decay=0.0,
         lr=1e-3,
         grad_steps_per_epoch=1000,
+        batch_augmenter=None,
+        device="cpu",
+        num_prefetch=2,
+        precision="fp32",
+        channels_last=False,
+        compile_model=False,
+        keep_last_checkpoints=None,
+        resume_from=None,
     ):
         self.model = model
-        self.train_dataloader = iter(train_dataloader)
-        self.test_dataloader = iter(test_dataloader)
+        self.device = torch.device(device)
+
+        # Mixed Precision, Memory Format And Compilation Are Opt In #
+        assert precision in ["fp32", "bf16", "fp16"]
+        self.autocast_dtype = {"fp32": None, "bf16": torch.bfloat16, "fp16": torch.float16}[precision]
+        self.grad_scaler = torch.cuda.amp.GradScaler(enabled=(precision == "fp16") and (self.device.type == "cuda"))
+        self.channels_last = channels_last
+        self.compile_model = compile_model
+        self.compiled_model = None
+        self.model_prepared = False
+
+        # Load And Copy Upcoming Batches While The Current One Trains #
+        self.train_dataloader = DevicePrefetcher(iter(train_dataloader), self.device, num_prefetch=num_prefetch)
+        self.test_dataloader = DevicePrefetcher(iter(test_dataloader), self.device, num_prefetch=num_prefetch)
         self.optimizer = None
         self.grad_steps_per_epoch = grad_steps_per_epoch
         self.weight_decay = weight_decay
         self.num_epochs = num_epochs
         self.lr = lr
+        self.batch_augmenter = batch_augmenter
 
         self.persistent_statistics = defaultdict(list)
         self.eval_statistics = defaultdict(list)
         self.variant = variant
 
         dir_path = os.path.dirname(os.path.realpath(__file__))
-        self.log_dir = os.path.join(dir_path, "../../training_logs", exp_name)
+        self.log_dir = os.path.join(dir_path, "../../training_logs", exp_name, "")
+
+        # Checkpoints Are Written In The Background, And Training Can Resume From Them #
+        self.checkpointer = AsyncCheckpointer(os.path.join(self.log_dir, "models"), keep_last=keep_last_checkpoints)
+        self.resume_from = resume_from
+
+    def prepare_batch(self, batch):
+        if self.channels_last:
+            batch = to_channels_last(batch)
+        return batch
+
+    def prepare_model(self, batch):
+        # Networks Are Built Lazily From The First Batch #
+        if not self.model.network_initialized:
+            with torch.no_grad():
+                self.model.compute_loss(batch)
+        if self.channels_last:
+            self.model.to(memory_format=torch.channels_last)
+        if self.compile_model:
+            self.compiled_model = torch.compile(self.model)
+        self.model_prepared = True
+
+    def create_optimizer(self):
+        params = list(self.model.parameters())
+        self.optimizer = optim.Adam(params, lr=self.lr, weight_decay=self.weight_decay)
 
     def compute_loss(self, batch, test=False):
         prefix = "test-" if test else "train-"
-        loss = self.model.compute_loss(batch)
+        with torch.autocast(self.device.type, dtype=self.autocast_dtype, enabled=self.autocast_dtype is not None):
+            if self.compiled_model is not None:
+                loss = self.model.loss(self.compiled_model(batch), batch["action"])
+            else:
+                loss = self.model.compute_loss(batch)
         self.eval_statistics[prefix + "Loss"].append(loss.item())
         return loss
 
+    def get_checkpoint(self, epoch):
+        return {
+            "epoch": epoch,
+            "model_kwargs": self.variant.get("model_kwargs", {}),
+            "input_shapes": self.model.input_shapes,
+            "model_state_dict": self.model.state_dict(),
+            "optimizer_state_dict": self.optimizer.state_dict(),
+            "grad_scaler_state_dict": self.grad_scaler.state_dict(),
+            "persistent_statistics": {k: [float(v) for v in values] for k, values in self.persistent_statistics.items()},
+        }
+
     def save_policy(self, epoch):
-        path = os.path.join(self.log_dir, "models", str(epoch) + ".pt")
-        torch.save(self.model, path)
+        self.checkpointer.save(epoch, self.get_checkpoint(epoch))
+
+    def load_checkpoint(self, filepath):
+        if filepath == "latest":
+            filepath = get_latest_checkpoint(os.path.join(self.log_dir, "models"))
+        checkpoint = load_checkpoint(filepath)
+
+        # Rebuild Networks And Optimizer Before Loading Their State #
+        self.model.initialize_from_shapes(checkpoint["input_shapes"], device=self.device)
+        self.model.load_state_dict(checkpoint["model_state_dict"])
+        self.create_optimizer()
+        self.optimizer.load_state_dict(checkpoint["optimizer_state_dict"])
+        self.grad_scaler.load_state_dict(checkpoint["grad_scaler_state_dict"])
+        self.persistent_statistics = defaultdict(list, checkpoint["persistent_statistics"])
+
+        return checkpoint["epoch"]
 
     def train_batch(self, batch):
+        if self.batch_augmenter is not None:
+            batch = self.batch_augmenter.forward(batch)
+
+        batch = self.prepare_batch(batch)
+        if not self.model_prepared:
+            self.prepare_model(batch)
         if self.optimizer is None:
-            self.compute_loss(batch)
-            params = list(self.model.parameters())
-            self.optimizer = optim.Adam(params, lr=self.lr, weight_decay=self.weight_decay)
+            self.create_optimizer()
 
         self.optimizer.zero_grad()
         loss = self.compute_loss(batch)
 
-        loss.backward()
-        self.optimizer.step()
+        # Scaling Only Applies To fp16 #
+        self.grad_scaler.scale(loss).backward()
+        self.grad_scaler.step(self.optimizer)
+        self.grad_scaler.update()
 
     def test_batch(self, batch):
+        if self.batch_augmenter is not None:
+            batch = self.batch_augmenter.forward(batch, augment=False)
+        batch = self.prepare_batch(batch)
+
         self.compute_loss(batch, test=True)
 
     def train_epoch(self, epoch):
@@ -188,10 +283,17 @@ class ModelTrainer:
             plt.savefig(self.log_dir + "graphs/{0}.png".format(k))
 
     def train(self):
-        self.prepare_logdir()
+        start_epoch = 0
+        if self.resume_from is None:
+            self.prepare_logdir()
+        else:
+            start_epoch = self.load_checkpoint(self.resume_from) + 1
 
-        for epoch in range(self.num_epochs):
+        for epoch in range(start_epoch, self.num_epochs):
             self.test_epoch(epoch)
             self.train_epoch(epoch)
             self.save_policy(epoch)
             self.output_diagnostics(epoch)
+
+        # Finish Writing The Last Checkpoint #
+        self.checkpointer.wait()
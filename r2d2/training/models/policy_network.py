@@ -73,7 +73,23 @@ class Encoder(nn.Module):
 
         x = self._final_conv(x)
 
-        return x.view(batch_size, -1)
+        # Reshape Also Handles Channels Last Outputs #
+        return x.reshape(batch_size, -1)
+
+
+def create_dummy_timestep(input_shapes, device="cpu"):
+    # A Single Zero Timestep With The Recorded Input Shapes #
+    camera_dict = {
+        obs_type: {
+            cam_type: [torch.zeros(1, *shape, device=device) for shape in view_shapes]
+            for cam_type, view_shapes in cam_type_dict.items()
+        }
+        for obs_type, cam_type_dict in input_shapes["camera"].items()
+    }
+    return {
+        "observation": {"state": torch.zeros(1, input_shapes["state"], device=device), "camera": camera_dict},
+        "action": torch.zeros(1, input_shapes["action"], device=device),
+    }
 
 
 class ImagePolicy(nn.Module):
@@ -90,6 +106,7 @@ class ImagePolicy(nn.Module):
         num_state_hidden=400,
         num_policy_layers=4,
         num_policy_hidden=400,
+        stack_camera_views=False,
     ):
         super(ImagePolicy, self).__init__()
 
@@ -109,9 +126,23 @@ class ImagePolicy(nn.Module):
         self.num_policy_layers = num_policy_layers
         self.num_policy_hidden = num_policy_hidden
 
+        # Encode Every View Of A Camera Type In One Pass #
+        self.stack_camera_views = stack_camera_views
+
         self.network_initialized = False
+        self.input_shapes = None
         self.loss = nn.HuberLoss()
 
+    def __setstate__(self, state):
+        # Models Pickled Before Stacked Encoding Existed Encode Views One At A Time #
+        state.setdefault("stack_camera_views", False)
+        state.setdefault("input_shapes", None)
+        super(ImagePolicy, self).__setstate__(state)
+
+    def initialize_from_shapes(self, input_shapes, device="cpu"):
+        # Rebuild Lazily Created Networks, So A State Dict Can Be Loaded #
+        self.initialize_networks(create_dummy_timestep(input_shapes, device=device))
+
     def create_camera_encoder(self, input_dim):
         network = nn.ModuleList([])
 
@@ -164,6 +195,12 @@ class ImagePolicy(nn.Module):
         state = timestep["observation"]["state"]
         actions = timestep["action"]
 
+        # Record Input Shapes, So The Networks Can Be Rebuilt Without Data #
+        camera_shapes = {}
+        for obs_type, cam_dict in camera_dict.items():
+            camera_shapes[obs_type] = {k: [list(data.shape[1:]) for data in v] for k, v in cam_dict.items()}
+        self.input_shapes = {"camera": camera_shapes, "state": state.shape[1], "action": actions.shape[1]}
+
         # Create High Dimensional Networks #
         self.camera_encoder_dict = nn.ModuleDict({})
         for obs_type in camera_dict:
@@ -184,12 +221,16 @@ class ImagePolicy(nn.Module):
         )
         self.state_encoder_network = nn.Sequential(*state_encoder_network)
 
+        # Networks Are Created Lazily, So Match The Device Of The Data #
+        self.camera_encoder_dict.to(state.device)
+        self.state_encoder_network.to(state.device)
+
         # Create Policy Network #
         latent = self.encode_timestep(timestep)
         policy_network = self.create_fully_connected(
             latent.shape[1], actions.shape[1], self.num_policy_layers, self.num_policy_hidden, output_activation=nn.Tanh
         )
-        self.policy_network = nn.Sequential(*policy_network)
+        self.policy_network = nn.Sequential(*policy_network).to(state.device)
 
         # Mark As Initialized #
         self.network_initialized = True
@@ -206,7 +247,7 @@ class ImagePolicy(nn.Module):
         # Process Timestep #
         camera_dict = timestep["observation"]["camera"]
         state = timestep["observation"]["state"]
-        state.shape[0]
+        batch_size = state.shape[0]
         latent_list = []
 
         # Encode State Observations #
@@ -226,15 +267,14 @@ class ImagePolicy(nn.Module):
                 obs_list = camera_dict[obs_type][cam_type]
                 network = self.camera_encoder_dict[obs_type][cam_type]
 
-                # Method 1 #
-                encodings = [network(data) for data in obs_list]
-                curr_camera_latent = torch.cat(encodings, dim=1)
-
-                # # # Method 2 #
-
-                # stacked_obs = torch.cat(obs_list, dim=0)
-                # stacked_latent = network(stacked_obs)
-                # curr_high_dim_latent_2 = stacked_latent.reshape(batch_size, -1)
+                if self.stack_camera_views:
+                    # Views Are Stacked Along The Batch, Then Moved Back Side By Side #
+                    stacked_latent = network(torch.cat(obs_list, dim=0))
+                    stacked_latent = stacked_latent.view(len(obs_list), batch_size, -1).transpose(0, 1)
+                    curr_camera_latent = stacked_latent.reshape(batch_size, -1)
+                else:
+                    encodings = [network(data) for data in obs_list]
+                    curr_camera_latent = torch.cat(encodings, dim=1)
 
                 obs_type_latent.append(curr_camera_latent)
 
@@ -12,7 +12,7 @@ from r2d2.camera_utils.wrappers.recorded_multi_camera_wrapper import RecordedMul
 from r2d2.misc.parameters import *
 from r2d2.misc.time import time_ms
 from r2d2.misc.transformations import change_pose_frame
-from r2d2.trajectory_utils.trajectory_reader import TrajectoryReader
+from r2d2.trajectory_utils.trajectory_reader import TrajectoryReader, index_nested_dict
 from r2d2.trajectory_utils.trajectory_writer import TrajectoryWriter
 
 
@@ -324,51 +324,64 @@ def load_trajectory(
     remove_skipped_steps=False,
     num_samples_per_traj=None,
     num_samples_per_traj_coeff=1.5,
+    cache_index=False,
+    keys=None,
+    parallel_cameras=False,
+    frameskip=1,
 ):
     read_hdf5_images = read_cameras and (recording_folderpath is None)
     read_recording_folderpath = read_cameras and (recording_folderpath is not None)
 
-    traj_reader = TrajectoryReader(filepath, read_images=read_hdf5_images)
+    traj_reader = TrajectoryReader(filepath, read_images=read_hdf5_images, cache_index=cache_index)
     if read_recording_folderpath:
-        camera_reader = RecordedMultiCameraWrapper(recording_folderpath, camera_kwargs)
+        camera_reader = RecordedMultiCameraWrapper(recording_folderpath, camera_kwargs, parallel=parallel_cameras)
 
     horizon = traj_reader.length()
     timestep_list = []
 
     # Choose Timesteps To Save #
+    candidate_indices = np.arange(0, horizon, frameskip)
     if num_samples_per_traj:
         num_to_save = num_samples_per_traj
         if remove_skipped_steps:
             num_to_save = int(num_to_save * num_samples_per_traj_coeff)
-        max_size = min(num_to_save, horizon)
-        indices_to_save = np.sort(np.random.choice(horizon, size=max_size, replace=False))
+        max_size = min(num_to_save, len(candidate_indices))
+        indices_to_save = np.sort(np.random.choice(candidate_indices, size=max_size, replace=False))
     else:
-        indices_to_save = np.arange(horizon)
+        indices_to_save = candidate_indices
+
+    # Load Low Dimensional Data #
+    if (keys is not None) and read_recording_folderpath:
+        keys = [*keys, "observation/camera_type", "observation/timestamp/cameras"]
+    traj_columns = traj_reader.read_all(keys=keys, optional_keys=["observation/controller_info"])
+
+    # If Applicable, Get Recorded Data #
+    if read_recording_folderpath and len(indices_to_save):
+        obs_columns = traj_columns.columns["observation"]
+        timestamp_dict = {k: v[indices_to_save] for k, v in obs_columns["timestamp"]["cameras"].items()}
+        camera_type_dict = {k: camera_type_to_string_dict[v[0]] for k, v in obs_columns["camera_type"].items()}
+        camera_obs = camera_reader.read_frames(
+            indices_to_save, camera_type_dict=camera_type_dict, timestamp_dict=timestamp_dict
+        )
+
+        # Stop At First Failed Read #
+        if camera_obs is None:
+            indices_to_save = indices_to_save[:0]
+        else:
+            num_frames = [len(data) for obs in camera_obs.values() for data in obs.values()]
+            indices_to_save = indices_to_save[: min(num_frames, default=len(indices_to_save))]
 
     # Iterate Over Trajectory #
-    for i in indices_to_save:
+    for n, i in enumerate(indices_to_save):
         # Get HDF5 Data #
-        timestep = traj_reader.read_timestep(index=i)
+        timestep = traj_columns[i]
 
-        # If Applicable, Get Recorded Data #
+        # Add Recorded Data To Timestep #
         if read_recording_folderpath:
-            timestamp_dict = timestep["observation"]["timestamp"]["cameras"]
-            camera_type_dict = {
-                k: camera_type_to_string_dict[v] for k, v in timestep["observation"]["camera_type"].items()
-            }
-            camera_obs = camera_reader.read_cameras(
-                index=i, camera_type_dict=camera_type_dict, timestamp_dict=timestamp_dict
-            )
-            camera_failed = camera_obs is None
-
-            # Add Data To Timestep If Successful #
-            if camera_failed:
-                break
-            else:
-                timestep["observation"].update(camera_obs)
+            timestep["observation"].update(index_nested_dict(camera_obs, n))
 
         # Filter Steps #
-        step_skipped = not timestep["observation"]["controller_info"].get("movement_enabled", True)
+        step_skipped = not timestep["observation"].get("controller_info", {}).get("movement_enabled", True)
         delete_skipped_step = step_skipped and remove_skipped_steps
 
         # Save Filtered Timesteps #
@@ -392,6 +405,59 @@ def load_trajectory(
     return timestep_list
 
 
+def iterate_trajectory(
+    filepath,
+    recording_folderpath=None,
+    camera_kwargs={},
+    keys=None,
+    frameskip=1,
+    cache_index=False,
+    read_ahead=8,
+    optional_keys=[],
+):
+    """Yields every frameskip-th timestep of a trajectory, in the format returned by load_trajectory.
+    Each camera decodes up to read_ahead frames ahead in its own thread, so memory stays bounded by read_ahead
+    instead of the trajectory length. Stops at the first failed camera read. Missing keys raise a KeyError, while
+    missing optional_keys are skipped."""
+
+    read_recording_folderpath = recording_folderpath is not None
+    traj_reader = TrajectoryReader(filepath, read_images=False, cache_index=cache_index)
+    if read_recording_folderpath:
+        camera_reader = RecordedMultiCameraWrapper(recording_folderpath, camera_kwargs, read_ahead=read_ahead)
+
+    indices = np.arange(0, traj_reader.length(), frameskip)
+
+    # Load Low Dimensional Data #
+    if (keys is not None) and read_recording_folderpath:
+        keys = [*keys, "observation/camera_type", "observation/timestamp/cameras"]
+    traj_columns = traj_reader.read_all(keys=keys, optional_keys=optional_keys)
+
+    try:
+        if not read_recording_folderpath:
+            for i in indices:
+                yield traj_columns[i]
+            return
+
+        # Decode Recorded Data In The Background #
+        obs_columns = traj_columns.columns["observation"]
+        timestamp_dict = {k: v[indices] for k, v in obs_columns["timestamp"]["cameras"].items()}
+        camera_type_dict = {k: camera_type_to_string_dict[v[0]] for k, v in obs_columns["camera_type"].items()}
+        camera_iterator = camera_reader.iterate_cameras(
+            indices, camera_type_dict=camera_type_dict, timestamp_dict=timestamp_dict
+        )
+
+        for i, camera_obs in zip(indices, camera_iterator):
+            timestep = traj_columns[i]
+            timestep["observation"].update(camera_obs)
+            yield timestep
+
+    # Close Readers #
+    finally:
+        traj_reader.close()
+        if read_recording_folderpath:
+            camera_reader.disable_cameras()
+
+
 def visualize_timestep(timestep, max_width=1000, max_height=500, aspect_ratio=1.5, pause_time=15):
     # Process Image Data #
     obs = timestep["observation"]
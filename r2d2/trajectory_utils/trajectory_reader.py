@@ -1,3 +1,5 @@
+import json
+import os
 import tempfile
 
 import h5py
@@ -57,18 +59,172 @@ def load_hdf5_to_dict(hdf5_file, index, keys_to_ignore=[]):
     return data_dict
 
 
+def build_hdf5_index(hdf5_file):
+    hdf5_index = []
+
+    def add_entry(path, obj):
+        if isinstance(obj, h5py.Group):
+            hdf5_index.append({"path": path, "group": True})
+        elif isinstance(obj, h5py.Dataset):
+            hdf5_index.append({"path": path, "group": False, "dtype": obj.dtype.str, "shape": list(obj.shape)})
+        else:
+            raise ValueError
+
+    hdf5_file.visititems(add_entry)
+    return hdf5_index
+
+
+def get_index_length(hdf5_index, keys_to_ignore=[]):
+    length = None
+
+    for entry in hdf5_index:
+        if entry["group"] or any(key in keys_to_ignore for key in entry["path"].split("/")):
+            continue
+
+        curr_length = entry["shape"][0]
+        if length is None:
+            length = curr_length
+        assert curr_length == length
+
+    return length
+
+
+def get_index_filepath(filepath):
+    return filepath[:-3] + "_index.json"
+
+
+def load_hdf5_index(filepath, hdf5_file, cache_index=False):
+    # Try Loading Sidecar #
+    index_filepath = get_index_filepath(filepath)
+    file_stats = os.stat(filepath)
+    file_info = {"mtime_ns": file_stats.st_mtime_ns, "size": file_stats.st_size}
+
+    if cache_index and os.path.isfile(index_filepath):
+        try:
+            with open(index_filepath, "r") as jsonFile:
+                cached_index = json.load(jsonFile)
+            if cached_index["file_info"] == file_info:
+                return cached_index["index"]
+        except (ValueError, KeyError):
+            pass
+
+    # Walk HDF5 Tree #
+    hdf5_index = build_hdf5_index(hdf5_file)
+
+    # Persist Sidecar, Writing Then Renaming So Readers Never See A Partial File #
+    if cache_index:
+        temp_filepath = None
+        try:
+            temp_fd, temp_filepath = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(filepath)))
+            with os.fdopen(temp_fd, "w") as jsonFile:
+                json.dump({"file_info": file_info, "index": hdf5_index}, jsonFile)
+            os.replace(temp_filepath, index_filepath)
+        except OSError:
+            if (temp_filepath is not None) and os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+
+    return hdf5_index
+
+
+def index_nested_dict(data_dict, index):
+    return {
+        key: index_nested_dict(value, index) if isinstance(value, dict) else value[index]
+        for key, value in data_dict.items()
+    }
+
+
+class TrajectoryColumns:
+    """Lazy per-timestep view over trajectory data loaded as one contiguous array per dataset.
+
+    Indexing returns a timestep dict in the same format as TrajectoryReader.read_timestep. Array entries are views
+    into the shared columns, so copy them before modifying in place.
+    """
+
+    def __init__(self, columns, length):
+        self.columns = columns
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._length
+        if not (0 <= index < self._length):
+            raise IndexError
+        return index_nested_dict(self.columns, index)
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self[i]
+
+
 class TrajectoryReader:
-    def __init__(self, filepath, read_images=True):
+    def __init__(self, filepath, read_images=True, cache_index=False):
+        self._filepath = filepath
         self._hdf5_file = h5py.File(filepath, "r")
         is_video_folder = "observations/videos" in self._hdf5_file
         self._read_images = read_images and is_video_folder
-        self._length = get_hdf5_length(self._hdf5_file)
+        self._hdf5_index = load_hdf5_index(filepath, self._hdf5_file, cache_index=cache_index)
+        self._length = get_index_length(self._hdf5_index, keys_to_ignore=["videos"])
+        self._selected_entries = {}
+        self._datasets = {}
         self._video_readers = {}
         self._index = 0
 
     def length(self):
         return self._length
 
+    def get_index(self):
+        return self._hdf5_index
+
+    def _select_entries(self, keys=None, keys_to_ignore=[], optional_keys=[]):
+        cache_key = (None if keys is None else tuple(keys), tuple(keys_to_ignore), tuple(optional_keys))
+        if cache_key in self._selected_entries:
+            return self._selected_entries[cache_key]
+
+        # Requested Keys Must Exist, Optional Keys Are Read When Present #
+        selected_keys = None if keys is None else [key.strip("/") + "/" for key in [*keys, *optional_keys]]
+        found_keys = set()
+
+        selected_entries = []
+        for entry in self._hdf5_index:
+            path = entry["path"]
+            if any(key in keys_to_ignore for key in path.split("/")):
+                continue
+            if selected_keys is not None:
+                matching_keys = [key for key in selected_keys if (path + "/").startswith(key)]
+                if not len(matching_keys):
+                    continue
+                found_keys.update(matching_keys)
+            selected_entries.append((entry["group"], path.split("/"), path))
+
+        for key in keys or []:
+            if key.strip("/") + "/" not in found_keys:
+                raise KeyError("{0} not found in {1}".format(key, self._filepath))
+
+        self._selected_entries[cache_key] = selected_entries
+        return selected_entries
+
+    def _load_entries(self, index, keys=None, keys_to_ignore=[], optional_keys=[]):
+        data_dict = {}
+
+        selected_entries = self._select_entries(keys=keys, keys_to_ignore=keys_to_ignore, optional_keys=optional_keys)
+        for is_group, path_keys, path in selected_entries:
+            curr_dict = data_dict
+            for key in path_keys[:-1]:
+                curr_dict = curr_dict.setdefault(key, {})
+
+            if is_group:
+                curr_dict.setdefault(path_keys[-1], {})
+                continue
+
+            if path not in self._datasets:
+                self._datasets[path] = self._hdf5_file[path]
+            curr_dict[path_keys[-1]] = self._datasets[path][index]
+
+        return data_dict
+
     def read_timestep(self, index=None, keys_to_ignore=[]):
         # Make Sure We Read Within Range #
         if index is None:
@@ -80,7 +236,7 @@ class TrajectoryReader:
 
         # Load Low Dimensional Data #
         keys_to_ignore = [*keys_to_ignore.copy(), "videos"]
-        timestep = load_hdf5_to_dict(self._hdf5_file, self._index, keys_to_ignore=keys_to_ignore)
+        timestep = self._load_entries(self._index, keys_to_ignore=keys_to_ignore)
 
         # Load High Dimensional Data #
         if self._read_images:
@@ -93,6 +249,24 @@ class TrajectoryReader:
         # Return Timestep #
         return timestep
 
+    def read_slice(self, start=0, stop=None, keys=None, keys_to_ignore=[], optional_keys=[]):
+        # Make Sure We Read Within Range #
+        if stop is None:
+            stop = self._length
+        stop = min(stop, self._length)
+        assert 0 <= start <= stop
+
+        # Load Each Dataset In A Single Read #
+        keys_to_ignore = [*keys_to_ignore.copy(), "videos"]
+        columns = self._load_entries(
+            slice(start, stop), keys=keys, keys_to_ignore=keys_to_ignore, optional_keys=optional_keys
+        )
+
+        return TrajectoryColumns(columns, stop - start)
+
+    def read_all(self, keys=None, keys_to_ignore=[], optional_keys=[]):
+        return self.read_slice(keys=keys, keys_to_ignore=keys_to_ignore, optional_keys=optional_keys)
+
     def _uncompress_images(self):
         # WARNING: THIS FUNCTION HAS NOT BEEN TESTED. UNDEFINED BEHAVIOR FOR FAILED READING. #
         video_folder = self._hdf5_file["observations/videos"]
@@ -44,12 +44,116 @@ def write_dict_to_hdf5(hdf5_file, data_dict, keys_to_ignore=["image", "depth", "
         hdf5_file[key][-1] = curr_data
 
 
+class BufferedHDF5Writer:
+    """Accumulates timesteps in per-key NumPy buffers and flushes them to chunked datasets in blocks.
+
+    Produces the same group tree, dtypes and shapes as write_dict_to_hdf5, but grows each dataset
+    geometrically instead of resizing it on every timestep. Call close() to trim datasets to their true length.
+    """
+
+    def __init__(self, hdf5_file, buffer_size=64, growth_factor=2, keys_to_ignore=["image", "depth", "pointcloud"]):
+        assert buffer_size > 0 and growth_factor > 1
+        self._hdf5_file = hdf5_file
+        self._buffer_size = buffer_size
+        self._growth_factor = growth_factor
+        self._keys_to_ignore = keys_to_ignore
+
+        self._buffers = {}
+        self._num_buffered = {}
+        self._num_written = {}
+
+    def write(self, data_dict):
+        self._write_dict(self._hdf5_file, data_dict)
+
+    def _write_dict(self, hdf5_group, data_dict):
+        for key in data_dict.keys():
+            # Pass Over Specified Keys #
+            if key in self._keys_to_ignore:
+                continue
+
+            # Examine Data #
+            curr_data = data_dict[key]
+            if isinstance(curr_data, list):
+                curr_data = np.array(curr_data)
+
+            # Unwrap If Dictionary #
+            if isinstance(curr_data, dict):
+                if key not in hdf5_group:
+                    hdf5_group.create_group(key)
+                self._write_dict(hdf5_group[key], curr_data)
+                continue
+
+            # Make Room For Data #
+            path = hdf5_group.name.rstrip("/") + "/" + key
+            if path not in self._buffers:
+                self._create_buffer(path, curr_data)
+
+            # Save Data #
+            self._buffers[path][self._num_buffered[path]] = curr_data
+            self._num_buffered[path] += 1
+            if self._num_buffered[path] == self._buffer_size:
+                self._flush_buffer(path)
+
+    def _create_buffer(self, path, data):
+        if isinstance(data, np.ndarray):
+            dtype, dshape = data.dtype, data.shape
+        else:
+            dtype, dshape = np.dtype(type(data)), ()
+
+        # Strings Are Buffered As Objects And Stored With Variable Length #
+        buffer_dtype = dtype
+        if dtype.kind in ["U", "S"]:
+            dtype = h5py.string_dtype(encoding="utf-8" if dtype.kind == "U" else "ascii")
+            buffer_dtype = object
+
+        self._buffers[path] = np.empty((self._buffer_size, *dshape), dtype=buffer_dtype)
+        self._num_buffered[path] = 0
+        self._num_written[path] = 0
+
+        self._hdf5_file.create_dataset(
+            path,
+            (self._buffer_size, *dshape),
+            maxshape=(None, *dshape),
+            chunks=(self._buffer_size, *dshape),
+            dtype=dtype,
+        )
+
+    def _flush_buffer(self, path):
+        num_buffered = self._num_buffered[path]
+        if num_buffered == 0:
+            return
+
+        # Grow Dataset Geometrically #
+        dataset = self._hdf5_file[path]
+        start, end = self._num_written[path], self._num_written[path] + num_buffered
+        if end > dataset.shape[0]:
+            new_length = max(end, int(dataset.shape[0] * self._growth_factor))
+            dataset.resize(new_length, axis=0)
+
+        # Write Block #
+        dataset[start:end] = self._buffers[path][:num_buffered]
+        self._num_written[path] = end
+        self._num_buffered[path] = 0
+
+    def flush(self):
+        for path in self._buffers:
+            self._flush_buffer(path)
+
+    def close(self):
+        self.flush()
+
+        # Trim To True Length #
+        for path, length in self._num_written.items():
+            self._hdf5_file[path].resize(length, axis=0)
+
+
 class TrajectoryWriter:
-    def __init__(self, filepath, metadata=None, exists_ok=False, save_images=True):
+    def __init__(self, filepath, metadata=None, exists_ok=False, save_images=True, buffer_size=None):
         assert (not os.path.isfile(filepath)) or exists_ok
         self._filepath = filepath
         self._save_images = save_images
         self._hdf5_file = h5py.File(filepath, "w")
+        self._buffered_writer = None
         self._queue_dict = defaultdict(Queue)
         self._video_writers = {}
         self._video_files = {}
@@ -60,8 +164,14 @@ class TrajectoryWriter:
             self._update_metadata(metadata)
 
         # Start HDF5 Writer Thread #
-        def hdf5_writer(data):
-            return write_dict_to_hdf5(self._hdf5_file, data)
+        if buffer_size is None:
+
+            def hdf5_writer(data):
+                return write_dict_to_hdf5(self._hdf5_file, data)
+
+        else:
+            self._buffered_writer = BufferedHDF5Writer(self._hdf5_file, buffer_size=buffer_size)
+            hdf5_writer = self._buffered_writer.write
 
         run_threaded_command(self._write_from_queue, args=(hdf5_writer, self._queue_dict["hdf5"]))
 
@@ -117,6 +227,10 @@ class TrajectoryWriter:
         # Finish Remaining Jobs #
         [queue.join() for queue in self._queue_dict.values()]
 
+        # Flush Buffered Timesteps #
+        if self._buffered_writer is not None:
+            self._buffered_writer.close()
+
         # Close Video Writers #
         for video_id in self._video_writers:
             self._video_writers[video_id].close()
@@ -0,0 +1,110 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from r2d2.data_loading.batch_transfer import DevicePrefetcher, to_device
+
+
+def create_batch(batch_size, resolution, num_cameras):
+    width, height = resolution
+    return {
+        "observation": {
+            "state": torch.randn(batch_size, 22),
+            "camera": {
+                "image": {
+                    "hand_camera": [torch.rand(batch_size, 3, height, width) for _ in range(2)],
+                    "varied_camera": [torch.rand(batch_size, 3, height, width) for _ in range(2 * num_cameras)],
+                }
+            },
+        },
+        "action": torch.randn(batch_size, 7),
+    }
+
+
+def get_num_bytes(batch):
+    if isinstance(batch, dict):
+        return sum([get_num_bytes(value) for value in batch.values()])
+    if isinstance(batch, list):
+        return sum([get_num_bytes(value) for value in batch])
+    return batch.numel() * batch.element_size()
+
+
+def simulated_loader(batch, load_time):
+    # Stands In For Waiting On Dataloader Workers #
+    while True:
+        time.sleep(load_time)
+        yield batch
+
+
+def simulated_transfer(bandwidth_gbps):
+    # Stands In For A Host To Device Copy, Which Releases The GIL Like A Real One #
+    def transfer(batch, device):
+        batch = to_device(batch, device)
+        time.sleep(get_num_bytes(batch) / (bandwidth_gbps * 1e9))
+        return batch
+
+    return transfer
+
+
+def run_steps(iterator, num_steps, compute_time, transfer_func=None, device=None):
+    start_time = time.perf_counter()
+    for _ in range(num_steps):
+        batch = next(iterator)
+        if transfer_func is not None:
+            batch = transfer_func(batch, device)
+        time.sleep(compute_time)
+    return num_steps / (time.perf_counter() - start_time)
+
+
+def main(args):
+    device = torch.device("cpu")
+    batch = create_batch(args.batch_size, tuple(args.resolution), args.num_cameras)
+    transfer_func = simulated_transfer(args.bandwidth_gbps)
+    transfer_time = get_num_bytes(batch) / (args.bandwidth_gbps * 1e9)
+
+    sequential = run_steps(
+        simulated_loader(batch, args.load_time), args.num_steps, args.compute_time, transfer_func, device
+    )
+    prefetcher = DevicePrefetcher(
+        simulated_loader(batch, args.load_time), device, num_prefetch=args.num_prefetch, transfer_func=transfer_func
+    )
+    prefetched = run_steps(prefetcher, args.num_steps, args.compute_time)
+
+    # With Full Overlap, Each Step Takes As Long As The Slowest Stage #
+    ideal = 1 / max(args.compute_time, args.load_time + transfer_time)
+    print(
+        "Batch of {0:.1f} MB, load {1:.1f} ms, transfer {2:.1f} ms, compute {3:.1f} ms\n".format(
+            get_num_bytes(batch) / 1e6, 1000 * args.load_time, 1000 * transfer_time, 1000 * args.compute_time
+        )
+    )
+    print("{0:<20}{1:>20}".format("Mode", "Steps / sec"))
+    for name, steps_per_sec in [("Sequential", sequential), ("Prefetched", prefetched), ("Full overlap", ideal)]:
+        print("{0:<20}{1:>20.1f}".format(name, steps_per_sec))
+
+    # Real Copy, With Pinned Memory And Non Blocking Transfers #
+    if torch.cuda.is_available():
+        cuda_device = torch.device("cuda:0")
+        trial_times = []
+        for _ in range(args.num_steps):
+            start_time = time.perf_counter()
+            to_device(batch, cuda_device)
+            torch.cuda.synchronize()
+            trial_times.append(time.perf_counter() - start_time)
+        print("\nMeasured CUDA transfer: {0:.1f} ms".format(1000 * np.median(trial_times)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check that DevicePrefetcher overlaps loading and transfer with compute."
+    )
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--resolution", type=int, nargs=2, default=[128, 128])
+    parser.add_argument("--num_cameras", type=int, default=2)
+    parser.add_argument("--num_steps", type=int, default=50)
+    parser.add_argument("--num_prefetch", type=int, default=2)
+    parser.add_argument("--load_time", type=float, default=0.01)
+    parser.add_argument("--compute_time", type=float, default=0.02)
+    parser.add_argument("--bandwidth_gbps", type=float, default=2.0)
+    main(parser.parse_args())
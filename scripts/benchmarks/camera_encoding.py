@@ -0,0 +1,103 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from r2d2.training.models.policy_network import ImagePolicy
+
+# Model settings from scripts/training/train_policy.py #
+MODEL_KWARGS = dict(
+    representation_size=50,
+    embedding_dim=1,
+    num_encoder_hiddens=128,
+    num_residual_layers=3,
+    num_residual_hiddens=64,
+    num_camera_layers=1,
+    num_camera_hidden=200,
+    num_state_layers=1,
+    num_state_hidden=200,
+    num_policy_layers=3,
+    num_policy_hidden=300,
+)
+
+
+def create_batch(batch_size, resolution, num_views, device):
+    width, height = resolution
+    return {
+        "observation": {
+            "state": torch.randn(batch_size, 14, device=device),
+            "camera": {
+                "image": {
+                    "hand_camera": [torch.rand(batch_size, 3, height, width, device=device) for _ in range(num_views)]
+                }
+            },
+        },
+        "action": torch.randn(batch_size, 7, device=device),
+    }
+
+
+def time_function(model, batch, num_trials, device):
+    trial_times = []
+    with torch.no_grad():
+        for _ in range(num_trials):
+            start_time = time.perf_counter()
+            model.encode_timestep(batch)
+            if device.type == "cuda":
+                torch.cuda.synchronize()
+            trial_times.append(time.perf_counter() - start_time)
+    return batch["action"].shape[0] / np.array(trial_times)
+
+
+def count_conv_calls(model, batch):
+    num_calls = [0]
+    conv_layers = [module for module in model.modules() if isinstance(module, torch.nn.Conv2d)]
+    handles = [
+        layer.register_forward_hook(lambda *_: num_calls.__setitem__(0, num_calls[0] + 1)) for layer in conv_layers
+    ]
+    with torch.no_grad():
+        model.encode_timestep(batch)
+    [handle.remove() for handle in handles]
+    return num_calls[0]
+
+
+def main(args):
+    device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+    batch = create_batch(args.batch_size, tuple(args.resolution), args.num_views, device)
+
+    # Both Modes Share The Same Weights #
+    model = ImagePolicy(**MODEL_KWARGS)
+    model.initialize_networks(batch)
+    model.to(device).eval()
+
+    with torch.no_grad():
+        per_view_latent = model.encode_timestep(batch)
+        model.stack_camera_views = True
+        stacked_latent = model.encode_timestep(batch)
+    max_error = (per_view_latent - stacked_latent).abs().max().item()
+
+    results, conv_calls = {}, {}
+    for stack_camera_views in [False, True]:
+        model.stack_camera_views = stack_camera_views
+        name = "stack_camera_views={0}".format(stack_camera_views)
+        conv_calls[name] = count_conv_calls(model, batch)
+        results[name] = time_function(model, batch, args.num_trials, device)
+
+    print("{0} views per camera at {1}x{2} on {3}".format(args.num_views, *args.resolution, device.type))
+    print("Max absolute latent difference: {0:.2e}\n".format(max_error))
+    print("{0:<30}{1:>15}{2:>20}{3:>15}".format("Mode", "Conv Calls", "Mean Samples / sec", "Std"))
+    for name, samples_per_sec in results.items():
+        print(
+            "{0:<30}{1:>15}{2:>20.1f}{3:>15.1f}".format(
+                name, conv_calls[name], samples_per_sec.mean(), samples_per_sec.std()
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-view and stacked camera encoding in ImagePolicy.")
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--num_views", type=int, default=2)
+    parser.add_argument("--num_trials", type=int, default=10)
+    parser.add_argument("--resolution", type=int, nargs=2, default=[128, 128])
+    main(parser.parse_args())
@@ -0,0 +1,110 @@
+import argparse
+import os
+import tempfile
+import time
+from functools import partial
+
+import numpy as np
+from synthetic_data import CAMERA_TYPES, create_recordings
+
+from r2d2.camera_utils.info import camera_type_to_string_dict
+from r2d2.camera_utils.wrappers.recorded_multi_camera_wrapper import RecordedMultiCameraWrapper
+
+
+def read_sparse_samples(recording_folderpath, indices, camera_kwargs, use_keyframes=True):
+    camera_reader = RecordedMultiCameraWrapper(recording_folderpath, camera_kwargs)
+    if not use_keyframes:
+        for camera in camera_reader.camera_dict.values():
+            camera._keyframes = None
+
+    camera_type_dict = {k: camera_type_to_string_dict[v] for k, v in CAMERA_TYPES.items()}
+    samples = []
+    for i in indices:
+        timestamp_dict = {cam_id + "_frame_received": 1000 * i + 66 for cam_id in CAMERA_TYPES}
+        camera_obs = camera_reader.read_cameras(
+            index=i, camera_type_dict=camera_type_dict, timestamp_dict=timestamp_dict
+        )
+        assert camera_obs is not None
+        samples.append(camera_obs)
+
+    camera_reader.disable_cameras()
+    return samples
+
+
+def read_batched_samples(recording_folderpath, indices, camera_kwargs, parallel=False):
+    camera_reader = RecordedMultiCameraWrapper(recording_folderpath, camera_kwargs, parallel=parallel)
+    camera_type_dict = {k: camera_type_to_string_dict[v] for k, v in CAMERA_TYPES.items()}
+    timestamp_dict = {cam_id + "_frame_received": 1000 * np.asarray(indices) + 66 for cam_id in CAMERA_TYPES}
+    camera_obs = camera_reader.read_frames(indices, camera_type_dict=camera_type_dict, timestamp_dict=timestamp_dict)
+    camera_reader.disable_cameras()
+    return camera_obs
+
+
+def iterate_samples(recording_folderpath, indices, camera_kwargs):
+    camera_reader = RecordedMultiCameraWrapper(recording_folderpath, camera_kwargs)
+    camera_type_dict = {k: camera_type_to_string_dict[v] for k, v in CAMERA_TYPES.items()}
+    timestamp_dict = {cam_id + "_frame_received": 1000 * np.asarray(indices) + 66 for cam_id in CAMERA_TYPES}
+    samples = list(camera_reader.iterate_cameras(indices, camera_type_dict, timestamp_dict))
+    assert len(samples) == len(indices)
+    camera_reader.disable_cameras()
+    return samples
+
+
+def main(args):
+    camera_kwargs = {
+        cam_type: dict(image=True, concatenate_images=False, resolution=(128, 128), resize_func="cv2")
+        for cam_type in camera_type_to_string_dict.values()
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        recording_folderpath = os.path.join(tmp_dir, "MP4")
+        create_recordings(recording_folderpath, args.horizon, resolution=tuple(args.resolution))
+
+        # Build Keyframe Indices Up Front #
+        read_sparse_samples(recording_folderpath, [0], camera_kwargs)
+
+        sample_funcs = {
+            "linear decode": partial(read_sparse_samples, use_keyframes=False),
+            "keyframe seek": read_sparse_samples,
+            "read_frames": read_batched_samples,
+            "read_frames (parallel)": partial(read_batched_samples, parallel=True),
+            "iterate_cameras": iterate_samples,
+        }
+
+        results = {}
+        for name, sample_func in sample_funcs.items():
+            trial_times = []
+            for _ in range(args.num_trials):
+                indices = np.sort(np.random.choice(args.horizon, size=args.num_samples, replace=False))
+                start_time = time.perf_counter()
+                sample_func(recording_folderpath, indices, camera_kwargs)
+                trial_times.append(time.perf_counter() - start_time)
+            results[name] = np.array(trial_times)
+
+        # Check Both Strategies Return The Same Frames #
+        indices = np.sort(np.random.choice(args.horizon, size=args.num_samples, replace=False))
+        linear_samples = read_sparse_samples(recording_folderpath, indices, camera_kwargs, use_keyframes=False)
+        samples = read_sparse_samples(recording_folderpath, indices, camera_kwargs)
+        batched_obs = read_batched_samples(recording_folderpath, indices, camera_kwargs, parallel=True)
+        iterated_samples = iterate_samples(recording_folderpath, indices, camera_kwargs)
+        for i, (linear_obs, obs) in enumerate(zip(linear_samples, samples)):
+            for full_cam_id in obs["image"]:
+                assert np.array_equal(linear_obs["image"][full_cam_id], obs["image"][full_cam_id])
+                assert np.array_equal(batched_obs["image"][full_cam_id][i], obs["image"][full_cam_id])
+                assert np.array_equal(iterated_samples[i]["image"][full_cam_id], obs["image"][full_cam_id])
+
+    print("{0} of {1} frames, {2} cameras, {3} trials\n".format(args.num_samples, args.horizon, 3, args.num_trials))
+    print("{0:<20}{1:>20}{2:>20}".format("Mode", "Time (s)", "Samples / sec"))
+    for name, trial_times in results.items():
+        print("{0:<20}{1:>20.3f}{2:>20.1f}".format(name, trial_times.mean(), args.num_samples / trial_times.mean()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare sparse-sample throughput of recorded camera reading strategies."
+    )
+    parser.add_argument("--horizon", type=int, default=300)
+    parser.add_argument("--num_samples", type=int, default=50)
+    parser.add_argument("--num_trials", type=int, default=3)
+    parser.add_argument("--resolution", type=int, nargs=2, default=[1280, 720])
+    main(parser.parse_args())
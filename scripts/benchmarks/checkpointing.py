@@ -0,0 +1,94 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import torch
+from camera_encoding import MODEL_KWARGS
+from training_modes import create_batch
+
+from r2d2.training.checkpointing import AsyncCheckpointer, load_policy
+from r2d2.training.models.policy_network import ImagePolicy
+
+
+def create_checkpoint(model, optimizer):
+    return {
+        "epoch": 0,
+        "model_kwargs": MODEL_KWARGS,
+        "input_shapes": model.input_shapes,
+        "model_state_dict": model.state_dict(),
+        "optimizer_state_dict": optimizer.state_dict(),
+    }
+
+
+def time_function(func, num_trials, setup=None):
+    times = []
+    for _ in range(num_trials):
+        if setup is not None:
+            setup()
+        start_time = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start_time)
+    return 1000 * np.mean(times)
+
+
+def main(args):
+    device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+    batch = create_batch(args.batch_size, tuple(args.resolution), device)
+
+    # One Training Step, So The Optimizer Has State To Save #
+    model = ImagePolicy(**MODEL_KWARGS).to(device)
+    model.compute_loss(batch)
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-4)
+    model.compute_loss(batch).backward()
+    optimizer.step()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        module_filepath = os.path.join(tmp_dir, "module.pt")
+        checkpointer = AsyncCheckpointer(tmp_dir, keep_last=2)
+
+        # Time Spent Blocking The Training Loop #
+        def save_module():
+            torch.save(model, module_filepath)
+
+        def save_async():
+            checkpointer.save(1, create_checkpoint(model, optimizer))
+
+        save_results = {
+            "torch.save(model)": time_function(save_module, args.num_trials),
+            # Previous Writes Finish Between Epochs, So They Are Not Timed #
+            "AsyncCheckpointer.save": time_function(save_async, args.num_trials, setup=checkpointer.wait),
+        }
+        checkpointer.wait()
+
+        # Time To Load A Policy #
+        checkpoint_filepath = os.path.join(tmp_dir, "1.pt")
+
+        def load_module():
+            torch.load(module_filepath, map_location="cpu", weights_only=False)
+
+        def load_state_dict():
+            load_policy(checkpoint_filepath)
+
+        load_results = {
+            "torch.load(model)": time_function(load_module, args.num_trials),
+            "load_policy(state_dict)": time_function(load_state_dict, args.num_trials),
+        }
+        file_sizes = [os.path.getsize(f) / 2**20 for f in [module_filepath, checkpoint_filepath]]
+
+    print("Module: {0:.1f} MB, State Dict Checkpoint (With Optimizer): {1:.1f} MB\n".format(*file_sizes))
+    print("{0:<30}{1:>20}".format("Save", "Blocking Time (ms)"))
+    for name, duration in save_results.items():
+        print("{0:<30}{1:>20.1f}".format(name, duration))
+    print("\n{0:<30}{1:>20}".format("Load", "Time (ms)"))
+    for name, duration in load_results.items():
+        print("{0:<30}{1:>20.1f}".format(name, duration))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare synchronous module saving with async state dict checkpoints.")
+    parser.add_argument("--batch_size", type=int, default=8)
+    parser.add_argument("--num_trials", type=int, default=5)
+    parser.add_argument("--resolution", type=int, nargs=2, default=[128, 128])
+    main(parser.parse_args())
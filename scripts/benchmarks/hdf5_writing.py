@@ -0,0 +1,81 @@
+import argparse
+import os
+import tempfile
+import time
+
+import h5py
+import numpy as np
+from synthetic_data import create_timestep
+
+from r2d2.trajectory_utils.trajectory_writer import BufferedHDF5Writer, write_dict_to_hdf5
+
+
+def time_writes(filepath, timesteps, buffer_size=None):
+    hdf5_file = h5py.File(filepath, "w")
+    if buffer_size is not None:
+        writer = BufferedHDF5Writer(hdf5_file, buffer_size=buffer_size)
+
+    step_times = []
+    for timestep in timesteps:
+        start_time = time.perf_counter()
+        if buffer_size is None:
+            write_dict_to_hdf5(hdf5_file, timestep)
+        else:
+            writer.write(timestep)
+        step_times.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    if buffer_size is not None:
+        writer.close()
+    hdf5_file.close()
+    close_time = time.perf_counter() - start_time
+
+    return np.array(step_times), close_time
+
+
+def assert_same_layout(filepath_a, filepath_b):
+    file_a, file_b = h5py.File(filepath_a, "r"), h5py.File(filepath_b, "r")
+    paths_a, paths_b = [], []
+    file_a.visit(paths_a.append)
+    file_b.visit(paths_b.append)
+    assert paths_a == paths_b
+
+    for path in paths_a:
+        if isinstance(file_a[path], h5py.Dataset):
+            assert file_a[path].shape == file_b[path].shape, path
+            assert file_a[path].dtype == file_b[path].dtype, path
+            assert np.array_equal(file_a[path][()], file_b[path][()]), path
+
+    file_a.close()
+    file_b.close()
+
+
+def main(args):
+    timesteps = [create_timestep(i) for i in range(args.horizon)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        baseline_filepath = os.path.join(tmp_dir, "baseline.h5")
+        step_times, close_time = time_writes(baseline_filepath, timesteps)
+        results = {"per-step resize": (step_times, close_time, os.path.getsize(baseline_filepath))}
+
+        for buffer_size in args.buffer_sizes:
+            filepath = os.path.join(tmp_dir, "buffered_{0}.h5".format(buffer_size))
+            step_times, close_time = time_writes(filepath, timesteps, buffer_size=buffer_size)
+            assert_same_layout(baseline_filepath, filepath)
+            results["buffered ({0})".format(buffer_size)] = (step_times, close_time, os.path.getsize(filepath))
+
+    print("Horizon: {0} timesteps\n".format(args.horizon))
+    print("{0:<20}{1:>14}{2:>14}{3:>14}{4:>14}".format("Mode", "Mean (ms)", "P99 (ms)", "Close (ms)", "Size (KB)"))
+    for name, (step_times, close_time, size) in results.items():
+        print(
+            "{0:<20}{1:>14.3f}{2:>14.3f}{3:>14.3f}{4:>14.1f}".format(
+                name, 1000 * step_times.mean(), 1000 * np.percentile(step_times, 99), 1000 * close_time, size / 1024
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-step HDF5 write latency of TrajectoryWriter modes.")
+    parser.add_argument("--horizon", type=int, default=300)
+    parser.add_argument("--buffer_sizes", type=int, nargs="+", default=[16, 64, 256])
+    main(parser.parse_args())
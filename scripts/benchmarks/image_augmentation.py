@@ -0,0 +1,61 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from r2d2.data_processing.data_transforms import BatchImageAugmenter, ImageTransformer
+
+
+def per_sample_augment(images, device):
+    transformer = ImageTransformer(remove_alpha=True, bgr_to_rgb=True, augment=True, to_tensor=True)
+    batch = torch.stack([transformer.composed_transforms(image) for image in images])
+    return batch.to(device)
+
+
+def batch_augment(images, device):
+    transformer = ImageTransformer(remove_alpha=True, bgr_to_rgb=True, augment="batch", to_tensor=True)
+    batch = torch.stack([transformer.composed_transforms(image) for image in images])
+    batch = {"observation": {"camera": {"image": {"hand_camera": [batch.to(device)]}}}}
+    return BatchImageAugmenter().forward(batch)["observation"]["camera"]["image"]["hand_camera"][0]
+
+
+def time_function(func, images, device, num_trials):
+    trial_times = []
+    for _ in range(num_trials):
+        start_time = time.perf_counter()
+        func(images, device)
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        trial_times.append(time.perf_counter() - start_time)
+    return len(images) / np.array(trial_times)
+
+
+def main(args):
+    width, height = args.resolution
+    images = [np.random.randint(256, size=(height, width, 4), dtype=np.uint8) for _ in range(args.batch_size)]
+
+    devices = [torch.device("cpu")]
+    if torch.cuda.is_available():
+        devices.append(torch.device("cuda:0"))
+
+    results = {}
+    for device in devices:
+        batch_augment(images, device)
+        results["AugMix per sample ({0})".format(device.type)] = time_function(
+            per_sample_augment, images, device, args.num_trials
+        )
+        results["Batched ({0})".format(device.type)] = time_function(batch_augment, images, device, args.num_trials)
+
+    print("Batches of {0} images at {1}x{2}\n".format(args.batch_size, width, height))
+    print("{0:<30}{1:>20}{2:>20}".format("Mode", "Mean Images / sec", "Std"))
+    for name, images_per_sec in results.items():
+        print("{0:<30}{1:>20.1f}{2:>20.1f}".format(name, images_per_sec.mean(), images_per_sec.std()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-sample AugMix with batched augmentation.")
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--num_trials", type=int, default=5)
+    parser.add_argument("--resolution", type=int, nargs=2, default=[128, 128])
+    main(parser.parse_args())
@@ -0,0 +1,117 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from copy import deepcopy
+
+import cv2
+import numpy as np
+from synthetic_data import create_recordings
+
+from r2d2.camera_utils.recording_readers.mp4_reader import MP4Reader
+from r2d2.data_processing.data_transforms import ImageTransformer
+
+# Hand camera settings from scripts/training/train_policy.py #
+CAMERA_KWARGS = dict(image=True, concatenate_images=False, resolution=(128, 128), resize_func="cv2")
+IMAGE_TRANSFORM_KWARGS = dict(remove_alpha=True, bgr_to_rgb=True, to_tensor=True, augment=False)
+
+MODES = {
+    "legacy (deepcopy)": (CAMERA_KWARGS, IMAGE_TRANSFORM_KWARGS),
+    "default spec": (CAMERA_KWARGS, IMAGE_TRANSFORM_KWARGS),
+    "fused spec": (
+        dict(**CAMERA_KWARGS, bgr_to_rgb=True, dtype="float32", channels_first=True),
+        dict(to_tensor=True, channels_first=True),
+    ),
+}
+
+SPLIT_MODES = ["copy", "zero copy", "preallocated"]
+
+
+def legacy_process_frame(reader, frame):
+    frame = deepcopy(frame)
+    if reader.resolution == (0, 0):
+        return frame
+    return reader.resize_func(frame, reader.resolution)
+
+
+def run_mode(filepath, mode, num_frames):
+    camera_kwargs, image_transform_kwargs = MODES[mode]
+    reader = MP4Reader(filepath, "13062452")
+    reader.set_reading_parameters(**camera_kwargs)
+    if mode.startswith("legacy"):
+        reader._read_into_buffer = lambda: reader._mp4_reader.read()
+        reader._process_frame = lambda frame: legacy_process_frame(reader, frame)
+    image_transformer = ImageTransformer(**image_transform_kwargs)
+
+    frame_times, peak_memory = [], []
+    for _ in range(num_frames):
+        tracemalloc.reset_peak()
+        baseline_memory = tracemalloc.get_traced_memory()[0]
+        start_time = time.perf_counter()
+
+        image_dict = reader.read_camera()["image"]
+        timestep = {"observation": {"camera": {"image": {"hand_camera": list(image_dict.values())}}}}
+        image_transformer.forward(timestep)
+
+        frame_times.append(time.perf_counter() - start_time)
+        peak_memory.append(tracemalloc.get_traced_memory()[1] - baseline_memory)
+        del image_dict, timestep
+
+    reader.disable_camera()
+    return np.array(frame_times), np.array(peak_memory)
+
+
+def run_split_mode(filepath, mode, num_frames):
+    reader = MP4Reader(filepath, "13062452")
+    reader.set_reading_parameters(zero_copy=(mode == "zero copy"))
+    out_dict = None
+
+    frame_times, peak_memory = [], []
+    for _ in range(num_frames):
+        tracemalloc.reset_peak()
+        baseline_memory = tracemalloc.get_traced_memory()[0]
+        start_time = time.perf_counter()
+
+        image_dict = reader.read_camera(out_dict=out_dict)["image"]
+        if mode == "preallocated":
+            out_dict = image_dict
+
+        frame_times.append(time.perf_counter() - start_time)
+        peak_memory.append(tracemalloc.get_traced_memory()[1] - baseline_memory)
+        del image_dict
+
+    reader.disable_camera()
+    return np.array(frame_times), np.array(peak_memory)
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        create_recordings(tmp_dir, args.num_frames, resolution=tuple(args.resolution))
+        filepath = os.path.join(tmp_dir, "13062452.mp4")
+
+        # Only Decoding Allocations Made Through NumPy / OpenCV Are Traced #
+        tracemalloc.start()
+        results = {mode: run_mode(filepath, mode, args.num_frames) for mode in MODES}
+        split_results = {mode: run_split_mode(filepath, mode, args.num_frames) for mode in SPLIT_MODES}
+        tracemalloc.stop()
+
+    print(
+        "{0} stereo frames at {1}x{2}, OpenCV threads: {3}\n".format(
+            args.num_frames, *args.resolution, cv2.getNumThreads()
+        )
+    )
+    print("{0:<22}{1:>18}{2:>22}".format("Mode", "Frames / sec", "Peak Alloc (MB)"))
+    for mode, (frame_times, peak_memory) in results.items():
+        print("{0:<22}{1:>18.1f}{2:>22.2f}".format(mode, 1 / frame_times.mean(), peak_memory.mean() / 2**20))
+
+    print("\n{0:<22}{1:>18}{2:>22}".format("Raw Stereo Split", "Frames / sec", "Peak Alloc (MB)"))
+    for mode, (frame_times, peak_memory) in split_results.items():
+        print("{0:<22}{1:>18.1f}{2:>22.2f}".format(mode, 1 / frame_times.mean(), peak_memory.mean() / 2**20))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare decode-time image processing against downstream transforms.")
+    parser.add_argument("--num_frames", type=int, default=100)
+    parser.add_argument("--resolution", type=int, nargs=2, default=[1280, 720])
+    main(parser.parse_args())
@@ -0,0 +1,80 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from synthetic_data import create_trajectory_folder
+
+from r2d2.data_loading.packed_dataset import PackedDataset, write_packed_dataset
+from r2d2.data_loading.trajectory_sampler import TrajectorySampler
+
+# Hand camera settings from scripts/training/train_policy.py #
+DATA_KWARGS = dict(
+    recording_prefix="MP4",
+    camera_kwargs=dict(
+        hand_camera=dict(image=True, concatenate_images=False, resolution=(128, 128), resize_func="cv2"),
+        varied_camera=dict(image=True, concatenate_images=False, resolution=(128, 128), resize_func="cv2"),
+    ),
+    timestep_filtering_kwargs=dict(
+        robot_state_keys=["cartesian_position", "gripper_position", "joint_positions"], camera_extrinsics=[]
+    ),
+    image_transform_kwargs=dict(remove_alpha=True, bgr_to_rgb=True, to_tensor=True),
+    traj_loading_kwargs=dict(remove_skipped_steps=True),
+)
+
+
+def sample_trajectories(folderpaths, num_samples):
+    traj_sampler = TrajectorySampler(folderpaths, **DATA_KWARGS)
+    samples_read = 0
+    while samples_read < num_samples:
+        samples_read += len(traj_sampler.fetch_samples())
+    return samples_read
+
+
+def sample_packed(dataset_path, num_samples):
+    dataset = PackedDataset(dataset_path, image_transform_kwargs=DATA_KWARGS["image_transform_kwargs"])
+    for index in np.random.randint(len(dataset), size=num_samples):
+        dataset[index]
+    return num_samples
+
+
+def time_function(func, *args):
+    start_time = time.perf_counter()
+    num_samples = func(*args)
+    return num_samples / (time.perf_counter() - start_time)
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        folderpaths = [os.path.join(tmp_dir, str(i)) for i in range(args.num_trajectories)]
+        for folderpath in folderpaths:
+            create_trajectory_folder(folderpath, args.horizon, resolution=tuple(args.resolution))
+
+        dataset_path = os.path.join(tmp_dir, "packed")
+        start_time = time.perf_counter()
+        write_packed_dataset(folderpaths, dataset_path, **DATA_KWARGS)
+        conversion_time = time.perf_counter() - start_time
+
+        results = {
+            "TrajectorySampler": time_function(sample_trajectories, folderpaths, args.num_samples),
+            "PackedDataset": time_function(sample_packed, dataset_path, args.num_samples),
+        }
+
+    print(
+        "{0} trajectories of {1} timesteps, conversion took {2:.1f}s\n".format(
+            args.num_trajectories, args.horizon, conversion_time
+        )
+    )
+    print("{0:<20}{1:>20}".format("Mode", "Samples / sec"))
+    for name, samples_per_sec in results.items():
+        print("{0:<20}{1:>20.1f}".format(name, samples_per_sec))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-sample throughput of packed shards and raw recordings.")
+    parser.add_argument("--num_trajectories", type=int, default=4)
+    parser.add_argument("--horizon", type=int, default=100)
+    parser.add_argument("--num_samples", type=int, default=1000)
+    parser.add_argument("--resolution", type=int, nargs=2, default=[1280, 720])
+    main(parser.parse_args())
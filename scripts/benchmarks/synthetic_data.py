@@ -0,0 +1,104 @@
+import json
+import os
+
+import cv2
+import h5py
+import numpy as np
+
+from r2d2.trajectory_utils.trajectory_writer import BufferedHDF5Writer, write_dict_to_hdf5
+
+CAMERA_TYPES = {"13062452": 0, "20521388": 1, "24259877": 1}
+
+
+def create_timestep(index, camera_types=CAMERA_TYPES):
+    """Mimics the ~80 leaf keys dumped by collect_trajectory (images excluded)."""
+    robot_state = {
+        "cartesian_position": np.random.randn(6),
+        "gripper_position": np.random.rand(),
+        "joint_positions": np.random.randn(7),
+        "joint_velocities": np.random.randn(7),
+        "joint_torques_computed": np.random.randn(7),
+        "prev_joint_torques_computed": np.random.randn(7),
+        "prev_joint_torques_computed_safened": np.random.randn(7),
+        "motor_torques_measured": np.random.randn(7),
+        "prev_controller_latency_ms": np.random.rand(),
+        "prev_command_successful": True,
+    }
+
+    camera_extrinsics, camera_timestamps = {}, {}
+    for serial_number in camera_types:
+        for side in ["left", "right"]:
+            camera_extrinsics[serial_number + "_" + side] = np.random.randn(6)
+        for name in ["estimated_capture", "frame_received", "read_start", "read_end"]:
+            camera_timestamps[serial_number + "_" + name] = 1000 * index + 66
+
+    observation = {
+        "robot_state": robot_state,
+        "camera_extrinsics": camera_extrinsics,
+        "camera_type": dict(camera_types),
+        "controller_info": {"controller_on": True, "failure": False, "movement_enabled": True, "success": False},
+        "timestamp": {
+            "cameras": camera_timestamps,
+            "control": {
+                k: 1000 * index for k in ["control_start", "policy_start", "sleep_start", "step_end", "step_start"]
+            },
+            "robot_state": {
+                k: 1000 * index for k in ["read_end", "read_start", "robot_timestamp_nanos", "robot_timestamp_seconds"]
+            },
+            "skip_action": False,
+        },
+    }
+
+    action = {
+        "cartesian_position": np.random.randn(6),
+        "cartesian_velocity": np.random.randn(6),
+        "gripper_position": np.random.rand(),
+        "gripper_velocity": np.random.rand(),
+        "joint_position": np.random.randn(7),
+        "joint_velocity": np.random.randn(7),
+        "target_cartesian_position": np.random.randn(6),
+        "target_gripper_position": np.random.rand(),
+        "robot_state": {k: v for k, v in robot_state.items() if "prev" not in k},
+    }
+
+    return {"observation": observation, "action": action}
+
+
+def create_trajectory_file(filepath, horizon, buffer_size=None):
+    hdf5_file = h5py.File(filepath, "w")
+
+    if buffer_size is None:
+        for i in range(horizon):
+            write_dict_to_hdf5(hdf5_file, create_timestep(i))
+    else:
+        writer = BufferedHDF5Writer(hdf5_file, buffer_size=buffer_size)
+        for i in range(horizon):
+            writer.write(create_timestep(i))
+        writer.close()
+
+    hdf5_file.close()
+
+
+def create_recordings(recording_folderpath, horizon, resolution=(1280, 720), camera_types=CAMERA_TYPES):
+    """Writes side-by-side stereo MP4s plus the matching _timestamps.json for every camera."""
+    os.makedirs(recording_folderpath, exist_ok=True)
+    width, height = resolution
+
+    for serial_number in camera_types:
+        filepath = os.path.join(recording_folderpath, serial_number + ".mp4")
+        writer = cv2.VideoWriter(filepath, cv2.VideoWriter_fourcc(*"mp4v"), 15, (2 * width, height))
+        for i in range(horizon):
+            frame = np.full((height, 2 * width, 3), (i * 7) % 255, dtype=np.uint8)
+            cv2.putText(frame, str(i), (50, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 4, (255, 255, 255), 8)
+            writer.write(frame)
+        writer.release()
+
+        timestamps = [1000 * i + 66 for i in range(horizon)]
+        with open(filepath[:-4] + "_timestamps.json", "w") as jsonFile:
+            json.dump(timestamps, jsonFile)
+
+
+def create_trajectory_folder(folderpath, horizon, resolution=(1280, 720), buffer_size=64):
+    os.makedirs(folderpath, exist_ok=True)
+    create_trajectory_file(os.path.join(folderpath, "trajectory.h5"), horizon, buffer_size=buffer_size)
+    create_recordings(os.path.join(folderpath, "recordings", "MP4"), horizon, resolution=resolution)
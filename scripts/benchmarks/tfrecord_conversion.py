@@ -0,0 +1,99 @@
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import tensorflow as tf
+from synthetic_data import create_trajectory_folder
+
+from r2d2.data_loading.tfrecord_writer import flatten, tensor_feature, write_trajectory_tfrecord
+from r2d2.trajectory_utils.misc import load_trajectory
+
+# Settings from scripts/convert/to_tfrecord.py #
+KEEP_KEYS = [
+    "action/cartesian_position",
+    "action/cartesian_velocity",
+    "action/gripper_position",
+    "action/gripper_velocity",
+    "action/target_cartesian_position",
+    "action/target_gripper_position",
+    "observation/image/24259877_left",
+    "observation/image/24259877_right",
+    "observation/image/13062452_left",
+    "observation/image/13062452_right",
+    "observation/image/20521388_left",
+    "observation/image/20521388_right",
+]
+IMAGE_SIZE = (180, 320)
+
+
+def write_eager(paths, output_path, frameskip):
+    # Previous Converter: Decode Everything At Full Resolution, Then Skip Frames And Resize #
+    with tf.io.TFRecordWriter(output_path) as writer:
+        for path in paths:
+            traj = load_trajectory(path + "/trajectory.h5", recording_folderpath=path + "/recordings/MP4")
+            traj_flat = [flatten(t) for t in traj[::frameskip]]
+
+            out = {}
+            for key in traj_flat[0].keys():
+                if key not in KEEP_KEYS:
+                    continue
+                if "image" in key:
+                    resized = [tf.image.resize(t[key], IMAGE_SIZE, method="bicubic") for t in traj_flat]
+                    out[key] = [tf.io.encode_jpeg(tf.cast(tf.round(image), tf.uint8)) for image in resized]
+                else:
+                    out[key] = [t[key] for t in traj_flat]
+            features = tf.train.Features(feature={k: tensor_feature(v) for k, v in out.items()})
+            writer.write(tf.train.Example(features=features).SerializeToString())
+
+
+def write_streaming(paths, output_path, frameskip):
+    write_trajectory_tfrecord(paths, output_path, keep_keys=KEEP_KEYS, image_size=IMAGE_SIZE, frameskip=frameskip)
+
+
+def run_converter(write_func, paths, output_path, frameskip):
+    # Each Converter Runs In Its Own Process, So Peak RSS Is Not Shared #
+    start_time = time.perf_counter()
+    write_func(paths, output_path, frameskip)
+    duration = time.perf_counter() - start_time
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+    return duration, peak_rss, os.path.getsize(output_path) / 2**20
+
+
+def main(args):
+    converters = {"load_trajectory": write_eager, "streaming": write_streaming}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = [os.path.join(tmp_dir, str(i)) for i in range(args.num_trajectories)]
+        for path in paths:
+            create_trajectory_folder(path, args.horizon, resolution=tuple(args.resolution))
+
+        results = {}
+        for name, write_func in converters.items():
+            output_path = os.path.join(tmp_dir, name + ".tfrecord")
+            with multiprocessing.get_context("fork").Pool(1) as pool:
+                results[name] = pool.apply(run_converter, (write_func, paths, output_path, args.frameskip))
+
+    print(
+        "{0} trajectories of {1} steps at {2}x{3}, frameskip {4}\n".format(
+            args.num_trajectories, args.horizon, *args.resolution, args.frameskip
+        )
+    )
+    print("{0:<20}{1:>20}{2:>18}{3:>16}".format("Converter", "Trajectories/Min", "Peak RSS (MB)", "Output (MB)"))
+    for name, (duration, peak_rss, output_size) in results.items():
+        print(
+            "{0:<20}{1:>20.1f}{2:>18.1f}{3:>16.1f}".format(
+                name, 60 * args.num_trajectories / duration, peak_rss, output_size
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare TFRecord conversion throughput and peak memory.")
+    parser.add_argument("--num_trajectories", type=int, default=4)
+    parser.add_argument("--horizon", type=int, default=200)
+    parser.add_argument("--frameskip", type=int, default=2)
+    parser.add_argument("--resolution", type=int, nargs=2, default=[1280, 720])
+    main(parser.parse_args())
@@ -0,0 +1,132 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from r2d2.data_loading.tf_data_loader import get_tf_dataloader
+from r2d2.data_loading.tfrecord_writer import (
+    get_feature_schema,
+    merge_manifests,
+    trajectory_example,
+    transition_examples,
+    write_manifest,
+)
+
+# Matches KEEP_KEYS in scripts/convert/to_tfrecord.py #
+LOW_DIM_SHAPES = {
+    "action/cartesian_position": (6,),
+    "action/cartesian_velocity": (6,),
+    "action/gripper_position": (),
+    "action/gripper_velocity": (),
+    "action/target_cartesian_position": (6,),
+    "action/target_gripper_position": (),
+}
+IMAGE_KEYS = ["observation/image/{0}".format(cam_id) for cam_id in ["24259877_left", "13062452_left", "20521388_left"]]
+
+
+def create_encoded_trajectory(horizon, image_size):
+    height, width = image_size
+    gradient = np.linspace(0, 255, width, dtype=np.uint8)[None, :, None]
+
+    encoded_timesteps = []
+    for i in range(horizon):
+        timestep = {key: np.random.randn(*shape) for key, shape in LOW_DIM_SHAPES.items()}
+        for key in IMAGE_KEYS:
+            image = np.broadcast_to(gradient + np.uint8(i % 256), (height, width, 3)).astype(np.uint8)
+            timestep[key] = tf.io.encode_jpeg(image)
+        encoded_timesteps.append(timestep)
+    return encoded_timesteps
+
+
+def write_dataset(path, trajectories, layout, feature_encoding, num_shards=4):
+    os.makedirs(path)
+    schema = get_feature_schema(trajectories[0][0])
+    native_schema = schema if feature_encoding == "native" else None
+
+    if layout == "trajectory":
+        examples = [trajectory_example(traj, schema=native_schema) for traj in trajectories]
+    else:
+        examples = [example for traj in trajectories for example in transition_examples(traj, schema=native_schema)]
+        np.random.shuffle(examples)
+
+    shards = {}
+    for i in range(num_shards):
+        shard_examples = examples[i::num_shards]
+        name = "{0}.tfrecord".format(i)
+        with tf.io.TFRecordWriter(os.path.join(path, name)) as writer:
+            for example in shard_examples:
+                writer.write(example.SerializeToString())
+        shards[name] = len(shard_examples)
+
+    manifest = merge_manifests(
+        [{"features": schema, "shards": shards}], layout=layout, window_size=None, feature_encoding=feature_encoding
+    )
+    write_manifest(path, manifest)
+
+
+def time_dataloader(path, batch_size, num_batches, num_warmup_batches=5, **loader_kwargs):
+    dataset = get_tf_dataloader(path, batch_size=batch_size, shuffle_buffer_size=1000, **loader_kwargs)
+    iterator = dataset.as_numpy_iterator()
+    for _ in range(num_warmup_batches):
+        next(iterator)
+
+    start_time = time.perf_counter()
+    for _ in range(num_batches):
+        next(iterator)
+    return num_batches * batch_size / (time.perf_counter() - start_time)
+
+
+def get_caching_modes(tmp_dir, image_size):
+    half_size = (image_size[0] // 2, image_size[1] // 2)
+    return {
+        "none": dict(),
+        "uint8 images": dict(normalize_images=False),
+        "decoded cache": dict(decoded_cache_path=os.path.join(tmp_dir, "full_cache")),
+        "decoded cache at half size": dict(decoded_cache_path=os.path.join(tmp_dir, "half_cache"), image_size=half_size),
+        "decoded cache at half size + uint8": dict(
+            decoded_cache_path=os.path.join(tmp_dir, "half_uint8_cache"), image_size=half_size, normalize_images=False
+        ),
+    }
+
+
+def main(args):
+    trajectories = [create_encoded_trajectory(args.horizon, args.image_size) for _ in range(args.num_trajectories)]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for layout in ["trajectory", "transition"]:
+            for feature_encoding in ["tensor", "native"]:
+                path = os.path.join(tmp_dir, layout + "_" + feature_encoding)
+                write_dataset(path, trajectories, layout, feature_encoding)
+                results[(layout, feature_encoding)] = time_dataloader(path, args.batch_size, args.num_batches)
+
+        # Time Later Epochs, Once The Decoded Cache Is Filled #
+        path = os.path.join(tmp_dir, "transition_native")
+        num_epoch_batches = args.num_trajectories * args.horizon // args.batch_size + 1
+        cache_results = {}
+        for name, loader_kwargs in get_caching_modes(tmp_dir, args.image_size).items():
+            num_warmup_batches = num_epoch_batches + 5 if "decoded_cache_path" in loader_kwargs else 5
+            cache_results[name] = time_dataloader(
+                path, args.batch_size, args.num_batches, num_warmup_batches=num_warmup_batches, **loader_kwargs
+            )
+
+    print("{0:<14}{1:<12}{2:>22}".format("Layout", "Features", "Transitions/Sec"))
+    for (layout, feature_encoding), throughput in results.items():
+        print("{0:<14}{1:<12}{2:>22.1f}".format(layout, feature_encoding, throughput))
+
+    print("\n{0:<36}{1:>22}".format("Caching (transition, native)", "Transitions/Sec"))
+    for name, throughput in cache_results.items():
+        print("{0:<36}{1:>22.1f}".format(name, throughput))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare TFRecord decoding paths and caching points.")
+    parser.add_argument("--num_trajectories", type=int, default=20)
+    parser.add_argument("--horizon", type=int, default=100)
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--num_batches", type=int, default=50)
+    parser.add_argument("--image_size", type=int, nargs=2, default=[180, 320])
+    main(parser.parse_args())
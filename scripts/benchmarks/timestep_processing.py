@@ -0,0 +1,85 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+from synthetic_data import CAMERA_TYPES, create_timestep
+
+from r2d2.data_processing.timestep_processing import TimestepProcesser, split_batch
+
+# Hand camera settings from scripts/training/train_policy.py #
+PROCESSER_KWARGS = dict(
+    action_space="cartesian_velocity",
+    robot_state_keys=["cartesian_position", "gripper_position", "joint_positions"],
+    camera_extrinsics=["hand_camera", "varied_camera"],
+    image_transform_kwargs=dict(remove_alpha=True, bgr_to_rgb=True, to_tensor=True),
+)
+
+
+def create_trajectory(horizon, resolution):
+    width, height = resolution
+    timesteps = []
+    for i in range(horizon):
+        timestep = create_timestep(i)
+        timestep["observation"]["image"] = {
+            serial_number + "_" + side: np.random.randint(256, size=(height, width, 4), dtype=np.uint8)
+            for serial_number in CAMERA_TYPES
+            for side in ["left", "right"]
+        }
+        timesteps.append(timestep)
+    return timesteps
+
+
+def per_timestep_forward(processer, timesteps):
+    return [processer.forward(t) for t in timesteps]
+
+
+def batch_forward(processer, timesteps):
+    return split_batch(processer.forward_batch(timesteps), len(timesteps))
+
+
+def assert_same_timesteps(timestep_a, timestep_b):
+    if isinstance(timestep_a, dict):
+        assert timestep_a.keys() == timestep_b.keys()
+        [assert_same_timesteps(timestep_a[key], timestep_b[key]) for key in timestep_a]
+    elif isinstance(timestep_a, list):
+        [assert_same_timesteps(a, b) for a, b in zip(timestep_a, timestep_b)]
+    elif torch.is_tensor(timestep_a):
+        assert torch.equal(timestep_a, timestep_b)
+    else:
+        assert np.array_equal(timestep_a, timestep_b)
+
+
+def time_function(func, processer, timesteps, num_trials):
+    trial_times = []
+    for _ in range(num_trials):
+        start_time = time.perf_counter()
+        func(processer, timesteps)
+        trial_times.append(time.perf_counter() - start_time)
+    return len(timesteps) / np.array(trial_times)
+
+
+def main(args):
+    timesteps = create_trajectory(args.horizon, tuple(args.resolution))
+    processer = TimestepProcesser(**PROCESSER_KWARGS)
+
+    for timestep_a, timestep_b in zip(per_timestep_forward(processer, timesteps), batch_forward(processer, timesteps)):
+        assert_same_timesteps(timestep_a, timestep_b)
+
+    results = {
+        "forward": time_function(per_timestep_forward, processer, timesteps, args.num_trials),
+        "forward_batch": time_function(batch_forward, processer, timesteps, args.num_trials),
+    }
+
+    print("{0} timesteps at {1}x{2}\n".format(args.horizon, *args.resolution))
+    print("{0:<20}{1:>20}{2:>20}".format("Mode", "Mean Samples / sec", "Std"))
+    for name, samples_per_sec in results.items():
+        print("{0:<20}{1:>20.1f}{2:>20.1f}".format(name, samples_per_sec.mean(), samples_per_sec.std()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-timestep and whole-trajectory timestep processing.")
+    parser.add_argument("--horizon", type=int, default=200)
+    parser.add_argument("--num_trials", type=int, default=5)
+    parser.add_argument("--resolution", type=int, nargs=2, default=[128, 128])
+    main(parser.parse_args())
@@ -0,0 +1,90 @@
+import argparse
+import multiprocessing
+import resource
+import time
+
+import numpy as np
+import torch
+from camera_encoding import MODEL_KWARGS
+
+from r2d2.training.model_trainer import ModelTrainer
+from r2d2.training.models.policy_network import ImagePolicy
+
+TRAINING_MODES = {
+    "fp32": dict(),
+    "bf16": dict(precision="bf16"),
+    "fp16": dict(precision="fp16"),
+    "channels_last": dict(channels_last=True),
+    "bf16 + channels_last": dict(precision="bf16", channels_last=True),
+    "compile": dict(compile_model=True),
+}
+
+
+def create_batch(batch_size, resolution, device):
+    width, height = resolution
+    return {
+        "observation": {
+            "state": torch.randn(batch_size, 14, device=device),
+            "camera": {"image": {"hand_camera": [torch.rand(batch_size, 3, height, width, device=device)] * 2}},
+        },
+        "action": torch.rand(batch_size, 7, device=device) * 2 - 1,
+    }
+
+
+def get_peak_memory_mb(device):
+    if device.type == "cuda":
+        return torch.cuda.max_memory_allocated(device) / 2**20
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+def run_mode(training_kwargs, args):
+    # Each Mode Runs In Its Own Process, So Peak Memory Is Not Shared #
+    torch.manual_seed(0)
+    device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+    batch = create_batch(args.batch_size, tuple(args.resolution), device)
+    start_memory = get_peak_memory_mb(device)
+
+    model = ImagePolicy(**MODEL_KWARGS, stack_camera_views=True).to(device)
+    trainer = ModelTrainer(model, iter([]), iter([]), "benchmark", {}, device=device, **training_kwargs)
+    for _ in range(args.num_warmup_steps):
+        trainer.train_batch(batch)
+
+    step_times = []
+    for _ in range(args.num_steps):
+        start_time = time.perf_counter()
+        trainer.train_batch(batch)
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        step_times.append(time.perf_counter() - start_time)
+
+    final_loss = np.mean(trainer.eval_statistics["train-Loss"][-args.num_steps :])
+    return np.array(step_times), get_peak_memory_mb(device) - start_memory, final_loss
+
+
+def main(args):
+    results = {}
+    for name, training_kwargs in TRAINING_MODES.items():
+        with multiprocessing.get_context("fork").Pool(1) as pool:
+            try:
+                results[name] = pool.apply(run_mode, (training_kwargs, args))
+            except Exception as error:
+                print("Skipping {0}: {1}".format(name, error))
+
+    device_name = "cuda" if torch.cuda.is_available() else "cpu"
+    print("Batch of {0} at {1}x{2} on {3}\n".format(args.batch_size, *args.resolution, device_name))
+    print("{0:<25}{1:>18}{2:>12}{3:>20}{4:>12}".format("Mode", "Step Time (ms)", "Std", "Peak Memory (MB)", "Loss"))
+    for name, (step_times, peak_memory, loss) in results.items():
+        print(
+            "{0:<25}{1:>18.1f}{2:>12.1f}{3:>20.1f}{4:>12.4f}".format(
+                name, 1000 * step_times.mean(), 1000 * step_times.std(), peak_memory, loss
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ModelTrainer step time and memory across training modes.")
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--num_steps", type=int, default=10)
+    parser.add_argument("--num_warmup_steps", type=int, default=3)
+    parser.add_argument("--resolution", type=int, nargs=2, default=[128, 128])
+    main(parser.parse_args())
@@ -0,0 +1,86 @@
+import argparse
+import os
+import tempfile
+import time
+from functools import partial
+
+import numpy as np
+from synthetic_data import create_trajectory_file
+
+from r2d2.data_processing.timestep_processing import TimestepProcesser
+from r2d2.trajectory_utils.trajectory_reader import TrajectoryReader
+
+
+def per_timestep_load(filepath):
+    traj_reader = TrajectoryReader(filepath, read_images=False)
+    timesteps = [traj_reader.read_timestep(index=i) for i in range(traj_reader.length())]
+    traj_reader.close()
+    return timesteps
+
+
+def columnar_load(filepath, keys=None):
+    traj_reader = TrajectoryReader(filepath, read_images=False)
+    timesteps = list(traj_reader.read_all(keys=keys))
+    traj_reader.close()
+    return timesteps
+
+
+def open_reader(filepath, cache_index=False):
+    traj_reader = TrajectoryReader(filepath, read_images=False, cache_index=cache_index)
+    traj_reader.close()
+
+
+def assert_same_timesteps(timestep_a, timestep_b):
+    assert timestep_a.keys() == timestep_b.keys()
+    for key in timestep_a:
+        if isinstance(timestep_a[key], dict):
+            assert_same_timesteps(timestep_a[key], timestep_b[key])
+        else:
+            assert np.array_equal(timestep_a[key], timestep_b[key]), key
+
+
+def time_function(func, filepath, num_trials):
+    trial_times = []
+    for _ in range(num_trials):
+        start_time = time.perf_counter()
+        func(filepath)
+        trial_times.append(time.perf_counter() - start_time)
+    return np.array(trial_times)
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = os.path.join(tmp_dir, "trajectory.h5")
+        create_trajectory_file(filepath, args.horizon)
+        required_keys = TimestepProcesser().get_required_keys()
+
+        for timestep_a, timestep_b in zip(per_timestep_load(filepath), columnar_load(filepath)):
+            assert_same_timesteps(timestep_a, timestep_b)
+
+        results = {
+            "read_timestep": time_function(per_timestep_load, filepath, args.num_trials),
+            "read_all": time_function(columnar_load, filepath, args.num_trials),
+            "read_all (projected)": time_function(partial(columnar_load, keys=required_keys), filepath, args.num_trials),
+        }
+
+        open_reader(filepath, cache_index=True)
+        open_results = {
+            "tree walk": time_function(open_reader, filepath, args.num_trials),
+            "cached index": time_function(partial(open_reader, cache_index=True), filepath, args.num_trials),
+        }
+
+    print("Horizon: {0} timesteps, {1} trials\n".format(args.horizon, args.num_trials))
+    print("{0:<20}{1:>20}{2:>20}".format("Mode", "Load Time (ms)", "Std (ms)"))
+    for name, trial_times in results.items():
+        print("{0:<20}{1:>20.2f}{2:>20.2f}".format(name, 1000 * trial_times.mean(), 1000 * trial_times.std()))
+
+    print("\n{0:<20}{1:>20}{2:>20}".format("Open Mode", "Open Time (ms)", "Std (ms)"))
+    for name, trial_times in open_results.items():
+        print("{0:<20}{1:>20.2f}{2:>20.2f}".format(name, 1000 * trial_times.mean(), 1000 * trial_times.std()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare load and open times of TrajectoryReader modes.")
+    parser.add_argument("--horizon", type=int, default=300)
+    parser.add_argument("--num_trials", type=int, default=10)
+    main(parser.parse_args())
@@ -0,0 +1,43 @@
+from absl import app, flags
+
+from r2d2.data_loading.packed_dataset import write_packed_dataset
+from r2d2.data_loading.trajectory_sampler import crawler
+
+FLAGS = flags.FLAGS
+flags.DEFINE_string("input_path", "franka_data/success", "Path to input directory")
+flags.DEFINE_string("output_path", "franka_data/packed", "Path to output directory")
+flags.DEFINE_integer("shard_size", 10000, "Minimum number of timesteps per shard")
+
+# Should Match The Training Variant, Apart From Random Image Transforms #
+CAMERA_KWARGS = dict(
+    hand_camera=dict(image=True, concatenate_images=False, resolution=(128, 128), resize_func="cv2"),
+    varied_camera=dict(image=True, concatenate_images=False, resolution=(128, 128), resize_func="cv2"),
+)
+TIMESTEP_FILTERING_KWARGS = dict(
+    action_space="cartesian_velocity",
+    robot_state_keys=["cartesian_position", "gripper_position", "joint_positions"],
+    camera_extrinsics=[],
+)
+IMAGE_TRANSFORM_KWARGS = dict(remove_alpha=True, bgr_to_rgb=True)
+TRAJ_LOADING_KWARGS = dict(remove_skipped_steps=True, read_cameras=True)
+
+
+def main(_):
+    all_paths = crawler(FLAGS.input_path)
+    dataset_index = write_packed_dataset(
+        all_paths,
+        FLAGS.output_path,
+        shard_size=FLAGS.shard_size,
+        recording_prefix="MP4",
+        traj_loading_kwargs=TRAJ_LOADING_KWARGS,
+        timestep_filtering_kwargs=TIMESTEP_FILTERING_KWARGS,
+        image_transform_kwargs=IMAGE_TRANSFORM_KWARGS,
+        camera_kwargs=CAMERA_KWARGS,
+    )
+
+    num_timesteps = sum(dataset_index["shard_lengths"])
+    print("Packed {0} timesteps from {1} trajectories".format(num_timesteps, len(dataset_index["trajectories"])))
+
+
+if __name__ == "__main__":
+    app.run(main)
@@ -6,8 +6,14 @@ import tqdm
 from absl import app, flags, logging
 from tqdm_multiprocess import TqdmMultiProcessPool
 
-from r2d2.data_loading.trajectory_sampler import crawler
-from r2d2.trajectory_utils.misc import load_trajectory
+from r2d2.data_loading.tfrecord_writer import (
+    merge_manifests,
+    write_interleaved_tfrecords,
+    write_manifest,
+    write_trajectory_tfrecord,
+)
+from r2d2.data_loading.trajectory_index import TrajectoryIndex
+from r2d2.data_loading.trajectory_sampler import crawler, load_split_metadata, split_trajectories
 
 """
 AVAILABLE KEYS:
@@ -94,25 +100,6 @@ observation/image/20521388_right
 """
 
 
-def flatten(x):
-    d = {}
-    for k, v in x.items():
-        if isinstance(v, dict):
-            for k2, v2 in flatten(v).items():
-                d[k + "/" + k2] = v2
-        else:
-            d[k] = v
-    return d
-
-
-def tensor_feature(value):
-    return tf.train.Feature(bytes_list=tf.train.BytesList(value=[tf.io.serialize_tensor(value).numpy()]))
-
-
-def resize_and_encode(image, size):
-    return tf.io.encode_jpeg(tf.cast(tf.round(tf.image.resize(image, size, method="bicubic")), tf.uint8))
-
-
 FLAGS = flags.FLAGS
 flags.DEFINE_string("input_path", "franka_data/success", "Path to input directory")
 flags.DEFINE_string("output_path", "franka_data/tfrecords", "Path to output directory")
@@ -120,6 +107,16 @@ flags.DEFINE_bool("overwrite", False, "Overwrite existing tfrecords")
 flags.DEFINE_float("train_fraction", 0.8, "Fraction of data to use for training")
 flags.DEFINE_integer("shard_size", 200, "Maximum number of trajectories per tfrecord")
 flags.DEFINE_integer("num_workers", 8, "Number of workers to use for parallel processing")
+flags.DEFINE_bool("use_index", True, "Discover trajectories through the cached metadata index")
+flags.DEFINE_list("stratify_keys", ["lab", "scene_id", "current_task"], "Metadata keys to stratify the split by")
+flags.DEFINE_integer("split_seed", 0, "Seed for the hash based train/test split")
+flags.DEFINE_integer("frameskip", 1, "Keep every frameskip-th timestep")
+flags.DEFINE_integer("read_ahead", 8, "Number of frames each camera decodes ahead of the JPEG encoder")
+flags.DEFINE_enum("layout", "trajectory", ["trajectory", "transition"], "Write one example per trajectory or transition")
+flags.DEFINE_enum("feature_encoding", "tensor", ["tensor", "native"], "Serialized tensors or float/int64/JPEG lists")
+flags.DEFINE_integer("window_size", 1, "Consecutive transitions per example, for the transition layout")
+flags.DEFINE_integer("files_per_shard", 8, "Files each shard of trajectories is spread over, for the transition layout")
+flags.DEFINE_integer("write_shuffle_buffer", 1000, "Examples shuffled before writing, for the transition layout")
 
 
 KEEP_KEYS = [
@@ -137,42 +134,32 @@ KEEP_KEYS = [
     "observation/image/20521388_right",
 ]
 
-FRAMESKIP = 1
 IMAGE_SIZE = (180, 320)
 
 
-def create_tfrecord(paths, output_path, tqdm_func, global_tqdm):
-    writer = tf.io.TFRecordWriter(output_path)
+def create_tfrecord(paths, output_path, writer_kwargs, tqdm_func, global_tqdm):
+    # frameskip, key selection and resizing happen while reading, and each trajectory is written as soon as it is
+    # encoded, so memory is bounded by the encoded images of one trajectory
+    return write_trajectory_tfrecord(
+        paths,
+        output_path,
+        keep_keys=KEEP_KEYS,
+        image_size=IMAGE_SIZE,
+        progress_callback=lambda: global_tqdm.update(1),
+        **writer_kwargs,
+    )
 
-    for path in paths:
-        h5_filepath = os.path.join(path, "trajectory.h5")
-        recording_folderpath = os.path.join(path, "recordings", "MP4")
 
-        # this is really inefficient, should really do frame skipping inside `load_trajectory` but I didn't want to mess
-        # with it for now
-        traj = load_trajectory(h5_filepath, recording_folderpath=recording_folderpath)
-        traj = traj[::FRAMESKIP]
-
-        # each element of `traj` is a possibly nested dict; flatten them and make sure they all have the same keys
-        traj_flat = [flatten(t) for t in traj]
-        assert all(t.keys() == traj_flat[0].keys() for t in traj_flat)
-
-        # convert to a single dict of lists, processing images and discarding unwanted keys along the way
-        out = {}
-        for key in traj_flat[0].keys():
-            if key not in KEEP_KEYS:
-                continue
-            if "image" in key:
-                out[key] = [resize_and_encode(t[key], IMAGE_SIZE) for t in traj_flat]
-            else:
-                out[key] = [t[key] for t in traj_flat]
-        example = tf.train.Example(features=tf.train.Features(feature={k: tensor_feature(v) for k, v in out.items()}))
-
-        writer.write(example.SerializeToString())
-
-        global_tqdm.update(1)
-
-    writer.close()
+def create_transition_tfrecords(paths, output_paths, writer_kwargs, tqdm_func, global_tqdm):
+    # every trajectory in the shard is spread over all of its output files, already shuffled
+    return write_interleaved_tfrecords(
+        paths,
+        output_paths,
+        keep_keys=KEEP_KEYS,
+        image_size=IMAGE_SIZE,
+        progress_callback=lambda: global_tqdm.update(1),
+        **writer_kwargs,
+    )
 
 
 def main(_):
@@ -184,14 +171,19 @@ def main(_):
             logging.info(f"{FLAGS.output_path} exists, exiting")
             return
 
-    all_paths = crawler(FLAGS.input_path)
+    all_paths = crawler(FLAGS.input_path, use_index=FLAGS.use_index)
     all_paths = [p for p in all_paths if os.path.exists(p + "/trajectory.h5") and os.path.exists(p + "/recordings/MP4")]
 
-    # train/test split
-    # might be a good idea to do a stratified split, but that would require significant changes in `crawler`
-    np.random.shuffle(all_paths)
-    train_paths = all_paths[: int(len(all_paths) * FLAGS.train_fraction)]
-    test_paths = all_paths[int(len(all_paths) * FLAGS.train_fraction) :]
+    # train/test split, stable across runs and machines
+    records = {}
+    if FLAGS.use_index:
+        records = {r["folderpath"]: r for r in TrajectoryIndex(FLAGS.input_path).get_records()}
+    metadata = [load_split_metadata(p, record=records.get(p)) for p in all_paths]
+    train_paths, test_paths = split_trajectories(
+        all_paths, metadata, train_p=FLAGS.train_fraction, stratify_keys=FLAGS.stratify_keys, seed=FLAGS.split_seed
+    )
+    np.random.shuffle(train_paths)
+    np.random.shuffle(test_paths)
 
     # shard paths
     train_shards = np.array_split(train_paths, np.ceil(len(train_paths) / FLAGS.shard_size))
@@ -200,18 +192,43 @@ def main(_):
     # create output paths
     tf.io.gfile.makedirs(os.path.join(FLAGS.output_path, "train"))
     tf.io.gfile.makedirs(os.path.join(FLAGS.output_path, "test"))
-    train_output_paths = [os.path.join(FLAGS.output_path, "train", f"{i}.tfrecord") for i in range(len(train_shards))]
-    test_output_paths = [os.path.join(FLAGS.output_path, "test", f"{i}.tfrecord") for i in range(len(test_shards))]
+    shards = [(shard, "train", i) for i, shard in enumerate(train_shards)]
+    shards += [(shard, "test", i) for i, shard in enumerate(test_shards)]
 
     # create tasks (see tqdm_multiprocess documenation)
-    tasks = [(create_tfrecord, (train_shards[i], train_output_paths[i])) for i in range(len(train_shards))] + [
-        (create_tfrecord, (test_shards[i], test_output_paths[i])) for i in range(len(test_shards))
-    ]
+    tasks = []
+    for shard, split, i in shards:
+        writer_kwargs = dict(
+            frameskip=FLAGS.frameskip, read_ahead=FLAGS.read_ahead, feature_encoding=FLAGS.feature_encoding
+        )
+        if FLAGS.layout == "trajectory":
+            output_path = os.path.join(FLAGS.output_path, split, f"{i}.tfrecord")
+            tasks.append((create_tfrecord, (shard, output_path, writer_kwargs)))
+        else:
+            output_paths = [
+                os.path.join(FLAGS.output_path, split, f"{i}-{j}.tfrecord") for j in range(FLAGS.files_per_shard)
+            ]
+            writer_kwargs.update(
+                window_size=FLAGS.window_size, shuffle_buffer_size=FLAGS.write_shuffle_buffer, seed=len(tasks)
+            )
+            tasks.append((create_transition_tfrecords, (shard, output_paths, writer_kwargs)))
 
     # run tasks
     pool = TqdmMultiProcessPool(FLAGS.num_workers)
     with tqdm.tqdm(total=len(all_paths), dynamic_ncols=True) as pbar:
-        pool.map(pbar, tasks, lambda _: None, lambda _: None)
+        results = pool.map(pbar, tasks, lambda _: None, lambda _: None)
+
+    # describe each split so the loader doesn't have to infer the schema from the data
+    for split in ["train", "test"]:
+        manifest = merge_manifests(
+            [result for result, (_, shard_split, _) in zip(results, shards) if shard_split == split],
+            layout=FLAGS.layout,
+            window_size=FLAGS.window_size if FLAGS.layout == "transition" else None,
+            feature_encoding=FLAGS.feature_encoding,
+            image_size=list(IMAGE_SIZE),
+            frameskip=FLAGS.frameskip,
+        )
+        write_manifest(os.path.join(FLAGS.output_path, split), manifest)
 
 
 if __name__ == "__main__":
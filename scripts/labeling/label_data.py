@@ -3,7 +3,7 @@ import os
 from collections import defaultdict
 
 from r2d2.camera_utils.wrappers.recorded_multi_camera_wrapper import RecordedMultiCameraWrapper
-from r2d2.training.data_loading.trajectory_sampler import collect_data_folderpaths
+from r2d2.data_loading.trajectory_sampler import collect_data_folderpaths
 from r2d2.trajectory_utils.misc import visualize_timestep
 from r2d2.trajectory_utils.trajectory_reader import TrajectoryReader
 
@@ -179,7 +179,7 @@ def filter_func(h5_metadata):
     return keep
 
 
-traj_folders = collect_data_folderpaths(filter_func=filter_func, remove_failures=True)
+traj_folders = collect_data_folderpaths(filter_func=filter_func, remove_failures=True, use_index=True)
 labeled_trajectories = list(load_task_info().keys())
 labeled_traj_dict = load_task_info()
 
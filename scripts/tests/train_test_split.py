@@ -0,0 +1,114 @@
+import json
+import os
+import tempfile
+
+import h5py
+import numpy as np
+
+from r2d2.data_loading.trajectory_index import TrajectoryIndex
+from r2d2.data_loading.trajectory_sampler import load_split_metadata, split_trajectories
+
+
+def create_metadata(num_traj, lab, offset=0):
+    return [{"uuid": "{0}+{1}".format(lab, i), "lab": lab} for i in range(offset, offset + num_traj)]
+
+
+def get_split(metadata, **split_kwargs):
+    folderpaths = [traj_metadata["uuid"] for traj_metadata in metadata]
+    train_folderpaths, test_folderpaths = split_trajectories(folderpaths, metadata, **split_kwargs)
+    return set(train_folderpaths), set(test_folderpaths)
+
+
+def test_stratum_holdouts(train_p=0.9):
+    # Every Stratum Large Enough To Expect A Test Trajectory Has One #
+    for num_traj in range(10, 15):
+        metadata = []
+        for lab_ind in range(50):
+            metadata += create_metadata(num_traj, "lab{0}".format(lab_ind))
+        _, test_folderpaths = get_split(metadata, train_p=train_p, stratify_keys=["lab"])
+
+        test_labs = set([folderpath.split("+")[0] for folderpath in test_folderpaths])
+        assert len(test_labs) == 50, "{0} of 50 strata of size {1} have test data".format(len(test_labs), num_traj)
+
+    # Small Strata Keep The Requested Test Fraction #
+    metadata = []
+    for lab_ind in range(1000):
+        metadata += create_metadata(2, "lab{0}".format(lab_ind))
+    _, test_folderpaths = get_split(metadata, train_p=train_p, stratify_keys=["lab"])
+    test_p = len(test_folderpaths) / len(metadata)
+    assert abs(test_p - (1 - train_p)) < 0.03, "Test fraction is {0:.3f}".format(test_p)
+
+
+def test_stability(train_p=0.9):
+    # Adding Trajectories Never Moves An Existing One Outside Of Forced Holdouts #
+    metadata = create_metadata(200, "lab0") + create_metadata(100, "lab1")
+    train_folderpaths, test_folderpaths = get_split(metadata, train_p=train_p, stratify_keys=["lab"])
+
+    for lab in ["lab0", "lab1", "lab2"]:
+        metadata += create_metadata(100, lab, offset=1000)
+        new_train_folderpaths, new_test_folderpaths = get_split(metadata, train_p=train_p, stratify_keys=["lab"])
+        assert train_folderpaths <= new_train_folderpaths
+        assert test_folderpaths <= new_test_folderpaths
+        train_folderpaths, test_folderpaths = new_train_folderpaths, new_test_folderpaths
+
+    # Test Fraction Follows train_p #
+    test_p = len(test_folderpaths) / len(metadata)
+    assert abs(test_p - (1 - train_p)) < 0.05, "Test fraction is {0:.3f}".format(test_p)
+
+
+def test_order_invariance(train_p=0.9):
+    metadata = create_metadata(100, "lab0") + create_metadata(100, "lab1")
+    assert get_split(metadata, train_p=train_p) == get_split(metadata[::-1], train_p=train_p)
+
+
+def write_trajectory_folder(folderpath, attrs, metadata=None):
+    os.makedirs(folderpath)
+    with h5py.File(os.path.join(folderpath, "trajectory.h5"), "w") as hdf5_file:
+        hdf5_file.create_dataset("action/cartesian_velocity", data=np.zeros((10, 6)))
+        hdf5_file.attrs.update(attrs)
+    if metadata is not None:
+        with open(os.path.join(folderpath, "metadata_{0}.json".format(metadata["uuid"])), "w") as jsonFile:
+            json.dump(metadata, jsonFile)
+
+
+def test_index_metadata():
+    with tempfile.TemporaryDirectory() as data_dir:
+        folderpaths = [os.path.join(data_dir, name) for name in ["raw", "postprocessed"]]
+        postprocessed_metadata = {"uuid": "lab0+0000+2023-01-01", "lab": "lab0"}
+        write_trajectory_folder(folderpaths[0], {"user": "user0", "time": "2023-01-02", "lab": "lab1"})
+        write_trajectory_folder(folderpaths[1], {"user": "user0", "time": "2023-01-01"}, postprocessed_metadata)
+
+        traj_index = TrajectoryIndex(data_dir, index_filepath=os.path.join(data_dir, "index.db"))
+        traj_index.refresh()
+        records = {record["folderpath"]: record for record in traj_index.get_records()}
+
+        # The Index Provides The Metadata JSON, Or Falls Back To HDF5 Attrs #
+        assert load_split_metadata(folderpaths[1], record=records[folderpaths[1]]) == postprocessed_metadata
+        raw_metadata = load_split_metadata(folderpaths[0], record=records[folderpaths[0]])
+        assert (raw_metadata["uuid"], raw_metadata["lab"]) == ("user0+2023-01-02", "lab1")
+
+        # Without The Index, Only Metadata JSONs Are Read #
+        assert load_split_metadata(folderpaths[1]) == postprocessed_metadata
+        try:
+            load_split_metadata(folderpaths[0])
+            raise AssertionError("Trajectory without metadata JSON was not reported")
+        except ValueError:
+            pass
+
+        # Metadata Written After Indexing Is Picked Up #
+        new_metadata = {"uuid": "lab1+0000+2023-01-02", "lab": "lab1"}
+        with open(os.path.join(folderpaths[0], "metadata_{0}.json".format(new_metadata["uuid"])), "w") as jsonFile:
+            json.dump(new_metadata, jsonFile)
+        # Filesystems With Coarse Timestamps May Not Change The Folder mtime Within A Test #
+        os.utime(folderpaths[0], ns=(0, os.stat(folderpaths[0]).st_mtime_ns + 1))
+        traj_index.refresh()
+        records = {record["folderpath"]: record for record in traj_index.get_records()}
+        assert load_split_metadata(folderpaths[0], record=records[folderpaths[0]]) == new_metadata
+
+
+if __name__ == "__main__":
+    test_stratum_holdouts()
+    test_stability()
+    test_order_invariance()
+    test_index_metadata()
+    print("Train/test split checks passed")
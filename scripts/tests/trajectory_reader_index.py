@@ -0,0 +1,61 @@
+import os
+import tempfile
+
+import h5py
+import numpy as np
+
+from r2d2.trajectory_utils.trajectory_reader import TrajectoryReader, get_index_filepath
+
+
+def write_trajectory(filepath, horizon, extra_keys=[]):
+    with h5py.File(filepath, "w") as hdf5_file:
+        hdf5_file.create_dataset("action/cartesian_velocity", data=np.zeros((horizon, 6)))
+        hdf5_file.create_dataset("observation/controller_info/movement_enabled", data=np.ones(horizon, dtype=bool))
+        for key in extra_keys:
+            hdf5_file.create_dataset(key, data=np.zeros(horizon))
+
+
+def read_length(filepath):
+    traj_reader = TrajectoryReader(filepath, read_images=False, cache_index=True)
+    length = traj_reader.length()
+    traj_reader.close()
+    return length
+
+
+def test_index_invalidation(tmp_dir):
+    # Rewriting The File Must Rebuild The Sidecar Index #
+    filepath = os.path.join(tmp_dir, "trajectory.h5")
+    write_trajectory(filepath, 10)
+    assert read_length(filepath) == 10
+    assert os.path.isfile(get_index_filepath(filepath))
+    assert read_length(filepath) == 10
+
+    write_trajectory(filepath, 20, extra_keys=["action/gripper_velocity"])
+    assert read_length(filepath) == 20
+
+    # No Temporary Files Are Left Behind #
+    assert sorted(os.listdir(tmp_dir)) == ["trajectory.h5", "trajectory_index.json"]
+
+
+def test_missing_keys(tmp_dir):
+    filepath = os.path.join(tmp_dir, "trajectory.h5")
+    write_trajectory(filepath, 10)
+    traj_reader = TrajectoryReader(filepath, read_images=False)
+
+    try:
+        traj_reader.read_all(keys=["action/gripper_velocity"])
+        raise AssertionError("Missing key was not reported")
+    except KeyError:
+        pass
+
+    columns = traj_reader.read_all(keys=["action"], optional_keys=["action/gripper_velocity"]).columns
+    assert list(columns["action"].keys()) == ["cartesian_velocity"]
+    traj_reader.close()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_index_invalidation(tmp_dir)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_missing_keys(tmp_dir)
+    print("Trajectory reader index checks passed")
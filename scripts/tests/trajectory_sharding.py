@@ -0,0 +1,62 @@
+from collections import namedtuple
+
+import numpy as np
+
+from r2d2.data_loading.trajectory_sampler import TrajectorySampler, partition_trajectories
+
+WorkerInfo = namedtuple("WorkerInfo", ["id", "num_workers"])
+
+
+def create_sampler(num_traj, rank, world_size):
+    traj_sampler = TrajectorySampler([str(i) for i in range(num_traj)], rank=rank, world_size=world_size)
+
+    # Skip Reading Trajectory Files #
+    traj_sampler._traj_costs = list(np.random.RandomState(0).randint(50, 500, size=num_traj))
+    traj_sampler.process_trajectory = lambda folderpath: [folderpath]
+    return traj_sampler
+
+
+def test_partition(num_traj=100, num_shards=8):
+    traj_costs = np.random.RandomState(0).randint(0, 500, size=num_traj)
+    for seed in range(5):
+        shards = partition_trajectories(traj_costs, num_shards, seed=seed)
+        assert sorted(sum(shards, [])) == list(range(num_traj))
+        assert all(len(shard) for shard in shards)
+
+
+def test_shards_change_between_epochs(num_traj=60, world_size=2, num_workers=3, num_epochs=3):
+    # Collect What Every Worker Of Every Rank Reads During Each Pass Over Its Shard #
+    epoch_shards = [[] for _ in range(num_epochs)]
+    for rank in range(world_size):
+        traj_sampler = create_sampler(num_traj, rank, world_size)
+        for worker_id in range(num_workers):
+            worker_info = WorkerInfo(id=worker_id, num_workers=num_workers)
+            traj_sampler.epoch, traj_sampler._traj_queue = 0, []
+
+            for epoch in range(num_epochs):
+                shard_size = len(traj_sampler.get_shard(worker_info=worker_info, epoch=epoch))
+                shard = [traj_sampler.fetch_samples(worker_info=worker_info)[0] for _ in range(shard_size)]
+                assert traj_sampler.epoch == epoch + 1
+                epoch_shards[epoch].append(sorted(shard, key=int))
+
+    # Each Epoch Covers Every Trajectory Exactly Once, With A New Assignment #
+    for shards in epoch_shards:
+        assert sorted(sum(shards, []), key=int) == [str(i) for i in range(num_traj)]
+    for epoch in range(1, num_epochs):
+        assert epoch_shards[epoch] != epoch_shards[epoch - 1]
+
+
+def test_more_shards_than_trajectories(num_traj=3, num_workers=4):
+    # Empty Shards Stay Empty, So Workers Without Trajectories Can Stop #
+    traj_sampler = create_sampler(num_traj, rank=0, world_size=1)
+    for worker_id in range(num_workers):
+        worker_info = WorkerInfo(id=worker_id, num_workers=num_workers)
+        shards = [traj_sampler.get_shard(worker_info=worker_info, epoch=epoch) for epoch in range(5)]
+        assert all(shard == shards[0] for shard in shards)
+
+
+if __name__ == "__main__":
+    test_partition()
+    test_shards_change_between_epochs()
+    test_more_shards_than_trajectories()
+    print("Trajectory sharding checks passed")
@@ -21,6 +21,9 @@ variant = dict(
         grad_steps_per_epoch=1000,
         weight_decay=1e-4,
         lr=1e-4,
+        precision="fp32",  # "bf16" or "fp16" to train under autocast
+        channels_last=False,
+        compile_model=False,
     ),
     camera_kwargs=dict(
         hand_camera=dict(image=True, concatenate_images=False, resolution=(128, 128), resize_func="cv2"),
@@ -36,7 +39,7 @@ variant = dict(
             remove_alpha=True,
             bgr_to_rgb=True,
             to_tensor=True,
-            augment=False,
+            augment=False,  # True for per-sample AugMix in workers, "batch" to augment collated batches
         ),
     ),
     data_loader_kwargs=dict(
@@ -69,6 +72,7 @@ variant = dict(
         num_state_hidden=200,
         num_policy_layers=3,
         num_policy_hidden=300,
+        stack_camera_views=True,
     ),
 )
 
@@ -15,7 +15,7 @@ if not os.path.exists(PLOT_FOLDERPATH):
     os.makedirs(PLOT_FOLDERPATH)
 
 # Run Data Crawler #
-data_crawler(data_directory, func_list=[analysis_func])
+data_crawler(data_directory, func_list=[analysis_func], use_index=True)
 
 # Prepare Cumulative Values #
 cumulative_dicts = [traj_progress_dict, scene_progress_dict]
@@ -5,7 +5,7 @@ from r2d2.trajectory_utils.misc import visualize_trajectory
 
 logdir = "/home/sasha/R2D2/data/success/2023-04-20"
 
-all_folderpaths = crawler(logdir)
+all_folderpaths = crawler(logdir, use_index=True)
 random.shuffle(all_folderpaths)
 
 camera_kwargs = dict(